@@ -35,8 +35,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'meuapp.middleware.MetricasMiddleware',
+    'meuapp.middleware.PerfilMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'meuapp.middleware.PrecompressedStaticMiddleware',
+    'meuapp.middleware.RepeatedQueryMiddleware',
+    'meuapp.middleware.ReadReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'meuapp.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -46,11 +52,15 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'devlab.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -58,6 +68,10 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Em produção os templates são compilados uma única vez por processo
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
@@ -68,13 +82,224 @@ WSGI_APPLICATION = 'devlab.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Perfil escolhido por DATABASE_ENGINE no .env:
+# - sqlite3 (padrão): arquivo local, um único escritor por vez;
+# - postgresql: produção. Conexões persistentes (DATABASE_CONN_MAX_AGE
+#   segundos, verificadas antes de reutilizar) e cursores no servidor para
+#   os .iterator() (exportações e comandos que percorrem tabelas inteiras).
+#   Com PgBouncer em modo transaction, defina DATABASE_PGBOUNCER=True: cursores
+#   no servidor não sobrevivem à troca de conexão do pool e são desligados.
+DATABASE_ENGINE = config('DATABASE_ENGINE', default='sqlite3')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DATABASE_NAME', default='devlab'),
+            'USER': config('DATABASE_USER', default='devlab'),
+            'PASSWORD': config('DATABASE_PASSWORD', default=''),
+            'HOST': config('DATABASE_HOST', default='localhost'),
+            'PORT': config('DATABASE_PORT', default='5432'),
+            # Sob ASGI (uvicorn) use 0 e um pool externo (PgBouncer): as
+            # conexões persistentes são por thread e não são reaproveitadas
+            # entre requests assíncronos
+            'CONN_MAX_AGE': config('DATABASE_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': config('DATABASE_PGBOUNCER', default=False, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DATABASE_CONNECT_TIMEOUT', default=5, cast=int),
+                'application_name': 'devlab',
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        }
     }
+
+# Réplica de leitura opcional (meuapp/routers.py): as leituras dos requests
+# GET/HEAD vão para ela e o resto para o banco principal. Após uma escrita, a
+# sessão lê só do principal por DATABASE_REPLICA_PIN segundos.
+# - postgresql: DATABASE_REPLICA_HOST (e DATABASE_REPLICA_PORT) do servidor
+#   réplica, com as mesmas credenciais do principal;
+# - sqlite3: DATABASE_REPLICA_NAME, uma cópia local atualizada por
+#   "python manage.py sincronizar_replica".
+if DATABASE_ENGINE == 'postgresql':
+    DATABASE_REPLICA_HOST = config('DATABASE_REPLICA_HOST', default='')
+    replica = DATABASE_REPLICA_HOST and dict(
+        DATABASES['default'],
+        HOST=DATABASE_REPLICA_HOST,
+        PORT=config('DATABASE_REPLICA_PORT', default=DATABASES['default']['PORT']),
+    )
+else:
+    DATABASE_REPLICA_NAME = config('DATABASE_REPLICA_NAME', default='')
+    replica = DATABASE_REPLICA_NAME and dict(DATABASES['default'], NAME=DATABASE_REPLICA_NAME)
+
+DATABASE_REPLICA_ALIAS = 'replica' if replica else None
+DATABASE_REPLICA_PIN = config('DATABASE_REPLICA_PIN', default=5, cast=int)
+if DATABASE_REPLICA_ALIAS:
+    # Nos testes a réplica é o próprio banco de teste principal
+    DATABASES[DATABASE_REPLICA_ALIAS] = dict(replica, TEST={'MIRROR': 'default'})
+DATABASE_ROUTERS = ['meuapp.routers.ReadWriteRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Em arquivo por padrão: as versões dos fragmentos, os totais de solicitações e
+# a versão do cache de usuários são trocadas por sinais no processo que gravou,
+# e os demais workers da máquina só veem a troca por um cache compartilhado
+# (com LocMemCache, cada processo seguiria servindo os dados antigos). Com mais
+# de uma máquina, use Redis ou Memcached (CACHE_BACKEND e CACHE_LOCATION).
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache', 'default')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
+    },
+    # Cache exclusivo das sessões, para que o descarte de fragmentos não
+    # derrube sessões. Em arquivo por padrão: é compartilhado entre os processos
+    # da mesma máquina (com LocMemCache, um logout feito em um worker não seria
+    # visto pelos outros até o cache expirar).
+    'sessions': {
+        'BACKEND': config('SESSION_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('SESSION_CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache', 'sessions')),
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('SESSION_CACHE_MAX_ENTRIES', default=20000, cast=int),
+        },
+    },
 }
 
+# Tempo máximo (segundos) dos fragmentos em cache dos dashboards; as chaves são
+# versionadas e trocadas por sinais quando os dados mudam (meuapp/cache.py)
+DASHBOARD_CACHE_TIMEOUT = config('DASHBOARD_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+# Tempo de vida das versões (meuapp/cache.py). Uma versão expirada é trocada
+# por outra nova: custa só recalcular os fragmentos que a usavam.
+CACHE_VERSOES_TIMEOUT = config('CACHE_VERSOES_TIMEOUT', default=DASHBOARD_CACHE_TIMEOUT, cast=int)
+# Totais de solicitações por status: apagados por sinais a cada gravação; o
+# tempo de vida limita o atraso se uma alteração escapar dos sinais
+# (update(), bulk_create() ou o banco alterado por fora)
+SOLICITACOES_TOTAIS_TIMEOUT = config('SOLICITACOES_TOTAIS_TIMEOUT', default=300, cast=int)
+
+
+# Sessões e mensagens
+# https://docs.djangoproject.com/en/4.2/topics/http/sessions/
+# cached_db: leituras vêm do cache; o SQLite só é lido em cache miss e só é
+# escrito quando a sessão muda. Sessões expiradas continuam no banco até o
+# comando clearsessions rodar (ver README).
+
+SESSION_ENGINE = config('SESSION_ENGINE', default='django.contrib.sessions.backends.cached_db')
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_COOKIE_AGE = config('SESSION_COOKIE_AGE', default=60 * 60 * 24 * 14, cast=int)
+# Nunca regravar sessões inalteradas a cada request; a renovação da expiração é
+# feita no máximo uma vez a cada SESSION_REFRESH_INTERVAL segundos por
+# meuapp.middleware.SessionRefreshMiddleware (0 desativa a renovação)
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = config('SESSION_REFRESH_INTERVAL', default=60 * 60, cast=int)
+
+# Mensagens ficam primeiro em cookie; a sessão só é usada se não couberem nele
+MESSAGE_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
+
+
+# Eventos em tempo real das solicitações de cadastro (meuapp/eventos.py)
+# MemoriaBackend só entrega eventos publicados no mesmo processo; com vários
+# workers use meuapp.eventos.CacheBackend e um cache compartilhado.
+EVENTOS_BACKEND = config('EVENTOS_BACKEND', default='meuapp.eventos.MemoriaBackend')
+EVENTOS_BUFFER = config('EVENTOS_BUFFER', default=100, cast=int)
+# Duração máxima de cada conexão SSE (o navegador reconecta sozinho) e espera
+# máxima do long-polling, em segundos
+EVENTOS_SSE_DURACAO = config('EVENTOS_SSE_DURACAO', default=300, cast=int)
+EVENTOS_LONGPOLL_TIMEOUT = config('EVENTOS_LONGPOLL_TIMEOUT', default=25, cast=int)
+# Sob WSGI as conexões não ficam abertas (prenderiam um worker): o cliente
+# pergunta por novos eventos a cada EVENTOS_INTERVALO_WSGI segundos
+EVENTOS_INTERVALO_WSGI = config('EVENTOS_INTERVALO_WSGI', default=10, cast=int)
+
+
+# Detector de N+1 (meuapp.middleware.RepeatedQueryMiddleware), para
+# desenvolvimento e homologação: avisa (ou, com CONSULTAS_REPETIDAS_ERRO, falha
+# o request) quando a mesma consulta roda mais de CONSULTAS_REPETIDAS_LIMITE
+# vezes em um request
+CONSULTAS_REPETIDAS_DETECTAR = config('CONSULTAS_REPETIDAS_DETECTAR', default=DEBUG, cast=bool)
+CONSULTAS_REPETIDAS_LIMITE = config('CONSULTAS_REPETIDAS_LIMITE', default=5, cast=int)
+CONSULTAS_REPETIDAS_ERRO = config('CONSULTAS_REPETIDAS_ERRO', default=False, cast=bool)
+
+# Métricas no formato do Prometheus em /metrics (meuapp/metricas.py). Com
+# vários processos, METRICAS_DIR é um diretório comum a eles (limpe-o ao
+# reiniciar o serviço); vazio, cada processo expõe só os próprios valores.
+METRICAS_ATIVAS = config('METRICAS_ATIVAS', default=True, cast=bool)
+METRICAS_DIR = config('METRICAS_DIR', default='')
+# Intervalo mínimo (segundos) entre as gravações da cópia de cada processo
+METRICAS_INTERVALO = config('METRICAS_INTERVALO', default=5, cast=int)
+# Token exigido em "Authorization: Bearer <token>". Sem token, /metrics é
+# negado, a menos que METRICAS_PERMITIR_LOCAL libere localhost. Não use o
+# METRICAS_PERMITIR_LOCAL atrás de um proxy reverso local (nginx ->
+# gunicorn em 127.0.0.1): todos os requests externos chegam de 127.0.0.1
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+METRICAS_PERMITIR_LOCAL = config('METRICAS_PERMITIR_LOCAL', default=False, cast=bool)
+
+# Limite de tentativas de login (meuapp/limites.py), por IP e por usuário/e-mail
+# digitado. O estado fica no cache LOGIN_LIMITE_CACHE, nunca no banco; com o
+# cache em arquivo padrão os limites valem para os processos da máquina.
+LOGIN_LIMITE_ATIVO = config('LOGIN_LIMITE_ATIVO', default=True, cast=bool)
+LOGIN_LIMITE_CACHE = config('LOGIN_LIMITE_CACHE', default='default')
+# Balde de fichas: tentativas seguidas permitidas e reposição por minuto. O IP
+# é mais folgado: uma turma inteira pode sair pelo mesmo NAT da faculdade.
+# Reposição 0 = sem reposição: o balde só volta cheio LOGIN_BLOQUEIO_MAXIMO
+# segundos depois da última tentativa aceita.
+LOGIN_RAJADA_IP = config('LOGIN_RAJADA_IP', default=50, cast=int)
+LOGIN_POR_MINUTO_IP = config('LOGIN_POR_MINUTO_IP', default=20, cast=float)
+LOGIN_RAJADA_USUARIO = config('LOGIN_RAJADA_USUARIO', default=5, cast=int)
+LOGIN_POR_MINUTO_USUARIO = config('LOGIN_POR_MINUTO_USUARIO', default=2, cast=float)
+# Bloqueio progressivo: com N senhas erradas seguidas, LOGIN_BLOQUEIO_SEGUNDOS,
+# dobrando a cada nova falha até LOGIN_BLOQUEIO_MAXIMO
+LOGIN_BLOQUEIO_FALHAS_IP = config('LOGIN_BLOQUEIO_FALHAS_IP', default=50, cast=int)
+LOGIN_BLOQUEIO_FALHAS_USUARIO = config('LOGIN_BLOQUEIO_FALHAS_USUARIO', default=5, cast=int)
+LOGIN_BLOQUEIO_SEGUNDOS = config('LOGIN_BLOQUEIO_SEGUNDOS', default=30, cast=int)
+LOGIN_BLOQUEIO_MAXIMO = config('LOGIN_BLOQUEIO_MAXIMO', default=60 * 60, cast=int)
+# Atrás de um proxy reverso: cabeçalho com o IP do cliente (ex: HTTP_X_FORWARDED_FOR);
+# vazio usa REMOTE_ADDR. Só configure se o proxy sobrescrever o cabeçalho.
+LOGIN_IP_CABECALHO = config('LOGIN_IP_CABECALHO', default='')
+
+# Perfil de amostragem dos requests lentos (meuapp/perfilador.py): acima de
+# PERFIL_LIMITE_MS as pilhas amostradas vão para PERFIL_DIR (0 desliga).
+# Resumo: python manage.py perfis_lentos
+PERFIL_LIMITE_MS = config('PERFIL_LIMITE_MS', default=0, cast=float)
+PERFIL_INTERVALO_MS = config('PERFIL_INTERVALO_MS', default=5, cast=float)
+PERFIL_DIR = config('PERFIL_DIR', default=os.path.join(BASE_DIR, 'perfis'))
+# Perfis mantidos em PERFIL_DIR; os mais antigos são apagados
+PERFIL_MAXIMO = config('PERFIL_MAXIMO', default=500, cast=int)
+
+# Tarefas periódicas (python manage.py run_scheduler; meuapp/agendador.py).
+# Cada tarefa tem um lease de TAREFAS_LEASE segundos no banco, renovado a cada
+# lote de até TAREFAS_LOTE itens; após TAREFAS_DURACAO_MAXIMA segundos a
+# execução para entre dois lotes e continua na rodada seguinte.
+TAREFAS_INTERVALO = config('TAREFAS_INTERVALO', default=30, cast=float)
+TAREFAS_LEASE = config('TAREFAS_LEASE', default=5 * 60, cast=int)
+TAREFAS_LOTE = config('TAREFAS_LOTE', default=500, cast=int)
+TAREFAS_DURACAO_MAXIMA = config('TAREFAS_DURACAO_MAXIMA', default=60, cast=int)
+# Espera (segundos) até tentar de novo uma tarefa que falhou
+TAREFAS_ESPERA_ERRO = config('TAREFAS_ESPERA_ERRO', default=10 * 60, cast=int)
+# Nomes separados por vírgula (ex: vacuo_sqlite,lembretes_prazo)
+TAREFAS_DESATIVADAS = config('TAREFAS_DESATIVADAS', default='', cast=Csv())
+# Solicitações pendentes há mais dias que isto são rejeitadas (0 desliga)
+SOLICITACAO_EXPIRACAO_DIAS = config('SOLICITACAO_EXPIRACAO_DIAS', default=30, cast=int)
+# Lembrete por e-mail dos projetos com data_fim_prevista nos próximos N dias
+LEMBRETE_PRAZO_DIAS = config('LEMBRETE_PRAZO_DIAS', default=7, cast=int)
+
+# Arquivo de projetos concluídos (python manage.py arquivar_projetos;
+# meuapp/arquivo.py): os concluídos sem alterações há mais de ARQUIVO_MESES
+# meses saem das tabelas de trabalho, ARQUIVO_LOTE projetos por transação
+ARQUIVO_MESES = config('ARQUIVO_MESES', default=12, cast=int)
+ARQUIVO_LOTE = config('ARQUIVO_LOTE', default=100, cast=int)
+# Projetos por página em /arquivo/
+ARQUIVO_POR_PAGINA = config('ARQUIVO_POR_PAGINA', default=50, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -114,12 +339,35 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Nomes com hash e variantes .gz/.br gerados no collectstatic, que precisa
+# rodar a cada deploy (sem o manifest, {% static %} usa os nomes sem hash)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': config('STATICFILES_BACKEND', default='meuapp.storage.CompressedManifestStaticFilesStorage'),
+    },
+}
+
+# Servir STATIC_ROOT pelo próprio Django (meuapp.middleware.PrecompressedStaticMiddleware).
+# Desative se o servidor web (nginx, mapeamento de estáticos do PythonAnywhere)
+# já servir /static/. Arquivos sem hash no nome ficam STATIC_MAX_AGE segundos em cache.
+STATIC_SERVE = config('STATIC_SERVE', default=True, cast=bool)
+STATIC_MAX_AGE = config('STATIC_MAX_AGE', default=60, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'meuapp.Usuario'
+# Usuário da sessão lido do cache local (meuapp/backends.py). O ModelBackend
+# continua na lista para as sessões criadas antes por ele seguirem válidas.
+AUTHENTICATION_BACKENDS = [
+    'meuapp.backends.UsuarioEmCacheBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
@@ -131,8 +379,10 @@ LOGOUT_REDIRECT_URL = 'login'
 # em vez de enviá-los de verdade.
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
-# Configuração para usar o Gmail (para produção/teste real)
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Configuração para usar o Gmail (para produção/teste real). Os envios são
+# medidos para /metrics e repassados a EMAIL_BACKEND_MEDIDO.
+EMAIL_BACKEND = 'meuapp.metricas.EmailBackendMedido'
+EMAIL_BACKEND_MEDIDO = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Usuario, Projeto, Equipe, ParticipacaoProjeto
+from django.db.models import Count
+from .models import (
+    Usuario, Projeto, Equipe, ParticipacaoProjeto, EstatisticaDiaria, TarefaAgendada, ProjetoArquivado,
+)
 
 
 @admin.register(Usuario)
@@ -11,13 +14,13 @@ class UsuarioAdmin(UserAdmin):
     
     fieldsets = UserAdmin.fieldsets + (
         ('Informações Adicionais', {
-            'fields': ('tipo', 'matricula', 'cpf', 'data_nascimento', 'curso')
+            'fields': ('tipo', 'matricula', 'cpf', 'data_nascimento', 'funcao')
         }),
     )
     
     add_fieldsets = UserAdmin.add_fieldsets + (
         ('Informações Adicionais', {
-            'fields': ('tipo', 'matricula', 'cpf', 'data_nascimento', 'curso')
+            'fields': ('tipo', 'matricula', 'cpf', 'data_nascimento', 'funcao')
         }),
     )
 
@@ -29,17 +32,87 @@ class ProjetoAdmin(admin.ModelAdmin):
     search_fields = ['titulo', 'cliente', 'descricao']
     date_hierarchy = 'data_inicio'
 
+    def get_queryset(self, request):
+        # Contagem anotada na mesma consulta da listagem (evita uma consulta por linha)
+        return super().get_queryset(request).annotate(
+            _total_participantes=Count('equipes__membros', distinct=True)
+        )
+
+    @admin.display(description='Participantes', ordering='_total_participantes')
+    def total_participantes(self, obj):
+        return obj._total_participantes
+
 
 @admin.register(Equipe)
 class EquipeAdmin(admin.ModelAdmin):
     list_display = ['nome', 'projeto', 'lider', 'total_membros', 'criada_em']
     list_filter = ['projeto']
+    list_select_related = ['projeto', 'lider']
     search_fields = ['nome', 'descricao']
-    filter_horizontal = ['membros']
+    autocomplete_fields = ['projeto', 'lider', 'membros']
+
+    def get_queryset(self, request):
+        # Contagem anotada na mesma consulta da listagem (evita uma consulta por linha)
+        return super().get_queryset(request).annotate(_total_membros=Count('membros'))
+
+    @admin.display(description='Membros', ordering='_total_membros')
+    def total_membros(self, obj):
+        return obj._total_membros
 
 
 @admin.register(ParticipacaoProjeto)
 class ParticipacaoProjetoAdmin(admin.ModelAdmin):
     list_display = ['usuario', 'projeto', 'papel', 'data_entrada']
     list_filter = ['projeto', 'data_entrada']
-    search_fields = ['usuario__username', 'projeto__titulo', 'papel']
\ No newline at end of file
+    list_select_related = ['usuario', 'projeto']
+    search_fields = ['usuario__username', 'projeto__titulo', 'papel']
+    autocomplete_fields = ['usuario', 'projeto']
+
+
+@admin.register(EstatisticaDiaria)
+class EstatisticaDiariaAdmin(admin.ModelAdmin):
+    list_display = [
+        'data', 'projetos_andamento', 'equipes_ativas', 'novos_estudantes',
+        'solicitacoes_aprovadas', 'latencia_aprovacao', 'gerada_em',
+    ]
+    date_hierarchy = 'data'
+
+    def has_add_permission(self, request):
+        # Geradas apenas por manage.py snapshot_stats
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TarefaAgendada)
+class TarefaAgendadaAdmin(admin.ModelAdmin):
+    list_display = [
+        'nome', 'proxima_execucao', 'ultimo_inicio', 'ultimo_fim', 'ultimo_status',
+        'ultimos_processados', 'dono', 'lease_ate',
+    ]
+    list_filter = ['ultimo_status']
+    # Só a próxima execução é editável (ex: antecipar uma tarefa); o resto é
+    # gravado por manage.py run_scheduler
+    readonly_fields = [
+        'nome', 'dono', 'lease_ate', 'cursor', 'ultimo_inicio', 'ultimo_fim',
+        'ultimo_status', 'ultimos_processados', 'ultimo_erro',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ProjetoArquivado)
+class ProjetoArquivadoAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'cliente', 'data_inicio', 'data_fim_prevista', 'arquivado_em']
+    date_hierarchy = 'arquivado_em'
+    search_fields = ['titulo', 'cliente']
+    exclude = ['busca']
+
+    def has_add_permission(self, request):
+        # Gravados apenas por manage.py arquivar_projetos
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
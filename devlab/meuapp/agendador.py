@@ -0,0 +1,199 @@
+"""
+Agendador de tarefas periódicas do DevLab Projects
+Arquivo: meuapp/agendador.py
+
+As tarefas de manutenção (meuapp/tarefas.py) rodam dentro do próprio
+projeto, em ``manage.py run_scheduler``, sem broker nem fila externa: o
+estado de cada tarefa fica em uma linha de TarefaAgendada no banco.
+
+Lease: antes de executar, o processo grava o próprio identificador em
+``dono`` com um UPDATE condicional (só se ninguém tiver um lease válido e a
+tarefa estiver no horário); quem atualizou a linha executa, os outros pulam
+a tarefa. O lease dura TAREFAS_LEASE segundos e é renovado a cada lote, então
+um agendador que morreu no meio da execução libera a tarefa sozinho.
+
+Lotes: cada tarefa é um gerador que recebe o cursor salvo e o tamanho do
+lote e, a cada lote processado (e gravado no banco), produz
+``(cursor, quantidade)``. O cursor é salvo junto com a renovação do lease.
+Passados TAREFAS_DURACAO_MAXIMA segundos a execução para entre dois lotes e
+continua na rodada seguinte, para que uma tarefa grande não prenda o
+agendador nem segure o lock de escrita do SQLite por muito tempo.
+"""
+
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TarefaAgendada
+
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================
+# REGISTRO DAS TAREFAS
+# ============================================================
+
+@dataclass
+class Tarefa:
+    """Uma tarefa periódica: a cada ``intervalo`` ou todo dia às ``horario``"""
+    nome: str
+    funcao: object
+    intervalo: timedelta = None
+    horario: object = None
+    descricao: str = ''
+
+    def proxima(self, agora):
+        """Próxima execução depois de uma execução completa em ``agora``"""
+        if self.horario is None:
+            return agora + self.intervalo
+        dia = timezone.localtime(agora).date()
+        proxima = timezone.make_aware(datetime.combine(dia, self.horario))
+        if proxima <= agora:
+            proxima = timezone.make_aware(datetime.combine(dia + timedelta(days=1), self.horario))
+        return proxima
+
+
+# Tarefas registradas por @tarefa, por nome
+TAREFAS = {}
+
+
+def tarefa(nome, intervalo=None, horario=None):
+    """Registra um gerador ``funcao(cursor, lote)`` como tarefa periódica"""
+    if (intervalo is None) == (horario is None):
+        raise ValueError(f'A tarefa {nome} precisa de intervalo ou de horario (só um dos dois).')
+
+    def registrar(funcao):
+        TAREFAS[nome] = Tarefa(
+            nome, funcao, intervalo, horario, (funcao.__doc__ or '').strip().split('\n')[0]
+        )
+        return funcao
+    return registrar
+
+
+def tarefas_ativas():
+    """Tarefas registradas, menos as de TAREFAS_DESATIVADAS"""
+    # Os módulos de tarefas registram as suas ao serem importados
+    from . import tarefas  # noqa: F401
+    desativadas = set(getattr(settings, 'TAREFAS_DESATIVADAS', ()))
+    return {nome: t for nome, t in TAREFAS.items() if nome not in desativadas}
+
+
+# ============================================================
+# LEASE
+# ============================================================
+
+def identificador_processo():
+    """Dono dos leases deste agendador: host:pid:aleatório"""
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'[:200]
+
+
+def preparar(tarefas, agora=None):
+    """
+    Cria as linhas que faltam. Tarefas com intervalo rodam na primeira
+    rodada; as com horário esperam o próximo horário.
+    """
+    agora = agora or timezone.now()
+    TarefaAgendada.objects.bulk_create(
+        [
+            TarefaAgendada(nome=t.nome, proxima_execucao=t.proxima(agora) if t.horario else None)
+            for t in tarefas.values()
+        ],
+        # Outro agendador pode ter criado a mesma linha
+        ignore_conflicts=True,
+    )
+
+
+def adquirir(nome, dono, agora=None, forcar=False):
+    """Toma o lease de ``nome``; retorna a linha ou None se não for a vez ou outro processo tiver"""
+    agora = agora or timezone.now()
+    livre = Q(lease_ate__isnull=True) | Q(lease_ate__lte=agora)
+    if not forcar:
+        livre &= Q(proxima_execucao__isnull=True) | Q(proxima_execucao__lte=agora)
+    # Um único UPDATE: no SQLite e no PostgreSQL só um processo atualiza a linha
+    tomou = TarefaAgendada.objects.filter(livre, nome=nome).update(
+        dono=dono, lease_ate=agora + timedelta(seconds=settings.TAREFAS_LEASE), ultimo_inicio=agora,
+    )
+    return TarefaAgendada.objects.get(nome=nome) if tomou else None
+
+
+def renovar(nome, dono, cursor):
+    """Salva o cursor e estende o lease; False se outro processo tomou a tarefa"""
+    return TarefaAgendada.objects.filter(nome=nome, dono=dono).update(
+        cursor=cursor, lease_ate=timezone.now() + timedelta(seconds=settings.TAREFAS_LEASE),
+    ) == 1
+
+
+def liberar(nome, dono, **campos):
+    """Solta o lease gravando o resultado da execução"""
+    TarefaAgendada.objects.filter(nome=nome, dono=dono).update(
+        dono='', lease_ate=None, ultimo_fim=timezone.now(), **campos
+    )
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+def executar(tarefa, dono, registro, lote=None):
+    """
+    Roda ``tarefa`` a partir do cursor de ``registro`` (já com o lease)
+    até terminar, falhar ou passar de TAREFAS_DURACAO_MAXIMA. Retorna
+    (status, processados); status 'perdida' se o lease foi tomado por outro
+    processo no meio da execução.
+    """
+    lote = lote or settings.TAREFAS_LOTE
+    limite = time.monotonic() + settings.TAREFAS_DURACAO_MAXIMA
+    cursor = registro.cursor
+    processados = 0
+    status, erro = 'ok', ''
+
+    gerador = tarefa.funcao(cursor, lote)
+    try:
+        for cursor, quantidade in gerador:
+            processados += quantidade
+            if not renovar(tarefa.nome, dono, cursor):
+                logger.warning('Tarefa %s: lease perdido após %d item(ns)', tarefa.nome, processados)
+                return 'perdida', processados
+            if time.monotonic() > limite:
+                status = 'incompleta'
+                break
+    except Exception:
+        logger.exception('Tarefa %s falhou', tarefa.nome)
+        status, erro = 'erro', traceback.format_exc()
+    finally:
+        gerador.close()
+
+    agora = timezone.now()
+    if status == 'ok':
+        cursor, proxima = '', tarefa.proxima(agora)
+    elif status == 'incompleta':
+        # Continua na próxima rodada, depois das outras tarefas
+        proxima = agora
+    else:
+        proxima = agora + timedelta(seconds=settings.TAREFAS_ESPERA_ERRO)
+    liberar(
+        tarefa.nome, dono, cursor=cursor, proxima_execucao=proxima, ultimo_status=status,
+        ultimos_processados=processados, ultimo_erro=erro,
+    )
+    return status, processados
+
+
+def rodar_pendentes(dono, tarefas=None, forcar=False):
+    """Executa as tarefas no horário (ou todas, com ``forcar``); retorna {nome: (status, processados)}"""
+    tarefas = tarefas if tarefas is not None else tarefas_ativas()
+    resultados = {}
+    for nome, t in tarefas.items():
+        registro = adquirir(nome, dono, forcar=forcar)
+        if registro is not None:
+            resultados[nome] = executar(t, dono, registro)
+    return resultados
@@ -0,0 +1,249 @@
+"""
+Análise da carteira de projetos do DevLab Projects
+Arquivo: meuapp/analytics.py
+
+As colunas necessárias (datas e status dos projetos, equipes, arestas
+equipe-membro e usuário-projeto) são lidas com values_list, em poucas
+consultas, e viram arrays do NumPy. Todos os cálculos são feitos sobre os
+arrays inteiros, sem laços em Python por projeto ou por usuário:
+
+- projetos atrasados e em risco (data_fim_prevista x hoje x status);
+- carga de cada usuário (projetos ativos simultâneos);
+- distribuição do tamanho das equipes;
+- sobreposição das linhas do tempo (projetos em execução ao mesmo tempo).
+
+carregar_portfolio() faz as consultas e analisar_portfolio() só os cálculos,
+para que possam ser medidos separadamente. analise_portfolio() junta os dois
+e guarda o resultado no cache, amarrado à versão do catálogo (ver
+meuapp/cache.py).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import CharField
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .cache import versao_catalogo
+from .models import Equipe, ParticipacaoProjeto, Projeto
+
+
+# Projetos abertos com o prazo nos próximos PRAZO_RISCO_DIAS dias estão em risco
+PRAZO_RISCO_DIAS = 14
+# Usuários com pelo menos CARGA_ALTA projetos ativos ao mesmo tempo estão sobrecarregados
+CARGA_ALTA = 3
+# Linha do tempo: semanas antes e depois de hoje
+SEMANAS_LINHA_DO_TEMPO = 26
+# Tamanho das listas (mais atrasados, mais em risco, mais carregados)
+ITENS_LISTA = 20
+# Faixas do histograma de tamanho das equipes: [inicio, fim)
+FAIXAS_EQUIPES = [0, 1, 2, 3, 4, 5, 6, 11, 21]
+
+CHAVE_ANALISE_PORTFOLIO = 'devlab:portfolio:{}:{}'
+# Participações diretas (ParticipacaoProjeto) não trocam a versão do catálogo
+ANALISE_PORTFOLIO_TIMEOUT = 300
+
+
+DadosPortfolio = namedtuple('DadosPortfolio', [
+    'projetos',               # pk dos projetos, em ordem crescente
+    'status',                 # status de cada projeto
+    'inicio',                 # data_inicio (datetime64[D])
+    'fim',                    # data_fim_prevista (datetime64[D])
+    'equipes',                # pk das equipes, em ordem crescente
+    'projeto_da_equipe',      # projeto de cada equipe (0: sem projeto)
+    'membros_equipe',         # equipe de cada par equipe-membro
+    'membros_usuario',        # usuário de cada par equipe-membro
+    'participacoes_usuario',  # usuário de cada ParticipacaoProjeto
+    'participacoes_projeto',  # projeto de cada ParticipacaoProjeto
+])
+
+
+def _colunas(consulta, tipos):
+    """values_list -> um array por coluna"""
+    linhas = list(consulta)
+    if not linhas:
+        return [np.array([], dtype=tipo) for tipo in tipos]
+    if all(tipo is np.int64 for tipo in tipos):
+        # Só inteiros: uma matriz convertida de uma vez, sem transpor em Python
+        return list(np.array(linhas, dtype=np.int64).T)
+    return [np.array(coluna, dtype=tipo) for coluna, tipo in zip(zip(*linhas), tipos)]
+
+
+def carregar_portfolio():
+    """Lê as colunas usadas na análise (quatro consultas, qualquer que seja o volume)"""
+    # Datas como texto ISO: o NumPy as converte direto, sem criar um objeto
+    # date por linha (o que custaria mais que a própria consulta)
+    projetos, status, inicio, fim = _colunas(
+        Projeto.objects.order_by('pk').values_list(
+            'pk', 'status', Cast('data_inicio', CharField()), Cast('data_fim_prevista', CharField()),
+        ),
+        [np.int64, str, 'datetime64[D]', 'datetime64[D]'],
+    )
+    equipes, projeto_da_equipe = _colunas(
+        Equipe.objects.order_by('pk').values_list('pk', Coalesce('projeto', 0)),
+        [np.int64, np.int64],
+    )
+    # Sem junção: o projeto de cada membro vem de projeto_da_equipe
+    membros_equipe, membros_usuario = _colunas(
+        Equipe.membros.through.objects.values_list('equipe_id', 'usuario_id'),
+        [np.int64, np.int64],
+    )
+    participacoes_usuario, participacoes_projeto = _colunas(
+        ParticipacaoProjeto.objects.values_list('usuario_id', 'projeto_id'),
+        [np.int64, np.int64],
+    )
+    return DadosPortfolio(
+        projetos, status, inicio, fim, equipes, projeto_da_equipe,
+        membros_equipe, membros_usuario, participacoes_usuario, participacoes_projeto,
+    )
+
+
+def _posicoes(chaves, valores):
+    """Posição de cada valor no array ordenado ``chaves`` e quais foram encontrados"""
+    posicao = np.searchsorted(chaves, valores)
+    encontrada = posicao < len(chaves)
+    encontrada[encontrada] = chaves[posicao[encontrada]] == valores[encontrada]
+    return posicao, encontrada
+
+
+def _maiores(indices, valores, quantidade, crescente=False):
+    """Os ``quantidade`` índices de maior (ou menor) valor, em ordem"""
+    ordem = np.argsort(valores[indices] if crescente else -valores[indices], kind='stable')
+    return indices[ordem[:quantidade]]
+
+
+def _prazos(dados, hoje):
+    aberto = dados.status != 'concluido'
+    dias_restantes = (dados.fim - hoje).astype(np.int64)
+    atrasado = aberto & (dias_restantes < 0)
+    em_risco = aberto & ~atrasado & (
+        (dias_restantes <= PRAZO_RISCO_DIAS)
+        # Ainda planejado, mas a data de início já passou
+        | ((dados.status == 'planejado') & (dados.inicio < hoje))
+    )
+
+    atrasados = _maiores(np.flatnonzero(atrasado), -dias_restantes, ITENS_LISTA)
+    arriscados = _maiores(np.flatnonzero(em_risco), dias_restantes, ITENS_LISTA, crescente=True)
+    return {
+        'total_atrasados': int(atrasado.sum()),
+        'total_em_risco': int(em_risco.sum()),
+        'atraso_medio': float(-dias_restantes[atrasado].mean()) if atrasado.any() else 0.0,
+        'atrasados': [
+            (int(dados.projetos[i]), int(-dias_restantes[i])) for i in atrasados
+        ],
+        'em_risco': [
+            (int(dados.projetos[i]), int(dias_restantes[i])) for i in arriscados
+        ],
+    }
+
+
+def _carga(dados, hoje):
+    """Projetos ativos (abertos e já iniciados) por usuário"""
+    ativo = (dados.status != 'concluido') & (dados.inicio <= hoje)
+    total = len(dados.projetos)
+
+    # Quem está em um projeto: membros das equipes dele e participações diretas
+    equipe, na_equipe = _posicoes(dados.equipes, dados.membros_equipe)
+    usuarios = np.concatenate([dados.membros_usuario[na_equipe], dados.participacoes_usuario])
+    projetos = np.concatenate([dados.projeto_da_equipe[equipe[na_equipe]], dados.participacoes_projeto])
+    posicao, encontrada = _posicoes(dados.projetos, projetos)
+    encontrada[encontrada] = ativo[posicao[encontrada]]
+
+    # Um usuário pode estar no mesmo projeto por várias equipes e por
+    # participação direta: cada par (usuário, projeto) conta uma vez
+    pares = np.sort(usuarios[encontrada] * total + posicao[encontrada])
+    pares = pares[np.concatenate([[True], pares[1:] != pares[:-1]])] if len(pares) else pares
+    usuarios, inicio_usuario = np.unique(pares // max(total, 1), return_index=True)
+    carga = np.diff(np.append(inicio_usuario, len(pares)))
+
+    mais_carregados = _maiores(np.arange(len(carga)), carga, ITENS_LISTA)
+    distribuicao = np.bincount(carga) if len(carga) else np.zeros(1, dtype=np.int64)
+    return {
+        'usuarios_ativos': int(len(usuarios)),
+        'carga_media': float(carga.mean()) if len(carga) else 0.0,
+        'carga_maxima': int(carga.max()) if len(carga) else 0,
+        'total_sobrecarregados': int((carga >= CARGA_ALTA).sum()),
+        # (projetos simultâneos, usuários), a partir de 1
+        'distribuicao_carga': [(n, int(q)) for n, q in enumerate(distribuicao) if n and q],
+        'mais_carregados': [(int(usuarios[i]), int(carga[i])) for i in mais_carregados],
+    }
+
+
+def _equipes(dados):
+    equipe, na_equipe = _posicoes(dados.equipes, dados.membros_equipe)
+    tamanhos = np.bincount(equipe[na_equipe], minlength=len(dados.equipes))
+    contagens, _ = np.histogram(tamanhos, bins=FAIXAS_EQUIPES + [np.iinfo(np.int64).max])
+    faixas = []
+    for inicio, fim, quantidade in zip(FAIXAS_EQUIPES, FAIXAS_EQUIPES[1:] + [None], contagens):
+        if fim is None:
+            rotulo = f'{inicio}+'
+        elif fim - inicio == 1:
+            rotulo = str(inicio)
+        else:
+            rotulo = f'{inicio}–{fim - 1}'
+        faixas.append((rotulo, int(quantidade)))
+
+    if not len(tamanhos):
+        return {'total_equipes': 0, 'equipes_vazias': 0, 'faixas_equipes': faixas}
+    p25, mediana, p75, p90 = np.percentile(tamanhos, [25, 50, 75, 90])
+    return {
+        'total_equipes': int(len(tamanhos)),
+        'equipes_vazias': int((tamanhos == 0).sum()),
+        'tamanho_medio': float(tamanhos.mean()),
+        'tamanho_p25': float(p25),
+        'tamanho_mediana': float(mediana),
+        'tamanho_p75': float(p75),
+        'tamanho_p90': float(p90),
+        'tamanho_maximo': int(tamanhos.max()),
+        'faixas_equipes': faixas,
+    }
+
+
+def _linha_do_tempo(dados, hoje):
+    """Projetos em execução (início <= dia <= fim previsto) ao longo do tempo"""
+    inicios = np.sort(dados.inicio)
+    fins = np.sort(dados.fim)
+
+    def em_execucao(dias):
+        return np.searchsorted(inicios, dias, side='right') - np.searchsorted(fins, dias, side='left')
+
+    semanas = hoje + 7 * np.arange(-SEMANAS_LINHA_DO_TEMPO, SEMANAS_LINHA_DO_TEMPO + 1)
+    por_semana = em_execucao(semanas)
+
+    # Pico em todo o período: o número em execução só aumenta num dia de início
+    if len(inicios):
+        picos = em_execucao(inicios)
+        pico = int(np.argmax(picos))
+        pico_projetos, pico_data = int(picos[pico]), inicios[pico].item()
+    else:
+        pico_projetos, pico_data = 0, None
+
+    return {
+        'linha_do_tempo': [(semana.item(), int(total)) for semana, total in zip(semanas, por_semana)],
+        'pico_projetos': pico_projetos,
+        'pico_data': pico_data,
+    }
+
+
+def analisar_portfolio(dados, hoje):
+    """Indicadores da carteira a partir dos arrays de carregar_portfolio()"""
+    hoje = np.datetime64(hoje, 'D')
+    resultado = {'total_projetos': int(len(dados.projetos))}
+    resultado.update(_prazos(dados, hoje))
+    resultado.update(_carga(dados, hoje))
+    resultado.update(_equipes(dados))
+    resultado.update(_linha_do_tempo(dados, hoje))
+    return resultado
+
+
+def analise_portfolio():
+    """analisar_portfolio() de hoje, recalculada quando o catálogo muda"""
+    hoje = timezone.localdate()
+    chave = CHAVE_ANALISE_PORTFOLIO.format(versao_catalogo(), hoje.isoformat())
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = analisar_portfolio(carregar_portfolio(), hoje)
+        cache.set(chave, resultado, ANALISE_PORTFOLIO_TIMEOUT)
+    return resultado
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MeuappConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meuapp'
+
+    def ready(self):
+        # Registra os receivers de sinais
+        from . import signals  # noqa: F401
@@ -0,0 +1,207 @@
+"""
+Arquivo de projetos concluídos do DevLab Projects
+Arquivo: meuapp/arquivo.py
+
+Projetos concluídos e sem alterações há mais de ARQUIVO_MESES meses são
+movidos, com as equipes (líder e membros) e as participações, para as
+tabelas ProjetoArquivado, EquipeArquivada e ParticipacaoArquivada
+(``manage.py arquivar_projetos``). Assim Projeto, Equipe e as tabelas de
+ligação, lidas por todas as listas, dashboards e buscas, guardam só o
+conjunto de trabalho, e o histórico continua consultável em /arquivo/.
+
+Cada lote é movido em uma transação: as linhas de arquivo são inseridas
+com bulk_create e os projetos originais apagados (a cascata apaga equipes,
+membros e participações, e os sinais invalidam os caches dos dashboards e
+o grafo de colaboração). Os pks originais são mantidos, então restaurar()
+recria o projeto e as equipes com os mesmos endereços.
+"""
+
+import calendar
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Equipe, EquipeArquivada, ParticipacaoArquivada, ParticipacaoProjeto, Projeto, ProjetoArquivado, Usuario,
+)
+
+
+Restauracao = namedtuple('Restauracao', ['projeto', 'equipes_sem_lider'])
+
+
+def _meses_atras(agora, meses):
+    ano, mes = divmod(agora.year * 12 + agora.month - 1 - meses, 12)
+    dia = min(agora.day, calendar.monthrange(ano, mes + 1)[1])
+    return agora.replace(year=ano, month=mes + 1, day=dia)
+
+
+def candidatos(meses=None, agora=None):
+    """Projetos concluídos sem alterações há mais de ``meses`` meses (padrão: ARQUIVO_MESES)"""
+    meses = meses if meses is not None else settings.ARQUIVO_MESES
+    limite = _meses_atras(agora or timezone.now(), meses)
+    return Projeto.objects.filter(status='concluido', atualizado_em__lt=limite)
+
+
+# ============================================================
+# ARQUIVAMENTO
+# ============================================================
+
+def arquivar(projetos, lote=None):
+    """
+    Move os projetos concluídos de ``projetos`` (QuerySet) para o arquivo,
+    ``lote`` por transação. Gerador: produz (último pk, quantidade) a cada lote.
+    """
+    lote = lote or settings.ARQUIVO_LOTE
+    ultimo = 0
+    while True:
+        pks = list(
+            projetos.filter(status='concluido', pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:lote]
+        )
+        if not pks:
+            return
+        with transaction.atomic():
+            quantidade = _arquivar_lote(pks)
+        ultimo = pks[-1]
+        yield ultimo, quantidade
+        if len(pks) < lote:
+            return
+
+
+def _arquivar_lote(pks):
+    # De novo dentro da transação: o projeto pode ter sido reaberto nesse meio tempo
+    projetos = list(Projeto.objects.select_for_update().filter(pk__in=pks, status='concluido'))
+    pks = [projeto.pk for projeto in projetos]
+    if not pks:
+        return 0
+
+    equipes = list(Equipe.objects.filter(projeto_id__in=pks).order_by())
+    membros = list(
+        Equipe.membros.through.objects.filter(equipe__projeto_id__in=pks).values_list('equipe_id', 'usuario_id')
+    )
+    participacoes = list(ParticipacaoProjeto.objects.filter(projeto_id__in=pks))
+
+    # Nomes de todos os envolvidos, para a coluna de busca (uma consulta)
+    usuarios = {usuario_id for _, usuario_id in membros}
+    usuarios.update(equipe.lider_id for equipe in equipes if equipe.lider_id)
+    usuarios.update(participacao.usuario_id for participacao in participacoes)
+    nomes = {
+        pk: ' '.join(filter(None, valores))
+        for pk, *valores in Usuario.objects.filter(pk__in=usuarios).values_list(
+            'pk', 'username', 'first_name', 'last_name'
+        )
+    }
+    projeto_da_equipe = {equipe.pk: equipe.projeto_id for equipe in equipes}
+    termos = defaultdict(list)
+    for equipe in equipes:
+        termos[equipe.projeto_id] += [equipe.nome, nomes.get(equipe.lider_id, '')]
+    for equipe_id, usuario_id in membros:
+        termos[projeto_da_equipe[equipe_id]].append(nomes.get(usuario_id, ''))
+    for participacao in participacoes:
+        termos[participacao.projeto_id].append(nomes.get(participacao.usuario_id, ''))
+
+    ProjetoArquivado.objects.bulk_create([
+        ProjetoArquivado(
+            id=projeto.pk, titulo=projeto.titulo, descricao=projeto.descricao, cliente=projeto.cliente,
+            data_inicio=projeto.data_inicio, data_fim_prevista=projeto.data_fim_prevista,
+            criado_em=projeto.criado_em, atualizado_em=projeto.atualizado_em,
+            busca=texto_busca(projeto.titulo, projeto.cliente, projeto.descricao, *termos[projeto.pk]),
+        )
+        for projeto in projetos
+    ])
+    EquipeArquivada.objects.bulk_create([
+        EquipeArquivada(
+            id=equipe.pk, projeto_id=equipe.projeto_id, nome=equipe.nome, descricao=equipe.descricao,
+            lider_id=equipe.lider_id, criada_em=equipe.criada_em,
+        )
+        for equipe in equipes
+    ])
+    Membro = EquipeArquivada.membros.through
+    Membro.objects.bulk_create([
+        Membro(equipearquivada_id=equipe_id, usuario_id=usuario_id) for equipe_id, usuario_id in membros
+    ])
+    ParticipacaoArquivada.objects.bulk_create([
+        ParticipacaoArquivada(
+            projeto_id=participacao.projeto_id, usuario_id=participacao.usuario_id,
+            data_entrada=participacao.data_entrada, papel=participacao.papel,
+        )
+        for participacao in participacoes
+    ])
+
+    # A cascata apaga equipes, membros e participações
+    Projeto.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def texto_busca(*partes):
+    """Conteúdo da coluna ProjetoArquivado.busca"""
+    return ' '.join(parte for parte in partes if parte).lower()
+
+
+def buscar(termos):
+    """Projetos arquivados com todas as palavras de ``termos`` (título, cliente, descrição, equipes, pessoas)"""
+    projetos = ProjetoArquivado.objects.all()
+    for palavra in termos.lower().split():
+        projetos = projetos.filter(busca__contains=palavra)
+    return projetos
+
+
+# ============================================================
+# RESTAURAÇÃO
+# ============================================================
+
+@transaction.atomic
+def restaurar(pk):
+    """
+    Devolve o projeto arquivado ``pk`` às tabelas de trabalho, com as
+    equipes, os membros e as participações. Líderes que hoje já lideram
+    outra equipe (um usuário lidera no máximo uma) ficam de fora; os nomes
+    dessas equipes são retornados. ProjetoArquivado.DoesNotExist se não
+    houver o projeto no arquivo.
+    """
+    arquivado = ProjetoArquivado.objects.select_for_update().get(pk=pk)
+    projeto = Projeto(
+        id=arquivado.pk, titulo=arquivado.titulo, descricao=arquivado.descricao, cliente=arquivado.cliente,
+        status='concluido', data_inicio=arquivado.data_inicio, data_fim_prevista=arquivado.data_fim_prevista,
+    )
+    # force_insert: nunca sobrescreve um projeto com o mesmo pk (IntegrityError)
+    projeto.save(force_insert=True)
+    # atualizado_em fica com a data da restauração: o projeto só volta a ser
+    # candidato ao arquivo depois de ARQUIVO_MESES meses
+    Projeto.objects.filter(pk=projeto.pk).update(criado_em=arquivado.criado_em)
+
+    equipes = list(arquivado.equipes.all())
+    membros = defaultdict(list)
+    for equipe_id, usuario_id in EquipeArquivada.membros.through.objects.filter(
+        equipearquivada__projeto=arquivado,
+    ).values_list('equipearquivada_id', 'usuario_id'):
+        membros[equipe_id].append(usuario_id)
+    ocupados = set(
+        Equipe.objects.filter(lider_id__in=[equipe.lider_id for equipe in equipes if equipe.lider_id])
+        .values_list('lider_id', flat=True)
+    )
+
+    sem_lider = []
+    for arquivada in equipes:
+        lider_id = arquivada.lider_id
+        if lider_id in ocupados:
+            sem_lider.append(arquivada.nome)
+            lider_id = None
+        equipe = Equipe(
+            id=arquivada.pk, projeto=projeto, nome=arquivada.nome, descricao=arquivada.descricao, lider_id=lider_id,
+        )
+        equipe.save(force_insert=True)
+        if membros[arquivada.pk]:
+            # Pelo related manager: m2m_changed atualiza a versão, os caches e o grafo
+            equipe.membros.add(*membros[arquivada.pk])
+        Equipe.objects.filter(pk=equipe.pk).update(criada_em=arquivada.criada_em)
+
+    for arquivada in arquivado.participacoes.all():
+        participacao = ParticipacaoProjeto.objects.create(
+            usuario_id=arquivada.usuario_id, projeto=projeto, papel=arquivada.papel,
+        )
+        ParticipacaoProjeto.objects.filter(pk=participacao.pk).update(data_entrada=arquivada.data_entrada)
+
+    arquivado.delete()
+    return Restauracao(projeto, sem_lider)
@@ -0,0 +1,52 @@
+"""
+Backend de autenticação do DevLab Projects
+Arquivo: meuapp/backends.py
+
+O usuário logado é carregado a cada request (AuthenticationMiddleware),
+só para as verificações de perfil (is_coordenador, is_professor...) e o
+nome no menu. UsuarioEmCacheBackend guarda esse usuário no cache local
+(meuapp/cache.py), na frente do cache do Django, com uma versão por usuário:
+gravar ou excluir um usuário troca só a versão dele (ver meuapp/signals.py),
+e os processos que usam o mesmo cache do Django voltam ao banco para buscá-lo.
+
+Com um cache do Django por processo (LocMemCache), a troca não chegaria aos
+outros workers, que seguiriam aceitando uma senha trocada ou um usuário
+desativado até o TTL. Nesse caso o backend não usa o cache e lê o usuário
+do banco a cada request, como o ModelBackend.
+"""
+
+import copy
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .cache import cache_local
+from .models import Usuario
+
+
+# Curto: o cache do Django guarda a versão, o TTL só limita a memória
+USUARIO_CACHE_TTL = 60
+
+
+@cache_local(tamanho=1024, ttl=USUARIO_CACHE_TTL, compartilhado=True, por_chave=True)
+def usuario_por_pk(pk):
+    return Usuario.objects.filter(pk=pk).first()
+
+
+def cache_compartilhado():
+    """O cache do Django é visto por todos os processos? (LocMemCache é por processo)"""
+    return not isinstance(caches['default'], LocMemCache)
+
+
+class UsuarioEmCacheBackend(ModelBackend):
+    """ModelBackend cujo get_user (chamado a cada request) usa o cache local"""
+
+    def get_user(self, user_id):
+        if not cache_compartilhado():
+            return super().get_user(user_id)
+        usuario = usuario_por_pk(user_id)
+        if usuario is None or not self.user_can_authenticate(usuario):
+            return None
+        # Cópia: views e formulários alteram request.user antes de gravar
+        return copy.copy(usuario)
@@ -0,0 +1,313 @@
+"""
+Utilitários de cache do DevLab Projects
+Arquivo: meuapp/cache.py
+
+Versões usadas nas chaves do cache de fragmentos dos dashboards.
+Em vez de apagar fragmentos, as versões são trocadas quando os dados mudam
+(ver meuapp/signals.py); fragmentos com versões antigas simplesmente deixam
+de ser lidos e expiram sozinhos. A versão do catálogo também compõe a chave
+da análise da carteira de projetos (meuapp/analytics.py).
+
+A versão do grafo de colaboração (meuapp/colaboracao.py) é um contador:
+cada alteração de membros o incrementa, e um processo só reaproveita seu
+grafo em memória se ele estiver exatamente uma alteração atrás.
+
+Também guarda os totais de solicitações de cadastro por status, apagados
+pelos sinais sempre que uma solicitação é gravada ou removida (e, no máximo,
+SOLICITACOES_TOTAIS_TIMEOUT segundos depois de calculados).
+
+Por fim, o decorador cache_local guarda resultados de consultas quentes na
+memória do próprio processo (LRU com tempo de vida), sem ida ao cache do
+Django nem ao banco. Ver a seção CACHE LOCAL abaixo.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+
+from .models import SolicitacaoCadastro
+
+
+CHAVE_VERSAO_CATALOGO = 'devlab:versao:catalogo'
+CHAVE_VERSAO_USUARIO = 'devlab:versao:usuario:{}'
+CHAVE_VERSAO_GRAFO = 'devlab:versao:grafo'
+CHAVE_TOTAIS_SOLICITACOES = 'devlab:solicitacoes:totais'
+CHAVE_VERSAO_LOCAL = 'devlab:versao:local:{}'
+CHAVE_CACHE_LOCAL = 'devlab:local:{}:{}:{}'
+
+
+def _nova_versao():
+    # Baseada no relógio para não repetir uma versão antiga caso a chave
+    # expire ou seja descartada pelo cache (o que reaproveitaria fragmentos obsoletos)
+    return time.time_ns()
+
+
+def _tempo_versoes():
+    return settings.CACHE_VERSOES_TIMEOUT
+
+
+def _versoes(chaves):
+    """Versões guardadas em ``chaves``, em uma única ida ao cache (cria as que faltam)"""
+    versoes = cache.get_many(chaves)
+
+    faltando = {chave: _nova_versao() for chave in chaves if chave not in versoes}
+    if faltando:
+        cache.set_many(faltando, timeout=_tempo_versoes())
+        versoes.update(faltando)
+
+    return tuple(versoes[chave] for chave in chaves)
+
+
+def versoes_dashboard(usuario_id):
+    """Retorna (versao_usuario, versao_catalogo) em uma única ida ao cache"""
+    return _versoes([CHAVE_VERSAO_USUARIO.format(usuario_id), CHAVE_VERSAO_CATALOGO])
+
+
+def _versao(chave):
+    versao = cache.get(chave)
+    if versao is None:
+        versao = _nova_versao()
+        # add: não sobrescreve uma versão gravada por outro processo nesse meio tempo
+        if not cache.add(chave, versao, timeout=_tempo_versoes()):
+            versao = cache.get(chave, versao)
+    return versao
+
+
+def versao_catalogo():
+    """Versão atual do catálogo, para caches que não dependem do usuário"""
+    return _versao(CHAVE_VERSAO_CATALOGO)
+
+
+def versao_grafo():
+    """Versão atual do grafo de colaboração"""
+    return _versao(CHAVE_VERSAO_GRAFO)
+
+
+def avancar_versao_grafo():
+    """Incrementa a versão do grafo de colaboração e retorna a nova"""
+    try:
+        return cache.incr(CHAVE_VERSAO_GRAFO)
+    except ValueError:
+        # Chave descartada pelo cache: começa uma versão que nenhum grafo tem
+        return versao_grafo()
+
+
+def invalidar_usuarios(usuario_ids):
+    """Troca a versão de membros dos usuários informados"""
+    versao = _nova_versao()
+    chaves = {CHAVE_VERSAO_USUARIO.format(pk): versao for pk in usuario_ids if pk}
+    if chaves:
+        cache.set_many(chaves, timeout=_tempo_versoes())
+
+
+def invalidar_catalogo():
+    """Troca a versão global do catálogo de projetos"""
+    cache.set(CHAVE_VERSAO_CATALOGO, _nova_versao(), timeout=_tempo_versoes())
+
+
+def totais_solicitacoes():
+    """Total de solicitações de cadastro por status, ex: {'pendente': 3, 'aprovada': 10, 'rejeitada': 0}"""
+    totais = cache.get(CHAVE_TOTAIS_SOLICITACOES)
+    if totais is None:
+        totais = dict.fromkeys((status for status, _ in SolicitacaoCadastro.STATUS_CHOICES), 0)
+        # Um único GROUP BY status (order_by() vazio para a ordenação padrão
+        # do modelo não entrar no agrupamento)
+        totais.update(
+            SolicitacaoCadastro.objects.order_by().values_list('status').annotate(total=Count('pk'))
+        )
+        cache.set(CHAVE_TOTAIS_SOLICITACOES, totais, timeout=settings.SOLICITACOES_TOTAIS_TIMEOUT)
+    return totais
+
+
+def invalidar_totais_solicitacoes():
+    cache.delete(CHAVE_TOTAIS_SOLICITACOES)
+
+
+# ============================================================
+# CACHE LOCAL (MEMÓRIA DO PROCESSO)
+# ============================================================
+
+# Caches criados por cache_local, por nome (módulo.função)
+CACHES_LOCAIS = {}
+
+_AUSENTE = object()
+
+
+def _resumo(argumentos):
+    return hashlib.md5(repr(argumentos).encode()).hexdigest()
+
+
+class CacheLocal:
+    """
+    Cache LRU na memória do processo, com tempo de vida (TTL) e
+    single-flight: chamadas simultâneas com a mesma chave esperam a primeira
+    calcular o valor, em vez de irem todas ao banco.
+
+    Com ``compartilhado``, é a camada da frente do cache do Django: a chave
+    inclui uma versão guardada no cache do Django (uma leitura por chamada,
+    sem desserializar o valor), e uma falta local é preenchida pelo valor
+    que outro processo já calculou. Invalidar troca a versão, o que vale
+    para todos os processos que usam o mesmo cache do Django (com um
+    LocMemCache, só para o próprio). Com ``por_chave``, cada chave tem
+    também a sua versão (lida na mesma ida ao cache), e descartar() invalida
+    só ela. Sem ``compartilhado``, a invalidação só alcança o próprio
+    processo; nos demais o valor vive até o TTL.
+    """
+
+    def __init__(self, nome, tamanho=128, ttl=60, compartilhado=False, por_chave=False):
+        self.nome = nome
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self.compartilhado = compartilhado
+        self.por_chave = por_chave
+        self._lock = threading.Lock()
+        # chave -> (expira_em, valor), do uso mais antigo ao mais recente
+        self._itens = OrderedDict()
+        # chave -> threading.Event das chaves sendo calculadas
+        self._calculando = {}
+        # Avança a cada invalidação: valores calculados antes dela não são guardados
+        self._geracao = 0
+        self.contadores = dict.fromkeys(
+            ('acertos', 'faltas', 'acertos_django', 'esperas', 'expirados', 'descartados', 'invalidacoes'), 0
+        )
+
+    @property
+    def chave_versao(self):
+        return CHAVE_VERSAO_LOCAL.format(self.nome)
+
+    def _chave_versao_item(self, chave):
+        return CHAVE_VERSAO_LOCAL.format(f'{self.nome}:{_resumo(chave)}')
+
+    def obter(self, chave, calcular):
+        """Valor guardado para ``chave``; na falta, ``calcular()`` (uma vez por chave)"""
+        if self.compartilhado:
+            chaves_versao = [self.chave_versao]
+            if self.por_chave:
+                chaves_versao.append(self._chave_versao_item(chave))
+            chave = ('-'.join(map(str, _versoes(chaves_versao))), chave)
+        while True:
+            with self._lock:
+                item = self._itens.get(chave)
+                if item is not None:
+                    if item[0] > time.monotonic():
+                        self._itens.move_to_end(chave)
+                        self.contadores['acertos'] += 1
+                        return item[1]
+                    del self._itens[chave]
+                    self.contadores['expirados'] += 1
+                evento = self._calculando.get(chave)
+                if evento is None:
+                    evento = self._calculando[chave] = threading.Event()
+                    geracao = self._geracao
+                    self.contadores['faltas'] += 1
+                    break
+                self.contadores['esperas'] += 1
+            # Outra thread está calculando: espera e lê de novo (se ela falhar,
+            # esta thread calcula)
+            evento.wait()
+
+        try:
+            valor = self._calcular(chave, calcular)
+            with self._lock:
+                if geracao == self._geracao:
+                    self._itens[chave] = (time.monotonic() + self.ttl, valor)
+                    while len(self._itens) > self.tamanho:
+                        self._itens.popitem(last=False)
+                        self.contadores['descartados'] += 1
+            return valor
+        finally:
+            with self._lock:
+                del self._calculando[chave]
+            evento.set()
+
+    def _calcular(self, chave, calcular):
+        if not self.compartilhado:
+            return calcular()
+        versao, argumentos = chave
+        chave_django = CHAVE_CACHE_LOCAL.format(self.nome, versao, _resumo(argumentos))
+        valor = cache.get(chave_django, _AUSENTE)
+        if valor is not _AUSENTE:
+            self.contadores['acertos_django'] += 1
+            return valor
+        valor = calcular()
+        cache.set(chave_django, valor, self.ttl)
+        return valor
+
+    def limpar(self):
+        """Descarta os valores guardados (em todos os processos, se compartilhado)"""
+        with self._lock:
+            self._itens.clear()
+            self._geracao += 1
+            self.contadores['invalidacoes'] += 1
+        if self.compartilhado:
+            cache.set(self.chave_versao, _nova_versao(), timeout=_tempo_versoes())
+
+    def descartar(self, chave):
+        """Descarta só o valor de ``chave`` (em todos os processos, se compartilhado)"""
+        with self._lock:
+            for guardada in [item for item in self._itens if (item[1] if self.compartilhado else item) == chave]:
+                del self._itens[guardada]
+            # Um cálculo em andamento pode ser da chave descartada: não o guarda
+            self._geracao += 1
+            self.contadores['invalidacoes'] += 1
+        if self.compartilhado:
+            versao = self._chave_versao_item(chave) if self.por_chave else self.chave_versao
+            cache.set(versao, _nova_versao(), timeout=_tempo_versoes())
+
+    def estatisticas(self):
+        with self._lock:
+            return dict(self.contadores, itens=len(self._itens), tamanho=self.tamanho, ttl=self.ttl)
+
+
+def cache_local(tamanho=128, ttl=60, invalidar_com=(), compartilhado=False, por_chave=False):
+    """
+    Decorador: guarda o resultado da função por argumentos (que precisam ser
+    hasheáveis) em um CacheLocal de até ``tamanho`` chaves, por ``ttl``
+    segundos. Gravar ou excluir um dos modelos de ``invalidar_com`` limpa o
+    cache (na hora e de novo após o commit, como os totais de solicitações);
+    ``funcao.descartar(*args)`` descarta só o resultado desses argumentos.
+
+    O cache fica em ``funcao.cache_local`` e em CACHES_LOCAIS.
+    Os valores são compartilhados entre requests: não os altere.
+    """
+    def decorador(funcao):
+        nome = f'{funcao.__module__}.{funcao.__qualname__}'
+        local = CACHES_LOCAIS[nome] = CacheLocal(nome, tamanho, ttl, compartilhado, por_chave)
+
+        def invalidar(sender, **kwargs):
+            local.limpar()
+            transaction.on_commit(local.limpar)
+
+        for modelo in invalidar_com:
+            post_save.connect(invalidar, sender=modelo, weak=False, dispatch_uid=f'{nome}:post_save')
+            post_delete.connect(invalidar, sender=modelo, weak=False, dispatch_uid=f'{nome}:post_delete')
+
+        def chave(args, kwargs):
+            return args + tuple(sorted(kwargs.items())) if kwargs else args
+
+        @wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            return local.obter(chave(args, kwargs), lambda: funcao(*args, **kwargs))
+
+        envoltorio.cache_local = local
+        envoltorio.descartar = lambda *args, **kwargs: local.descartar(chave(args, kwargs))
+        return envoltorio
+    return decorador
+
+
+def estatisticas_caches_locais():
+    """Contadores (acertos, faltas...) de cada cache local, para a instrumentação"""
+    return {nome: local.estatisticas() for nome, local in CACHES_LOCAIS.items()}
+
+
+def limpar_caches_locais():
+    for local in CACHES_LOCAIS.values():
+        local.limpar()
@@ -0,0 +1,272 @@
+"""
+Grafo de colaboração do DevLab Projects
+Arquivo: meuapp/colaboracao.py
+
+Dois usuários colaboram quando são membros de uma mesma equipe
+(Equipe.membros). O grafo é montado em memória a partir da tabela
+intermediária, em uma única consulta, e guardado em listas de adjacência
+compactas indexadas por inteiros:
+
+- cada usuário e cada equipe recebe um índice denso (0, 1, 2, ...);
+- membros[e]: array('i') com os índices dos membros da equipe e;
+- equipes[u]: array('i') com os índices das equipes do usuário u.
+
+Os colaboradores de um usuário são os membros das equipes dele: guardar o
+grafo usuário-equipe ocupa memória proporcional ao número de vínculos, e não
+ao quadrado do tamanho das equipes. Os componentes conexos (grupos de
+usuários ligados por alguma cadeia de colaborações) vêm de um union-find,
+atualizado a cada vínculo novo e recalculado só depois de remoções.
+
+As alterações de membros (sinal membros_alterados, que também converte o
+m2m_changed) são aplicadas ao grafo do próprio processo após o commit e
+avançam a versão do grafo no cache (meuapp/cache.py); um processo cujo grafo
+ficou para trás o remonta na próxima consulta. Exclusões de equipes e
+usuários (cascata, sem m2m_changed) e gravações em lote apenas avançam a
+versão. Como em meuapp/eventos.py, a versão só é compartilhada entre
+processos com um cache compartilhado (Redis, Memcached, arquivo).
+"""
+
+import threading
+from array import array
+from collections import Counter
+
+from django.db import router
+
+from .cache import avancar_versao_grafo, versao_grafo
+from .models import Equipe
+
+
+class GrafoColaboracao:
+    """Grafo bipartido usuário-equipe com consultas de colaboração"""
+
+    def __init__(self, vinculos=(), versao=None):
+        """``vinculos``: pares (equipe_id, usuario_id) da tabela de membros"""
+        self.versao = versao
+        self._lock = threading.Lock()
+        # pk -> índice e índice -> pk
+        self._indice_usuario = {}
+        self._indice_equipe = {}
+        self._pk_usuario = array('q')
+        self._pk_equipe = array('q')
+        # Adjacência: membros de cada equipe e equipes de cada usuário
+        self._membros = []
+        self._equipes = []
+        # Union-find sobre os usuários, com o tamanho de cada componente na
+        # raiz (None: recalcular após remoções)
+        self._pai = array('i')
+        self._tamanho = array('i')
+        self.total_vinculos = 0
+
+        for equipe, usuario in vinculos:
+            self._vincular(self._equipe(equipe), self._usuario(usuario))
+
+    @classmethod
+    def carregar(cls, versao=None):
+        """Monta o grafo com uma consulta à tabela de membros"""
+        Membro = Equipe.membros.through
+        # Sempre do banco principal: uma réplica atrasada deixaria o grafo
+        # desatualizado até a próxima alteração de membros
+        vinculos = Membro.objects.using(router.db_for_write(Membro)).values_list(
+            'equipe_id', 'usuario_id'
+        )
+        return cls(vinculos.iterator(chunk_size=10000), versao)
+
+    # ------------------------------------------------------------
+    # Estrutura
+    # ------------------------------------------------------------
+
+    def _usuario(self, pk):
+        indice = self._indice_usuario.get(pk)
+        if indice is None:
+            indice = self._indice_usuario[pk] = len(self._pk_usuario)
+            self._pk_usuario.append(pk)
+            self._equipes.append(array('i'))
+            if self._pai is not None:
+                self._pai.append(indice)
+                self._tamanho.append(1)
+        return indice
+
+    def _equipe(self, pk):
+        indice = self._indice_equipe.get(pk)
+        if indice is None:
+            indice = self._indice_equipe[pk] = len(self._pk_equipe)
+            self._pk_equipe.append(pk)
+            self._membros.append(array('i'))
+        return indice
+
+    def _vincular(self, equipe, usuario):
+        membros = self._membros[equipe]
+        if membros and self._pai is not None:
+            self._unir(membros[0], usuario)
+        membros.append(usuario)
+        self._equipes[usuario].append(equipe)
+        self.total_vinculos += 1
+
+    def _raiz(self, usuario):
+        pai = self._pai
+        while pai[usuario] != usuario:
+            # Compressão pela metade do caminho
+            pai[usuario] = pai[pai[usuario]]
+            usuario = pai[usuario]
+        return usuario
+
+    def _unir(self, a, b):
+        a, b = self._raiz(a), self._raiz(b)
+        if a == b:
+            return
+        # União pelo tamanho: o componente menor fica embaixo
+        if self._tamanho[a] < self._tamanho[b]:
+            a, b = b, a
+        self._pai[b] = a
+        self._tamanho[a] += self._tamanho[b]
+
+    def _componentes(self):
+        """Recalcula o union-find, se preciso; retorna o tamanho de cada raiz"""
+        if self._pai is None:
+            total = len(self._pk_usuario)
+            self._pai = array('i', range(total))
+            self._tamanho = array('i', [1]) * total
+            for membros in self._membros:
+                for usuario in membros[1:]:
+                    self._unir(membros[0], usuario)
+        return [
+            tamanho for usuario, (pai, tamanho) in enumerate(zip(self._pai, self._tamanho))
+            if pai == usuario
+        ]
+
+    def alterar(self, equipe, adicionados=(), removidos=()):
+        """Aplica uma alteração de membros (pks) da equipe ``equipe`` (pk)"""
+        with self._lock:
+            indice = self._equipe(equipe)
+            membros = self._membros[indice]
+            for pk in adicionados:
+                usuario = self._usuario(pk)
+                # A alteração pode já estar no grafo, se ele foi montado depois do commit
+                if usuario not in membros:
+                    self._vincular(indice, usuario)
+            for pk in removidos:
+                usuario = self._indice_usuario.get(pk)
+                if usuario is not None and usuario in membros:
+                    membros.remove(usuario)
+                    self._equipes[usuario].remove(indice)
+                    self.total_vinculos -= 1
+                    # Uma remoção pode dividir um componente: union-find não desfaz uniões
+                    self._pai = self._tamanho = None
+
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+
+    def colaboradores(self, usuario):
+        """[(pk, equipes em comum)] dos colaboradores de ``usuario`` (pk), dos mais frequentes aos menos"""
+        with self._lock:
+            indice = self._indice_usuario.get(usuario)
+            if indice is None:
+                return []
+            comum = Counter()
+            for equipe in self._equipes[indice]:
+                comum.update(self._membros[equipe])
+            del comum[indice]
+            pks = self._pk_usuario
+            return sorted(
+                ((pks[outro], total) for outro, total in comum.items()),
+                key=lambda item: (-item[1], item[0]),
+            )
+
+    def grau(self, usuario):
+        """Quantidade de colaboradores distintos de ``usuario`` (pk)"""
+        with self._lock:
+            indice = self._indice_usuario.get(usuario)
+            if indice is None:
+                return 0
+            vizinhos = set()
+            for equipe in self._equipes[indice]:
+                vizinhos.update(self._membros[equipe])
+            vizinhos.discard(indice)
+            return len(vizinhos)
+
+    def total_equipes(self, usuario):
+        """Equipes de que ``usuario`` (pk) é membro"""
+        with self._lock:
+            indice = self._indice_usuario.get(usuario)
+            return len(self._equipes[indice]) if indice is not None else 0
+
+    def tamanho_componente(self, usuario):
+        """Usuários no componente conexo de ``usuario`` (pk), incluindo ele"""
+        with self._lock:
+            indice = self._indice_usuario.get(usuario)
+            if indice is None:
+                return 1
+            self._componentes()
+            return self._tamanho[self._raiz(indice)]
+
+    def isolados(self, usuarios):
+        """Dos ``usuarios`` (pks), os que não têm nenhum colaborador, na mesma ordem"""
+        with self._lock:
+            self._componentes()
+            resultado = []
+            for pk in usuarios:
+                indice = self._indice_usuario.get(pk)
+                if indice is None or self._tamanho[self._raiz(indice)] == 1:
+                    resultado.append(pk)
+            return resultado
+
+    def resumo(self):
+        """Totais do grafo e dos componentes conexos"""
+        with self._lock:
+            tamanhos = self._componentes()
+            return {
+                'usuarios': len(self._pk_usuario),
+                'equipes': sum(1 for membros in self._membros if membros),
+                'vinculos': self.total_vinculos,
+                'componentes': len(tamanhos),
+                'maior_componente': max(tamanhos, default=0),
+                # Usuários cujas equipes não têm mais ninguém
+                'sem_colaboradores': tamanhos.count(1),
+            }
+
+
+# ============================================================
+# GRAFO DO PROCESSO
+# ============================================================
+
+_lock = threading.Lock()
+_grafo = None
+
+
+def grafo():
+    """Grafo do processo, remontado se estiver atrás da versão no cache"""
+    global _grafo
+    with _lock:
+        # A versão é lida antes da consulta: uma alteração gravada durante a
+        # montagem avança a versão e provoca uma nova montagem depois
+        versao = versao_grafo()
+        if _grafo is None or _grafo.versao != versao:
+            _grafo = GrafoColaboracao.carregar(versao)
+        return _grafo
+
+
+def registrar_alteracao(equipe, adicionados=(), removidos=()):
+    """
+    Após o commit de uma alteração de membros da equipe ``equipe`` (pk):
+    aplica a alteração ao grafo do processo e avança a versão
+    """
+    global _grafo
+    with _lock:
+        versao = avancar_versao_grafo()
+        if _grafo is None:
+            return
+        if _grafo.versao is not None and versao == _grafo.versao + 1:
+            _grafo.alterar(equipe, adicionados, removidos)
+            _grafo.versao = versao
+        else:
+            # Outro processo também alterou membros: remonta na próxima consulta
+            _grafo = None
+
+
+def invalidar_grafo():
+    """Após o commit de alterações que não passam pelo sinal (cascata, lote)"""
+    global _grafo
+    with _lock:
+        avancar_versao_grafo()
+        _grafo = None
@@ -0,0 +1,215 @@
+"""
+Detecção de consultas repetidas (N+1) do DevLab Projects
+Arquivo: meuapp/consultas.py
+
+Cada consulta SQL executada é reduzida a uma "forma" (parâmetros e listas de
+IN normalizados), e as formas são contadas. Uma forma que se repete mais de
+``limite`` vezes no mesmo request indica um N+1, tipicamente um método do
+modelo chamado dentro de um {% for %} (ex: equipe.total_membros sem a
+anotação _total_membros). Para cada forma repetida é registrado o template e
+a linha (ou o arquivo do projeto) que disparou a repetição.
+
+Usado por meuapp.middleware.RepeatedQueryMiddleware (desenvolvimento e
+homologação) e nos testes:
+
+    with detectar_n_mais_um(limite=3):
+        self.client.get('/equipes/')
+
+proibir_campos_adiados() cobre o caso vizinho: um template que lê um campo
+deixado de fora por .only()/.defer() faz uma consulta por objeto para
+buscá-lo. Dentro do bloco, essa leitura falha com CampoAdiadoLido.
+"""
+
+import contextvars
+import re
+import sys
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models.query_utils import DeferredAttribute
+
+
+Repeticao = namedtuple('Repeticao', ['sql', 'vezes', 'origem'])
+
+_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAMETRO = re.compile(r'%s|\?')
+_LISTA_IN = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_ESPACOS = re.compile(r'\s+')
+
+_ARQUIVOS_IGNORADOS = (__file__, str(Path(__file__).with_name('middleware.py')))
+
+
+class ConsultasRepetidas(AssertionError):
+    """Uma forma de consulta passou do limite (falha o teste que a provocou)"""
+
+    def __init__(self, repeticoes, limite):
+        self.repeticoes = repeticoes
+        self.limite = limite
+        super().__init__(formatar_repeticoes(repeticoes, limite))
+
+
+def normalizar_sql(sql):
+    """Forma da consulta: literais, parâmetros e listas de IN viram '?'"""
+    sql = _TEXTO.sub('?', sql)
+    sql = _NUMERO.sub('?', sql)
+    sql = _PARAMETRO.sub('?', sql)
+    sql = _LISTA_IN.sub('IN (...)', sql)
+    return _ESPACOS.sub(' ', sql).strip()
+
+
+def origem_consulta():
+    """
+    Onde a consulta foi disparada: "template.html:42" se estiver dentro da
+    renderização de um template, senão "arquivo.py:42" do próprio projeto.
+    """
+    raiz = str(settings.BASE_DIR)
+    arquivo_projeto = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        codigo = frame.f_code
+        if codigo.co_name == 'render_annotated':
+            # django.template.base.Node: o nó mais interno sendo renderizado
+            no = frame.f_locals.get('self')
+            token = getattr(no, 'token', None)
+            origem = getattr(no, 'origin', None)
+            if token is not None and origem is not None:
+                return f'{origem.template_name or origem.name}:{token.lineno}'
+        if (
+            arquivo_projeto is None
+            and codigo.co_filename.startswith(raiz)
+            and codigo.co_filename not in _ARQUIVOS_IGNORADOS
+        ):
+            arquivo_projeto = f'{Path(codigo.co_filename).relative_to(raiz)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return arquivo_projeto or 'desconhecida'
+
+
+def formatar_repeticoes(repeticoes, limite):
+    linhas = [f'{len(repeticoes)} consulta(s) executada(s) mais de {limite} vezes:']
+    for repeticao in repeticoes:
+        linhas.append(f'  {repeticao.vezes}x em {repeticao.origem}: {repeticao.sql}')
+    return '\n'.join(linhas)
+
+
+# Inspetores ativos no contexto atual. Sob ASGI, as views de requests
+# diferentes dividem a thread do sync_to_async (e as conexões dela): um
+# wrapper instalado na conexão somaria as consultas de todos. O contexto é de
+# cada request e segue com ele para a thread do sync_to_async.
+_inspetores = contextvars.ContextVar('inspetores_consultas', default=())
+
+
+def repassar_consulta(execute, sql, params, many, context):
+    for inspetor in _inspetores.get():
+        inspetor.registrar(sql)
+    return execute(sql, params, many, context)
+
+
+def instalar_inspetores(sender, connection, **kwargs):
+    """Receiver de connection_created: repassa as consultas aos inspetores ativos"""
+    if repassar_consulta not in connection.execute_wrappers:
+        # No início da lista: execute_wrapper() remove sempre o último
+        connection.execute_wrappers.insert(0, repassar_consulta)
+
+
+class InspetorConsultas:
+    """
+    Conta por forma as consultas executadas no contexto atual (o request ou
+    o bloco ``with InspetorConsultas(limite): ...``) enquanto estiver ativo.
+
+    A pilha só é percorrida quando uma forma passa do limite, então o custo
+    por consulta é o da normalização.
+    """
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.total = 0
+        self._contagem = {}
+        self._origens = {}
+        self._token = None
+
+    def __enter__(self):
+        self.iniciar()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.encerrar()
+
+    def iniciar(self):
+        """
+        Ativa o inspetor no contexto atual (em código assíncrono, chame no
+        event loop: o sync_to_async leva uma cópia do contexto para a thread)
+        """
+        self._token = _inspetores.set(_inspetores.get() + (self,))
+
+    def encerrar(self):
+        _inspetores.reset(self._token)
+        self._token = None
+
+    def registrar(self, sql):
+        forma = normalizar_sql(sql)
+        vezes = self._contagem.get(forma, 0) + 1
+        self._contagem[forma] = vezes
+        self.total += 1
+        if vezes == self.limite + 1:
+            self._origens[forma] = origem_consulta()
+
+    def repetidas(self):
+        """Formas executadas mais de ``limite`` vezes, da mais repetida para a menos"""
+        repeticoes = [
+            Repeticao(forma, vezes, self._origens[forma])
+            for forma, vezes in self._contagem.items()
+            if vezes > self.limite
+        ]
+        return sorted(repeticoes, key=lambda r: r.vezes, reverse=True)
+
+    def verificar(self):
+        """Lança ConsultasRepetidas se alguma forma passou do limite"""
+        repeticoes = self.repetidas()
+        if repeticoes:
+            raise ConsultasRepetidas(repeticoes, self.limite)
+
+
+@contextmanager
+def detectar_n_mais_um(limite=None):
+    """Para testes: falha se alguma consulta se repetir mais de ``limite`` vezes no bloco"""
+    if limite is None:
+        limite = settings.CONSULTAS_REPETIDAS_LIMITE
+    with InspetorConsultas(limite) as inspetor:
+        yield inspetor
+    inspetor.verificar()
+
+
+class CampoAdiadoLido(AssertionError):
+    """Um campo fora do .only() foi lido (e buscado no banco, objeto a objeto)"""
+
+    def __init__(self, modelo, campo):
+        self.modelo = modelo
+        self.campo = campo
+        super().__init__(
+            f'{modelo.__name__}.{campo} foi lido, mas ficou de fora do .only()/.defer() '
+            f'da consulta (em {origem_consulta()})'
+        )
+
+
+@contextmanager
+def proibir_campos_adiados():
+    """Para testes: falha se algum campo adiado for carregado sob demanda no bloco"""
+    original = DeferredAttribute.__get__
+
+    def __get__(self, instance, cls=None):
+        if (
+            instance is not None
+            and self.field.attname not in instance.__dict__
+            and self._check_parent_chain(instance) is None
+        ):
+            raise CampoAdiadoLido(type(instance), self.field.attname)
+        return original(self, instance, cls)
+
+    DeferredAttribute.__get__ = __get__
+    try:
+        yield
+    finally:
+        DeferredAttribute.__get__ = original
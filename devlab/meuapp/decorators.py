@@ -0,0 +1,56 @@
+"""
+Decoradores do DevLab Projects
+Arquivo: meuapp/decorators.py
+
+Equivalentes de login_required e user_passes_test para views assíncronas
+(no Django 4.2 os decoradores de django.contrib.auth só aceitam views
+síncronas).
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import REDIRECT_FIELD_NAME
+from django.contrib.auth.decorators import user_passes_test
+from django.utils.functional import empty
+
+
+async def ausuario(request):
+    """
+    Retorna request.user já carregado.
+
+    request.user é preguiçoso e sua primeira avaliação lê a sessão e consulta
+    o banco, o que não pode acontecer direto no event loop. Depois de
+    carregado, atributos como tipo e pk podem ser lidos sem restrição.
+    """
+    if getattr(request.user, '_wrapped', None) is empty:
+        await sync_to_async(request.user._setup)()
+    return request.user
+
+
+def async_user_passes_test(test_func, login_url=None, redirect_field_name=REDIRECT_FIELD_NAME):
+    """Versão de user_passes_test para views ``async def``"""
+    def decorator(view_func):
+        # O redirecionamento para o login é montado pelo próprio decorador
+        # do Django (não acessa o banco)
+        negar = user_passes_test(lambda u: False, login_url, redirect_field_name)(lambda request: None)
+
+        @wraps(view_func)
+        async def _wrapped_view(request, *args, **kwargs):
+            if test_func(await ausuario(request)):
+                return await view_func(request, *args, **kwargs)
+            return negar(request)
+        return _wrapped_view
+    return decorator
+
+
+def async_login_required(function=None, redirect_field_name=REDIRECT_FIELD_NAME, login_url=None):
+    """Versão de login_required para views ``async def``"""
+    actual_decorator = async_user_passes_test(
+        lambda u: u.is_authenticated,
+        login_url=login_url,
+        redirect_field_name=redirect_field_name,
+    )
+    if function:
+        return actual_decorator(function)
+    return actual_decorator
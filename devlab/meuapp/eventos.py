@@ -0,0 +1,175 @@
+"""
+Pub/sub de eventos do DevLab Projects
+Arquivo: meuapp/eventos.py
+
+Eventos das solicitações de cadastro (nova solicitação, mudança de status)
+publicados pelos sinais (meuapp/signals.py) e entregues aos coordenadores
+conectados pelo endpoint SSE ou pelo long-polling (meuapp/views.py).
+
+Cada evento recebe um id crescente; o cliente informa o último id recebido
+(cabeçalho Last-Event-ID ou ?ultimo=) e recebe apenas os posteriores, o que
+permite reconectar sem perder eventos enquanto eles estiverem no buffer.
+
+O backend é escolhido por EVENTOS_BACKEND:
+
+- MemoriaBackend (padrão): buffer no próprio processo. Suficiente com um
+  único processo (uvicorn --workers 1, runserver).
+- CacheBackend: buffer no cache do Django, compartilhado entre processos
+  (vários workers gunicorn/uvicorn). Use um cache com incr atômico
+  (Redis ou Memcached).
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+CANAL_SOLICITACOES = 'solicitacoes'
+
+
+class MemoriaBackend:
+    """Buffer de eventos em memória, com despertar imediato dos assinantes"""
+
+    def __init__(self, tamanho_buffer=100):
+        self._lock = threading.Lock()
+        self._buffers = {}
+        # Ids em milissegundos desde o início do processo: depois de um
+        # restart continuam maiores que os entregues antes dele
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._tamanho_buffer = tamanho_buffer
+        # canal -> {(loop, asyncio.Event)}
+        self._assinantes = {}
+
+    def publicar(self, canal, evento):
+        """Adiciona o evento ao canal e acorda os assinantes. Pode ser chamado de qualquer thread."""
+        with self._lock:
+            evento = dict(evento, id=next(self._ids))
+            self._buffers.setdefault(canal, deque(maxlen=self._tamanho_buffer)).append(evento)
+            assinantes = list(self._assinantes.get(canal, ()))
+        for loop, sinal in assinantes:
+            loop.call_soon_threadsafe(sinal.set)
+        return evento
+
+    def ultimo_id(self, canal):
+        with self._lock:
+            buffer = self._buffers.get(canal)
+            return buffer[-1]['id'] if buffer else 0
+
+    def desde(self, canal, ultimo_id):
+        with self._lock:
+            return [e for e in self._buffers.get(canal, ()) if e['id'] > ultimo_id]
+
+    async def aguardar(self, canal, ultimo_id, timeout):
+        """Eventos posteriores a ultimo_id; espera até timeout segundos se ainda não houver"""
+        sinal = asyncio.Event()
+        chave = (asyncio.get_running_loop(), sinal)
+        with self._lock:
+            self._assinantes.setdefault(canal, set()).add(chave)
+        try:
+            eventos = self.desde(canal, ultimo_id)
+            if not eventos and timeout > 0:
+                try:
+                    await asyncio.wait_for(sinal.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                eventos = self.desde(canal, ultimo_id)
+            return eventos
+        finally:
+            with self._lock:
+                self._assinantes[canal].discard(chave)
+
+
+class CacheBackend:
+    """
+    Buffer de eventos no cache do Django, compartilhado entre processos.
+
+    Não há notificação entre processos: os assinantes consultam o cache a
+    cada INTERVALO segundos (uma leitura do contador, sem tocar no banco).
+
+    O id é reservado (incr) antes de o evento ser gravado, então um id
+    visível pode ainda não ter evento. desde() para nessa lacuna em vez de
+    pulá-la, e só a considera um evento perdido ou expirado quando um evento
+    posterior já tem mais de ESPERA_LACUNA segundos.
+    """
+
+    INTERVALO = 1.0
+    ESPERA_LACUNA = 5.0
+    CHAVE_ID = 'devlab:eventos:{}:id'
+    # Valor inicial do contador: ids até ele nunca tiveram evento
+    CHAVE_INICIO = 'devlab:eventos:{}:inicio'
+    CHAVE_EVENTO = 'devlab:eventos:{}:{}'
+
+    def __init__(self, tamanho_buffer=100, timeout=60 * 60):
+        self._tamanho_buffer = tamanho_buffer
+        self._timeout = timeout
+
+    def publicar(self, canal, evento):
+        chave_id = self.CHAVE_ID.format(canal)
+        inicio = int(time.time() * 1000)
+        if cache.add(chave_id, inicio, timeout=None):
+            cache.set(self.CHAVE_INICIO.format(canal), inicio, timeout=None)
+        evento = dict(evento, id=cache.incr(chave_id))
+        # Com o horário da gravação, para desde() saber a idade das lacunas
+        cache.set(self.CHAVE_EVENTO.format(canal, evento['id']), (time.time(), evento), timeout=self._timeout)
+        return evento
+
+    def ultimo_id(self, canal):
+        return cache.get(self.CHAVE_ID.format(canal), 0)
+
+    def desde(self, canal, ultimo_id):
+        chave_id, chave_inicio = self.CHAVE_ID.format(canal), self.CHAVE_INICIO.format(canal)
+        valores = cache.get_many([chave_id, chave_inicio])
+        atual = valores.get(chave_id, 0)
+        if atual <= ultimo_id:
+            return []
+        inicio = max(ultimo_id, atual - self._tamanho_buffer, valores.get(chave_inicio, 0)) + 1
+        chaves = [self.CHAVE_EVENTO.format(canal, i) for i in range(inicio, atual + 1)]
+        encontrados = cache.get_many(chaves)
+        eventos = []
+        for posicao, chave in enumerate(chaves):
+            if chave in encontrados:
+                eventos.append(encontrados[chave][1])
+                continue
+            # Id reservado antes de todos os posteriores: se um deles já é
+            # antigo, o evento expirou ou foi perdido e é pulado; senão pode
+            # estar sendo gravado agora, e o cliente o pede de novo depois
+            posteriores = [encontrados[c][0] for c in chaves[posicao + 1:] if c in encontrados]
+            if not posteriores or time.time() - min(posteriores) < self.ESPERA_LACUNA:
+                break
+        return eventos
+
+    async def aguardar(self, canal, ultimo_id, timeout):
+        limite = time.monotonic() + timeout
+        while True:
+            eventos = await sync_to_async(self.desde)(canal, ultimo_id)
+            restante = limite - time.monotonic()
+            if eventos or restante <= 0:
+                return eventos
+            await asyncio.sleep(min(self.INTERVALO, restante))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    """Instância (única por processo) do backend configurado em EVENTOS_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.EVENTOS_BACKEND)(
+                    tamanho_buffer=settings.EVENTOS_BUFFER
+                )
+    return _backend
+
+
+def publicar(canal, evento):
+    return backend().publicar(canal, evento)
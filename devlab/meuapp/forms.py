@@ -7,9 +7,59 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.hashers import make_password
 from django.db.models import Q
+from django.urls import reverse
 from .models import Usuario, Projeto, Equipe, ParticipacaoProjeto, SolicitacaoCadastro
 
 
+# ============================================================
+# WIDGETS DE AUTOCOMPLETE
+# ============================================================
+
+class AutocompleteMixin:
+    """
+    Renderiza apenas as opções já selecionadas.
+    As demais são carregadas sob demanda pelo endpoint JSON de autocomplete,
+    então o HTML do formulário não cresce com o número de usuários.
+    """
+    url_name = 'usuario_autocomplete'
+
+    class Media:
+        js = ('meuapp/js/autocomplete.js',)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
+        attrs.setdefault('class', 'form-control')
+        attrs['data-autocomplete-url'] = reverse(self.url_name)
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        # Ignora valores inválidos (POST adulterado); o campo acusa o erro na validação
+        selecionados = [v for v in value if str(v).isdigit()]
+        groups = []
+        if not self.allow_multiple_selected:
+            groups.append((None, [self.create_option(
+                name, '', '---------', not selecionados, 0, attrs=attrs
+            )], 0))
+        if not selecionados:
+            return groups
+
+        queryset = self.choices.queryset.filter(pk__in=selecionados)
+        for index, obj in enumerate(queryset, start=len(groups)):
+            option_value, option_label = self.choices.choice(obj)
+            groups.append((None, [self.create_option(
+                name, option_value, option_label, True, index, attrs=attrs
+            )], index))
+        return groups
+
+
+class UsuarioAutocompleteSelect(AutocompleteMixin, forms.Select):
+    """Seleção de um único usuário com busca sob demanda"""
+
+
+class UsuarioAutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    """Seleção de vários usuários com busca sob demanda"""
+
+
 # ============================================================
 # FORMULÁRIO DE LOGIN
 # ============================================================
@@ -315,10 +365,13 @@ class EquipeForm(forms.ModelForm):
             'projeto': forms.Select(attrs={
                 'class': 'form-control'
             }),
-            'lider': forms.Select(attrs={
-                'class': 'form-control'
+            'lider': UsuarioAutocompleteSelect(attrs={
+                'data-autocomplete-params': 'lider=1',
+                'placeholder': 'Digite nome, usuário ou matrícula',
+            }),
+            'membros': UsuarioAutocompleteSelectMultiple(attrs={
+                'placeholder': 'Digite nome, usuário ou matrícula',
             }),
-            'membros': forms.CheckboxSelectMultiple(),
         }
         
         help_texts = {
@@ -329,7 +382,9 @@ class EquipeForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Filtrar apenas estudantes e professores para membros e líder
+        # Filtrar apenas estudantes e professores para membros e líder.
+        # Os querysets não são listados no HTML: servem apenas para validar
+        # os IDs enviados (ver AutocompleteMixin e usuario_autocomplete).
         usuarios_disponiveis = Usuario.objects.filter(
             tipo__in=['professor', 'estudante']
         ).order_by('tipo', 'first_name', 'last_name')
@@ -339,14 +394,17 @@ class EquipeForm(forms.ModelForm):
         if 'projeto' in self.fields:
             self.fields['projeto'].required = False
         
-        # Para o campo líder, mostrar apenas usuários sem equipe ou o líder atual
+        # Para o campo líder, aceitar apenas usuários sem equipe ou o líder atual
         if self.instance.pk:
-            # Editando: mostrar usuários sem equipe OU o líder atual desta equipe
+            # Editando: usuários sem equipe OU o líder atual desta equipe
             lideres_disponiveis = usuarios_disponiveis.filter(
                 Q(equipe_liderada__isnull=True) | Q(equipe_liderada=self.instance)
             )
+            self.fields['lider'].widget.attrs['data-autocomplete-params'] = (
+                f'lider=1&equipe={self.instance.pk}'
+            )
         else:
-            # Criando: mostrar apenas usuários sem equipe
+            # Criando: apenas usuários sem equipe
             lideres_disponiveis = usuarios_disponiveis.filter(
                 equipe_liderada__isnull=True
             )
@@ -371,6 +429,68 @@ class EquipeForm(forms.ModelForm):
         
         return cleaned_data
 
+    def save(self, commit=True):
+        """Salvar aplicando apenas a diferença entre os membros atuais e os enviados"""
+        equipe = super().save(commit=False)
+        if commit:
+            equipe.save()
+            enviados = {usuario.pk for usuario in self.cleaned_data.get('membros', [])}
+            atuais = set(equipe.membros.values_list('pk', flat=True))
+            equipe.atualizar_membros(adicionar=enviados - atuais, remover=atuais - enviados)
+        return equipe
+
+
+# ============================================================
+# FORMULÁRIO DE FORMAÇÃO AUTOMÁTICA DE EQUIPES
+# ============================================================
+
+class FormacaoEquipesForm(forms.Form):
+    """Parâmetros do meuapp.team_builder para dividir uma turma em equipes"""
+    
+    projeto = forms.ModelChoiceField(
+        queryset=Projeto.objects.exclude(status='concluido').order_by('titulo'),
+        label='Projeto',
+        widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    tamanho = forms.IntegerField(
+        label='Estudantes por equipe',
+        min_value=2,
+        max_value=50,
+        initial=5,
+        widget=forms.NumberInput(attrs={'class': 'form-control'}),
+        help_text='As equipes terão esse número de estudantes ou um a menos',
+    )
+    prefixo_matricula = forms.CharField(
+        label='Turma (início da matrícula)',
+        required=False,
+        max_length=20,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: 2024'}),
+        help_text='Vazio: todos os estudantes que ainda não estão em equipes do projeto',
+    )
+    professores = forms.ModelMultipleChoiceField(
+        queryset=Usuario.objects.filter(tipo='professor'),
+        label='Professores orientadores',
+        required=False,
+        widget=UsuarioAutocompleteSelectMultiple(attrs={
+            'data-autocomplete-params': 'tipo=professor',
+            'placeholder': 'Digite nome, usuário ou matrícula',
+        }),
+        help_text='Vazio: todos os professores; os menos ocupados orientam primeiro',
+    )
+    nome_base = forms.CharField(
+        label='Nome das equipes',
+        max_length=90,
+        initial='Equipe',
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+        help_text='As equipes serão numeradas: Equipe 01, Equipe 02...',
+    )
+    simular = forms.BooleanField(
+        label='Apenas simular (mostrar as equipes sem gravar)',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
 
 # ============================================================
 # FORMULÁRIO DE PARTICIPAÇÃO EM PROJETO
@@ -0,0 +1,104 @@
+"""
+Resumo de prazos dos projetos do DevLab Projects
+Arquivo: meuapp/lembretes.py
+
+Monta os e-mails da tarefa lembretes_prazo (meuapp/tarefas.py): cada
+pessoa recebe um único e-mail com todos os projetos dela (como membro ou
+líder de equipe) que vencem nos próximos LEMBRETE_PRAZO_DIAS dias e não
+estão concluídos.
+
+Uma única consulta traz todos os pares (destinatário, projeto): os membros
+via Equipe.membros e os líderes, unidos no mesmo SELECT, já com os campos
+usados no e-mail. O agrupamento por destinatário é feito em memória, o
+template é compilado uma vez por execução e os e-mails saem por uma única
+conexão SMTP. Para algumas dezenas de milhares de estudantes o custo é o de
+uma consulta e da renderização, não o de milhares de consultas.
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import Equipe, Projeto
+
+
+TEMPLATE = 'emails/lembrete_prazo.txt'
+
+Resumo = namedtuple('Resumo', ['usuario_id', 'email', 'nome', 'projetos'])
+
+_STATUS = dict(Projeto.STATUS_CHOICES)
+
+
+def _vinculos(hoje, dias):
+    """Um SELECT: (usuário, projeto) de membros e líderes das equipes dos projetos vencendo"""
+    prazo = (hoje, hoje + timedelta(days=dias))
+    membros = Equipe.membros.through.objects.filter(
+        equipe__projeto__data_fim_prevista__range=prazo, usuario__is_active=True,
+    ).exclude(equipe__projeto__status='concluido').exclude(usuario__email='').values_list(
+        'usuario_id', 'usuario__email', 'usuario__first_name', 'usuario__username',
+        'equipe__projeto_id', 'equipe__projeto__titulo', 'equipe__projeto__status',
+        'equipe__projeto__data_fim_prevista',
+    )
+    lideres = Equipe.objects.filter(
+        projeto__data_fim_prevista__range=prazo, lider__is_active=True,
+    ).exclude(projeto__status='concluido').exclude(lider__email='').order_by().values_list(
+        'lider_id', 'lider__email', 'lider__first_name', 'lider__username',
+        'projeto_id', 'projeto__titulo', 'projeto__status', 'projeto__data_fim_prevista',
+    )
+    # UNION (sem ALL) também elimina quem está em duas equipes do mesmo projeto
+    return membros.union(lideres)
+
+
+def montar_resumos(hoje=None, dias=None):
+    """Resumos por destinatário, em ordem de usuario_id; projetos por prazo"""
+    hoje = hoje or timezone.localdate()
+    dias = dias if dias is not None else settings.LEMBRETE_PRAZO_DIAS
+
+    por_usuario = {}
+    projetos = {}
+    for usuario_id, email, primeiro_nome, username, pk, titulo, status, data_fim in _vinculos(hoje, dias):
+        resumo = por_usuario.get(usuario_id)
+        if resumo is None:
+            resumo = por_usuario[usuario_id] = Resumo(usuario_id, email, primeiro_nome or username, {})
+        projeto = projetos.get(pk)
+        if projeto is None:
+            # Um dict por projeto, compartilhado por todos os destinatários
+            # dele, já com os textos do e-mail: o template só os imprime
+            projeto = projetos[pk] = _projeto(titulo, status, data_fim, hoje)
+        resumo.projetos[pk] = projeto
+
+    return [
+        resumo._replace(projetos=sorted(resumo.projetos.values(), key=lambda p: (p['data_fim_prevista'], p['titulo'])))
+        for _, resumo in sorted(por_usuario.items())
+    ]
+
+
+def _projeto(titulo, status, data_fim, hoje):
+    restantes = (data_fim - hoje).days
+    if restantes == 0:
+        quando = 'hoje'
+    elif restantes == 1:
+        quando = 'amanhã'
+    else:
+        quando = f'daqui a {restantes} dias'
+    return {
+        'titulo': titulo,
+        'status': _STATUS.get(status, status),
+        'data_fim_prevista': data_fim,
+        'prazo': f'{data_fim:%d/%m/%Y}',
+        'quando': quando,
+    }
+
+
+def mensagens(resumos, dias=None):
+    """Um EmailMessage por resumo, renderizados com o mesmo template compilado"""
+    dias = dias if dias is not None else settings.LEMBRETE_PRAZO_DIAS
+    template = get_template(TEMPLATE)
+    for resumo in resumos:
+        corpo = template.render({'nome': resumo.nome, 'dias': dias, 'projetos': resumo.projetos})
+        assunto = f'[DevLab] {len(resumo.projetos)} projeto(s) com prazo nos próximos {dias} dias'
+        yield EmailMessage(assunto, corpo, settings.DEFAULT_FROM_EMAIL, [resumo.email])
@@ -0,0 +1,153 @@
+"""
+Limite de tentativas de login do DevLab Projects
+Arquivo: meuapp/limites.py
+
+Cada tentativa custa até dois hashes de senha (usuário e, se falhar,
+e-mail), então login_view consulta este módulo antes de autenticar e
+recusa com 429 as tentativas acima do limite, sem calcular hash nenhum.
+
+Dois mecanismos, aplicados ao IP e ao identificador digitado (usuário ou
+e-mail, em minúsculas):
+
+- balde de fichas: cada tentativa gasta uma ficha; o balde guarda até
+  LOGIN_RAJADA_* fichas e recebe LOGIN_POR_MINUTO_* fichas por minuto
+  (com 0 não há reposição: o balde vazio só é esquecido, e volta cheio,
+  LOGIN_BLOQUEIO_MAXIMO segundos depois da última tentativa aceita);
+- bloqueio progressivo: ao chegar a LOGIN_BLOQUEIO_FALHAS_* senhas erradas
+  seguidas, a chave fica bloqueada por LOGIN_BLOQUEIO_SEGUNDOS; cada falha
+  a mais dobra o bloqueio, até LOGIN_BLOQUEIO_MAXIMO. As falhas são
+  esquecidas após LOGIN_BLOQUEIO_MAXIMO segundos sem erros, e um login
+  correto zera as do identificador (as do IP continuam).
+
+O estado fica no cache LOGIN_LIMITE_CACHE (nunca no banco: um ataque não
+disputa o lock de escrita do SQLite). Com o cache em arquivo padrão os
+limites valem para os processos da máquina; com Redis ou Memcached, para
+todas. As chaves levam um hash do IP e do identificador.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+CHAVE_BALDE = 'devlab:login:balde:{}:{}'
+CHAVE_FALHAS = 'devlab:login:falhas:{}:{}'
+CHAVE_BLOQUEIO = 'devlab:login:bloqueio:{}:{}'
+
+# Evita que duas tentativas simultâneas no mesmo processo gastem a mesma ficha
+_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'LOGIN_LIMITE_CACHE', 'default')]
+
+
+def _limites(tipo):
+    """(rajada, fichas por segundo, falhas até o bloqueio) de 'ip' ou 'usuario'"""
+    sufixo = tipo.upper()
+    return (
+        getattr(settings, f'LOGIN_RAJADA_{sufixo}'),
+        max(0, getattr(settings, f'LOGIN_POR_MINUTO_{sufixo}')) / 60,
+        getattr(settings, f'LOGIN_BLOQUEIO_FALHAS_{sufixo}'),
+    )
+
+
+def _hash(valor):
+    return hashlib.blake2b(valor.encode(), digest_size=16).hexdigest()
+
+
+def _chaves(ip, identificador):
+    """[(tipo, hash)] das chaves da tentativa; sem identificador, só o IP"""
+    chaves = [('ip', _hash(ip or '-'))]
+    if identificador:
+        chaves.append(('usuario', _hash(identificador)))
+    return chaves
+
+
+def identificador_login(valor):
+    """Normaliza o usuário ou e-mail digitado: Maria, maria e MARIA contam juntos"""
+    return (valor or '').strip().lower()[:150]
+
+
+def ip_cliente(request):
+    """IP do cliente; atrás de um proxy, o cabeçalho de LOGIN_IP_CABECALHO"""
+    cabecalho = getattr(settings, 'LOGIN_IP_CABECALHO', '')
+    if cabecalho and request.META.get(cabecalho):
+        # X-Forwarded-For: "cliente, proxy1, proxy2"
+        return request.META[cabecalho].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def consumir(ip, identificador):
+    """
+    Registra uma tentativa de login. Retorna 0 se ela pode prosseguir ou os
+    segundos de espera se o IP ou o identificador estiver bloqueado ou sem
+    fichas (nesse caso nenhuma ficha é gasta).
+    """
+    if not getattr(settings, 'LOGIN_LIMITE_ATIVO', True):
+        return 0
+
+    cache = _cache()
+    chaves = _chaves(ip, identificador)
+    bloqueios = [CHAVE_BLOQUEIO.format(*chave) for chave in chaves]
+    baldes = [CHAVE_BALDE.format(*chave) for chave in chaves]
+    with _lock:
+        agora = time.time()
+        estado = cache.get_many(bloqueios + baldes)
+        espera = max((estado[nome] - agora for nome in bloqueios if nome in estado), default=0)
+
+        novos = {}
+        for (tipo, _), nome in zip(chaves, baldes):
+            rajada, por_segundo = _limites(tipo)[:2]
+            fichas, ultima = estado.get(nome, (rajada, agora))
+            fichas = min(rajada, fichas + (agora - ultima) * por_segundo)
+            if por_segundo:
+                # Expira quando estaria cheio de novo: igual a um balde ausente
+                expira = math.ceil(rajada / por_segundo)
+                falta = (1 - fichas) / por_segundo
+            else:
+                # Sem reposição: só a expiração devolve as fichas
+                expira = settings.LOGIN_BLOQUEIO_MAXIMO
+                falta = ultima + expira - agora
+            if fichas < 1:
+                espera = max(espera, falta)
+            novos[nome] = ((fichas - 1, agora), expira)
+
+        if espera > 0:
+            return espera
+        for nome, (valor, expira) in novos.items():
+            cache.set(nome, valor, expira)
+    return 0
+
+
+def registrar_falha(ip, identificador):
+    """Conta uma senha errada; bloqueia as chaves que passaram do limite"""
+    if not getattr(settings, 'LOGIN_LIMITE_ATIVO', True):
+        return
+
+    cache = _cache()
+    base = settings.LOGIN_BLOQUEIO_SEGUNDOS
+    maximo = settings.LOGIN_BLOQUEIO_MAXIMO
+    with _lock:
+        agora = time.time()
+        for tipo, valor in _chaves(ip, identificador):
+            nome = CHAVE_FALHAS.format(tipo, valor)
+            falhas = cache.get(nome, 0) + 1
+            # As falhas são esquecidas depois de um período sem tentativas
+            cache.set(nome, falhas, maximo)
+            excedentes = falhas - _limites(tipo)[2]
+            if excedentes >= 0:
+                duracao = min(maximo, base * 2 ** min(excedentes, 30))
+                cache.set(CHAVE_BLOQUEIO.format(tipo, valor), agora + duracao, math.ceil(duracao))
+
+
+def registrar_sucesso(identificador):
+    """Login correto: zera as falhas e o bloqueio do identificador"""
+    if not identificador:
+        return
+    valor = _hash(identificador)
+    _cache().delete_many([CHAVE_FALHAS.format('usuario', valor), CHAVE_BLOQUEIO.format('usuario', valor)])
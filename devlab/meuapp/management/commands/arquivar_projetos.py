@@ -0,0 +1,81 @@
+# meuapp/management/commands/arquivar_projetos.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from meuapp import arquivo
+from meuapp.models import ProjetoArquivado
+
+
+class Command(BaseCommand):
+    help = (
+        'Move os projetos concluídos sem alterações há mais de ARQUIVO_MESES meses, com as '
+        'equipes e participações, para as tabelas de arquivo (consulta em /arquivo/). '
+        'Com --restaurar, devolve projetos arquivados às tabelas de trabalho.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            help='Arquiva os concluídos sem alterações há mais de N meses (padrão: ARQUIVO_MESES)'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            help='Projetos movidos por transação (padrão: ARQUIVO_LOTE)'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Só mostra quantos e quais projetos seriam arquivados'
+        )
+        parser.add_argument(
+            '--restaurar',
+            type=int,
+            nargs='+',
+            metavar='PK',
+            help='Restaura os projetos arquivados com estes pks'
+        )
+
+    def handle(self, *args, **options):
+        if options['restaurar']:
+            self._restaurar(options['restaurar'])
+            return
+
+        meses = options['meses'] if options['meses'] is not None else settings.ARQUIVO_MESES
+        if meses < 0:
+            raise CommandError('--meses não pode ser negativo.')
+        if options['lote'] is not None and options['lote'] < 1:
+            raise CommandError('--lote precisa ser pelo menos 1.')
+
+        projetos = arquivo.candidatos(meses)
+        if options['simular']:
+            total = projetos.count()
+            self.stdout.write(f'{total} projeto(s) concluído(s) sem alterações há mais de {meses} mes(es):')
+            for projeto in projetos.only('titulo', 'atualizado_em').order_by('atualizado_em')[:20]:
+                self.stdout.write(f'  {projeto.pk:>8}  {projeto.atualizado_em:%d/%m/%Y}  {projeto.titulo}')
+            if total > 20:
+                self.stdout.write(f'  ... e mais {total - 20}')
+            return
+
+        total = 0
+        for ultimo, quantidade in arquivo.arquivar(projetos, options['lote']):
+            total += quantidade
+            self.stdout.write(f'  {total} projeto(s) arquivado(s) (até o pk {ultimo})')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} projeto(s) arquivado(s); {ProjetoArquivado.objects.count()} no arquivo.'
+        ))
+
+    def _restaurar(self, pks):
+        for pk in pks:
+            try:
+                projeto, sem_lider = arquivo.restaurar(pk)
+            except ProjetoArquivado.DoesNotExist:
+                raise CommandError(f'Não há projeto arquivado com o pk {pk}.')
+            except IntegrityError:
+                raise CommandError(f'Já existe um projeto com o pk {pk}; nada foi restaurado.')
+            self.stdout.write(self.style.SUCCESS(f'Restaurado: {projeto.titulo} (pk {projeto.pk})'))
+            for nome in sem_lider:
+                self.stdout.write(self.style.WARNING(
+                    f'  Equipe "{nome}" restaurada sem líder: o antigo líder já lidera outra equipe.'
+                ))
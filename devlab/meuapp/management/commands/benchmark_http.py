@@ -0,0 +1,135 @@
+# meuapp/management/commands/benchmark_http.py
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from meuapp.models import Usuario
+
+
+class _SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    """Um redirecionamento (ex: para o login) conta como erro, não como sucesso"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão (req/s) e a latência de um servidor já em execução '
+        '(runserver, gunicorn, uvicorn...) em vários níveis de concorrência. '
+        'Rode uma vez contra o servidor WSGI e outra contra o ASGI para comparar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000',
+            help='Endereço do servidor (padrão: http://127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--caminhos',
+            default='/coordenador/,/projetos/,/equipes/',
+            help='Páginas requisitadas, separadas por vírgula'
+        )
+        parser.add_argument(
+            '--usuario',
+            default='coordenador.master',
+            help='Username usado para autenticar as requisições (padrão: coordenador.master)'
+        )
+        parser.add_argument(
+            '--concorrencia',
+            default='1,10,25,50',
+            help='Níveis de concorrência (clientes simultâneos), separados por vírgula'
+        )
+        parser.add_argument(
+            '--requisicoes',
+            type=int,
+            default=300,
+            help='Requisições por nível de concorrência (padrão: 300)'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=int,
+            default=30,
+            help='Timeout de cada requisição em segundos (padrão: 30)'
+        )
+        parser.add_argument(
+            '--rotulo',
+            default='',
+            help='Nome do cenário exibido no resultado (ex: "WSGI gunicorn 1 worker")'
+        )
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        caminhos = [c.strip() for c in options['caminhos'].split(',') if c.strip()]
+        try:
+            niveis = [int(n) for n in options['concorrencia'].split(',')]
+        except ValueError:
+            raise CommandError('--concorrencia deve ser uma lista de inteiros, ex: 1,10,50')
+
+        self.cookie = self.criar_sessao(options['usuario'])
+        self.timeout = options['timeout']
+        self.opener = urllib.request.build_opener(_SemRedirecionamento)
+
+        # Aquecimento: carrega templates, conexões e caches do servidor
+        for caminho in caminhos:
+            ok, _ = self.requisitar(base + caminho)
+            if not ok:
+                raise CommandError(f'{base}{caminho} não respondeu 200. O servidor está rodando?')
+
+        titulo = options['rotulo'] or base
+        self.stdout.write(self.style.SUCCESS(f'=== BENCHMARK: {titulo} ==='))
+        self.stdout.write(f'Páginas: {", ".join(caminhos)}')
+        self.stdout.write(f'{"concorrência":>12} {"req/s":>9} {"p50 (ms)":>9} {"p95 (ms)":>9} {"erros":>6}')
+
+        for nivel in niveis:
+            urls = [base + caminhos[i % len(caminhos)] for i in range(options['requisicoes'])]
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=nivel) as pool:
+                resultados = list(pool.map(self.requisitar, urls))
+            duracao = time.perf_counter() - inicio
+
+            latencias = sorted(latencia for ok, latencia in resultados if ok)
+            erros = len(resultados) - len(latencias)
+            p50 = self.percentil(latencias, 0.50) * 1000
+            p95 = self.percentil(latencias, 0.95) * 1000
+            self.stdout.write(
+                f'{nivel:>12} {len(latencias) / duracao:>9.1f} {p50:>9.1f} {p95:>9.1f} {erros:>6}'
+            )
+
+    def criar_sessao(self, username):
+        """Cria uma sessão autenticada direto no banco (não precisa da senha)"""
+        try:
+            usuario = Usuario.objects.get(username=username)
+        except Usuario.DoesNotExist:
+            raise CommandError(f'Usuário "{username}" não existe (rode populate_db ou use --usuario)')
+
+        sessao = import_module(settings.SESSION_ENGINE).SessionStore()
+        sessao[SESSION_KEY] = usuario._meta.pk.value_to_string(usuario)
+        sessao[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        sessao[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+        sessao.save()
+        return f'{settings.SESSION_COOKIE_NAME}={sessao.session_key}'
+
+    def requisitar(self, url):
+        """Retorna (sucesso, latência em segundos)"""
+        inicio = time.perf_counter()
+        requisicao = urllib.request.Request(url, headers={'Cookie': self.cookie})
+        try:
+            with self.opener.open(requisicao, timeout=self.timeout) as resposta:
+                resposta.read()
+                ok = resposta.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return ok, time.perf_counter() - inicio
+
+    @staticmethod
+    def percentil(valores, fracao):
+        if not valores:
+            return 0.0
+        return valores[min(len(valores) - 1, int(len(valores) * fracao))]
@@ -0,0 +1,133 @@
+# meuapp/management/commands/perfis_lentos.py
+import os
+import statistics
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from meuapp import perfilador
+
+
+class Command(BaseCommand):
+    help = (
+        'Resume os perfis dos requests lentos gravados em PERFIL_DIR pelo '
+        'PerfilMiddleware (ative com PERFIL_LIMITE_MS): totais por rota, os '
+        'requests mais lentos e as funções em que eles passaram mais tempo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--diretorio',
+            help='Diretório dos perfis (padrão: PERFIL_DIR)'
+        )
+        parser.add_argument(
+            '--view',
+            help='Só os perfis desta rota (nome da URL, ex: projeto_detalhes)'
+        )
+        parser.add_argument(
+            '--papel',
+            help='Só os perfis deste tipo de usuário (coordenador, professor, estudante, anonimo)'
+        )
+        parser.add_argument(
+            '--limite',
+            type=int,
+            default=10,
+            help='Quantidade de requests mais lentos listados (padrão: 10)'
+        )
+        parser.add_argument(
+            '--funcoes',
+            type=int,
+            default=15,
+            help='Quantidade de funções listadas, somando as amostras dos perfis selecionados (padrão: 15; 0 omite)'
+        )
+        parser.add_argument(
+            '--limpar',
+            action='store_true',
+            help='Apaga todos os perfis do diretório'
+        )
+
+    def handle(self, *args, **options):
+        diretorio = options['diretorio'] or str(settings.PERFIL_DIR)
+        if options['limite'] < 0 or options['funcoes'] < 0:
+            raise CommandError('--limite e --funcoes não podem ser negativos.')
+
+        perfis = perfilador.listar(diretorio)
+        if options['limpar']:
+            for perfil in perfis:
+                for caminho in (perfil['arquivo'], os.path.join(diretorio, perfil['pilhas'])):
+                    if os.path.exists(caminho):
+                        os.remove(caminho)
+            self.stdout.write(self.style.SUCCESS(f'{len(perfis)} perfil(is) apagado(s).'))
+            return
+
+        if options['view']:
+            perfis = [perfil for perfil in perfis if perfil['view'] == options['view']]
+        if options['papel']:
+            perfis = [perfil for perfil in perfis if perfil.get('papel') == options['papel']]
+        if not perfis:
+            self.stdout.write(f'Nenhum perfil em {diretorio}.')
+            return
+
+        self._por_rota(perfis)
+        self._mais_lentos(perfis, options['limite'])
+        if options['funcoes']:
+            self._funcoes(perfis, options['funcoes'])
+
+    def _por_rota(self, perfis):
+        rotas = defaultdict(list)
+        for perfil in perfis:
+            rotas[perfil['view']].append(perfil)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{len(perfis)} request(s) lento(s) por rota:'))
+        self.stdout.write(f'  {"rota":<36} {"qtd":>5} {"mediana":>9} {"máximo":>9} {"consultas":>9}  papéis')
+        # Primeiro as rotas que somam mais tempo
+        for view, lista in sorted(rotas.items(), key=lambda item: -sum(p['duracao_ms'] for p in item[1])):
+            duracoes = [perfil['duracao_ms'] for perfil in lista]
+            consultas = statistics.median(perfil.get('consultas', 0) for perfil in lista)
+            papeis = Counter(perfil.get('papel') or '-' for perfil in lista)
+            self.stdout.write(
+                f'  {view:<36} {len(lista):>5} {statistics.median(duracoes):>7.0f}ms '
+                f'{max(duracoes):>7.0f}ms {consultas:>9g}  '
+                + ', '.join(f'{papel} ({total})' for papel, total in papeis.most_common())
+            )
+
+    def _mais_lentos(self, perfis, limite):
+        if not limite:
+            return
+        self.stdout.write('')
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Os {limite} mais lentos:'))
+        for perfil in sorted(perfis, key=lambda p: -p['duracao_ms'])[:limite]:
+            self.stdout.write(
+                f'  {perfil["duracao_ms"]:>8.0f}ms  {perfil["data"]}  {perfil.get("metodo", "")} '
+                f'{perfil.get("caminho", "")} ({perfil["view"]}, {perfil.get("papel") or "-"}, '
+                f'{perfil.get("consultas", 0)} consultas, {perfil["amostras"]} amostras)'
+            )
+            self.stdout.write(f'            {os.path.join(os.path.dirname(perfil["arquivo"]), perfil["pilhas"])}')
+
+    def _funcoes(self, perfis, limite):
+        proprio = Counter()
+        inclusivo = Counter()
+        total = 0
+        for perfil in perfis:
+            for pilha, amostras in perfilador.ler_pilhas(perfil).items():
+                total += amostras
+                proprio[pilha[-1]] += amostras
+                # Só o código do projeto (os frames do servidor e do Django
+                # estariam em todas as pilhas); recursão conta uma vez
+                for frame in set(pilha):
+                    if perfilador.do_projeto(frame):
+                        inclusivo[frame] += amostras
+        if not total:
+            return
+
+        # Frames presentes em todas as pilhas (manage.py, middlewares) não dizem nada
+        inclusivo = Counter({frame: amostras for frame, amostras in inclusivo.items() if amostras < total})
+        titulos = (
+            ('Tempo próprio', proprio),
+            ('Tempo total no código do projeto (com as chamadas)', inclusivo),
+        )
+        for titulo, contagem in titulos:
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{titulo}, em {total} amostras:'))
+            for frame, amostras in contagem.most_common(limite):
+                self.stdout.write(f'  {100 * amostras / total:5.1f}%  {frame}')
@@ -113,6 +113,9 @@ class Command(BaseCommand):
         
         pool_membros = estudantes + professores
         lideres_disponiveis = list(pool_membros)
+        # Linhas da tabela de membros, inseridas de uma vez ao final
+        Membro = Equipe.membros.through
+        membros_equipes = []
 
         for nome in nomes_equipes:
             if not lideres_disponiveis:
@@ -140,7 +143,11 @@ class Command(BaseCommand):
             if lider not in membros_selecionados:
                 membros_selecionados.append(lider)
 
-            equipe.membros.set(membros_selecionados)
+            membros_equipes.extend(
+                Membro(equipe_id=equipe.pk, usuario_id=membro.pk) for membro in membros_selecionados
+            )
+
+        Membro.objects.bulk_create(membros_equipes)
 
         self.stdout.write(self.style.SUCCESS(f'{Equipe.objects.count()} equipes criadas.'))
         self.stdout.write(self.style.SUCCESS('Povoamento do banco de dados concluído com sucesso!'))
\ No newline at end of file
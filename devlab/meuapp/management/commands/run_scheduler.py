@@ -0,0 +1,116 @@
+# meuapp/management/commands/run_scheduler.py
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+from meuapp import agendador
+from meuapp.models import TarefaAgendada
+
+
+class Command(BaseCommand):
+    help = (
+        'Executa as tarefas periódicas (meuapp/tarefas.py): expiração de solicitações, '
+        'lembretes de prazo, limpeza de sessões, estatísticas diárias e vácuo do SQLite. '
+        'Cada tarefa tem um lease no banco: vários agendadores podem rodar ao mesmo tempo '
+        'sem repetir trabalho. Sem --uma-vez, fica em execução verificando as tarefas a '
+        'cada TAREFAS_INTERVALO segundos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez',
+            action='store_true',
+            help='Executa as tarefas no horário e termina (para cron ou tarefas agendadas do PythonAnywhere)'
+        )
+        parser.add_argument(
+            '--tarefa',
+            action='append',
+            help='Só esta tarefa (pode repetir)'
+        )
+        parser.add_argument(
+            '--forcar',
+            action='store_true',
+            help='Executa agora, mesmo fora do horário (o lease continua valendo)'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            help='Segundos entre as verificações (padrão: TAREFAS_INTERVALO)'
+        )
+        parser.add_argument(
+            '--listar',
+            action='store_true',
+            help='Mostra as tarefas, a próxima execução e o resultado da última'
+        )
+
+    def handle(self, *args, **options):
+        tarefas = agendador.tarefas_ativas()
+        if options['tarefa']:
+            desconhecidas = set(options['tarefa']) - set(agendador.TAREFAS)
+            if desconhecidas:
+                raise CommandError(
+                    f'Tarefa(s) desconhecida(s): {", ".join(sorted(desconhecidas))}. '
+                    f'Disponíveis: {", ".join(sorted(agendador.TAREFAS))}.'
+                )
+            tarefas = {nome: agendador.TAREFAS[nome] for nome in options['tarefa']}
+        intervalo = options['intervalo'] or settings.TAREFAS_INTERVALO
+        if intervalo <= 0:
+            raise CommandError('--intervalo precisa ser positivo.')
+
+        agendador.preparar(tarefas)
+        if options['listar']:
+            self._listar(tarefas)
+            return
+
+        dono = agendador.identificador_processo()
+        if options['uma_vez'] or options['forcar']:
+            self._rodada(dono, tarefas, options['forcar'])
+            return
+
+        # SIGTERM (systemd, supervisor) termina entre duas rodadas
+        self._parar = False
+        signal.signal(signal.SIGTERM, self._sinal_parar)
+        self.stdout.write(f'Agendador {dono}: {len(tarefas)} tarefa(s), verificando a cada {intervalo:g}s.')
+        try:
+            while not self._parar:
+                self._rodada(dono, tarefas, False)
+                # Conexões paradas entre as rodadas podem ter caído
+                close_old_connections()
+                fim = time.monotonic() + intervalo
+                while not self._parar and time.monotonic() < fim:
+                    time.sleep(min(1, fim - time.monotonic()))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Agendador encerrado.')
+
+    def _sinal_parar(self, *args):
+        self._parar = True
+
+    def _rodada(self, dono, tarefas, forcar):
+        for nome, (status, processados) in agendador.rodar_pendentes(dono, tarefas, forcar).items():
+            estilo = self.style.ERROR if status in ('erro', 'perdida') else self.style.SUCCESS
+            self.stdout.write(estilo(
+                f'{timezone.localtime():%d/%m/%Y %H:%M:%S} {nome}: {status}, {processados} item(ns)'
+            ))
+
+    def _listar(self, tarefas):
+        registros = {registro.nome: registro for registro in TarefaAgendada.objects.filter(nome__in=tarefas)}
+        formato = '%d/%m/%Y %H:%M'
+        self.stdout.write(f'  {"tarefa":<22} {"quando":<14} {"próxima":<17} {"última":<17} resultado')
+        for nome, tarefa in tarefas.items():
+            registro = registros[nome]
+            quando = f'às {tarefa.horario:%H:%M}' if tarefa.horario else f'a cada {tarefa.intervalo}'
+            proxima = f'{timezone.localtime(registro.proxima_execucao):{formato}}' if registro.proxima_execucao else 'agora'
+            ultima = f'{timezone.localtime(registro.ultimo_fim):{formato}}' if registro.ultimo_fim else '-'
+            resultado = (
+                f'{registro.ultimo_status} ({registro.ultimos_processados} item(ns))'
+                if registro.ultimo_status else '-'
+            )
+            if registro.dono:
+                resultado += f' — em execução por {registro.dono}'
+            self.stdout.write(f'  {nome:<22} {quando:<14} {proxima:<17} {ultima:<17} {resultado}')
+            if tarefa.descricao:
+                self.stdout.write(f'    {tarefa.descricao}')
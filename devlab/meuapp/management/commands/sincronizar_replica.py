@@ -0,0 +1,39 @@
+# meuapp/management/commands/sincronizar_replica.py
+import os
+import sqlite3
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia o banco SQLite principal para a réplica local (DATABASE_REPLICA_NAME), '
+        'simulando a replicação para testar o ReadWriteRouter sem um servidor de banco.'
+    )
+
+    def handle(self, *args, **options):
+        alias = settings.DATABASE_REPLICA_ALIAS
+        if not alias:
+            raise CommandError('Defina DATABASE_REPLICA_NAME no .env para usar uma réplica.')
+
+        origem = connections[DEFAULT_DB_ALIAS].settings_dict
+        destino = connections[alias].settings_dict
+        for banco in (origem, destino):
+            if banco['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(
+                    'Apenas réplicas SQLite locais são sincronizadas por este comando; '
+                    'em outros bancos use a replicação do próprio servidor.'
+                )
+
+        if not os.path.isfile(origem['NAME']):
+            raise CommandError(f'Banco principal não encontrado: {origem["NAME"]} (rode migrate)')
+
+        # API de backup do SQLite: cópia consistente mesmo com o servidor rodando
+        with closing(sqlite3.connect(str(origem['NAME']))) as principal, \
+                closing(sqlite3.connect(str(destino['NAME']))) as replica:
+            principal.backup(replica)
+
+        self.stdout.write(self.style.SUCCESS(f'Réplica atualizada: {destino["NAME"]}'))
@@ -0,0 +1,46 @@
+# meuapp/management/commands/snapshot_stats.py
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from meuapp.models import EstatisticaDiaria
+
+
+class Command(BaseCommand):
+    help = (
+        'Grava a fotografia diária dos indicadores (EstatisticaDiaria) usada pelos '
+        'gráficos de tendência. Idempotente: rodar de novo no mesmo dia atualiza a '
+        'linha. Agende uma vez por dia (ex: cron às 23:55).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data',
+            help='Dia a gerar, no formato AAAA-MM-DD (padrão: hoje)'
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=1,
+            help='Quantidade de dias até --data, inclusive (recalcula o histórico; padrão: 1)'
+        )
+
+    def handle(self, *args, **options):
+        if options['data']:
+            try:
+                ultimo = date.fromisoformat(options['data'])
+            except ValueError:
+                raise CommandError(f'Data inválida: {options["data"]} (use AAAA-MM-DD)')
+        else:
+            ultimo = timezone.localdate()
+        if ultimo > timezone.localdate():
+            raise CommandError('Não é possível gerar estatísticas de um dia futuro.')
+        if options['dias'] < 1:
+            raise CommandError('--dias precisa ser pelo menos 1.')
+
+        for atraso in range(options['dias'] - 1, -1, -1):
+            estatistica = EstatisticaDiaria.gerar(ultimo - timedelta(days=atraso))
+            self.stdout.write(f'{estatistica}: {estatistica.solicitacoes_aprovadas} aprovação(ões), '
+                              f'{estatistica.novos_estudantes} novo(s) estudante(s)')
+
+        self.stdout.write(self.style.SUCCESS('Estatísticas diárias atualizadas.'))
@@ -0,0 +1,315 @@
+"""
+Métricas do DevLab Projects (formato texto do Prometheus)
+Arquivo: meuapp/metricas.py
+
+Contadores e histogramas da aplicação, expostos em /metrics:
+
+- requisições e latência por rota (nome da URL), e consultas ao banco por
+  rota (meuapp.middleware.MetricasMiddleware);
+- tentativas de login com sucesso, com falha e recusadas pelo limite de
+  tentativas (login_view);
+- solicitações de cadastro criadas, aprovadas e rejeitadas (receiver em
+  meuapp/signals.py);
+- e-mails enviados, com falha e em envio, e a duração dos envios
+  (EmailBackendMedido, na frente do backend configurado);
+- acertos e faltas dos caches locais (meuapp/cache.py).
+
+Os incrementos não usam lock: cada thread soma no próprio dicionário, e
+os dicionários só são somados na leitura. Cada processo tem os seus; com
+vários workers, METRICAS_DIR aponta para um diretório comum onde cada
+processo grava uma cópia dos seus valores (no máximo a cada
+METRICAS_INTERVALO segundos, ao fim de um request), e /metrics soma as
+cópias dos demais processos aos valores do próprio. Limpe o diretório ao
+reiniciar o serviço (as séries recomeçam do zero, o que o Prometheus trata
+como reinício de contador).
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_EMAIL = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# nome -> (tipo, descrição, buckets dos histogramas)
+METRICAS = {
+    'devlab_requisicoes_total': ('counter', 'Requisições atendidas, por rota, método e status', None),
+    'devlab_requisicao_duracao_segundos': ('histogram', 'Duração das requisições, por rota', BUCKETS_DURACAO),
+    'devlab_consultas_banco_total': ('counter', 'Consultas ao banco, por rota', None),
+    'devlab_consultas_por_requisicao': ('histogram', 'Consultas ao banco por requisição, por rota', BUCKETS_CONSULTAS),
+    'devlab_logins_total': ('counter', 'Tentativas de login, por resultado (sucesso, falha, bloqueado)', None),
+    'devlab_solicitacoes_total': ('counter', 'Solicitações de cadastro criadas, aprovadas e rejeitadas', None),
+    'devlab_emails_total': ('counter', 'Mensagens de e-mail, por resultado', None),
+    'devlab_emails_iniciados_total': ('counter', 'Mensagens de e-mail entregues ao backend para envio', None),
+    'devlab_email_envio_duracao_segundos': ('histogram', 'Duração de cada envio de e-mails (uma conexão)', BUCKETS_EMAIL),
+    'devlab_cache_local_total': ('counter', 'Leituras dos caches locais, por cache e resultado', None),
+}
+
+# Cópia de cada processo em METRICAS_DIR (pid e início, pois pids se repetem)
+ARQUIVO_PROCESSO = '{}-{}.json'
+_ARQUIVO = ARQUIVO_PROCESSO.format(os.getpid(), int(time.time() * 1000))
+
+
+class Registro:
+    """Valores das métricas do processo, um dicionário por thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+        # Só a criação de um dicionário (uma vez por thread) e a leitura usam o lock
+        self._lock = threading.Lock()
+        # [(thread, valores)] das threads que já registraram algo
+        self._threads = []
+        # Valores das threads que já terminaram
+        self._encerradas = {}
+
+    def _valores(self):
+        valores = getattr(self._local, 'valores', None)
+        if valores is None:
+            valores = self._local.valores = {}
+            with self._lock:
+                self._threads.append((threading.current_thread(), valores))
+        return valores
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        valores = self._valores()
+        valores[chave] = valores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, **rotulos):
+        """Histograma: contagem por bucket, total e soma"""
+        buckets = METRICAS[nome][2]
+        chave = (nome, tuple(sorted(rotulos.items())))
+        valores = self._valores()
+        contagens = valores.get(chave)
+        if contagens is None:
+            # [bucket 1, ..., bucket n, +Inf, soma]
+            contagens = valores[chave] = [0] * (len(buckets) + 1) + [0.0]
+        contagens[bisect_left(buckets, valor)] += 1
+        contagens[-1] += valor
+
+    def valores(self):
+        """Soma dos dicionários de todas as threads: {(nome, rotulos): valor}"""
+        with self._lock:
+            vivas = []
+            for thread, valores in self._threads:
+                if thread.is_alive():
+                    vivas.append((thread, valores))
+                else:
+                    # Threads encerradas (ex: runserver, uma por request) não
+                    # escrevem mais: os valores vão para o acumulado
+                    _somar(self._encerradas, valores)
+            self._threads = vivas
+            total = {}
+            _somar(total, self._encerradas)
+            for _, valores in vivas:
+                # dict() copia de uma vez; a thread dona pode estar escrevendo
+                _somar(total, dict(valores))
+        return total
+
+    def limpar(self):
+        with self._lock:
+            for _, valores in self._threads:
+                valores.clear()
+            self._encerradas.clear()
+
+
+def _somar(destino, origem):
+    for chave, valor in origem.items():
+        atual = destino.get(chave)
+        if atual is None:
+            destino[chave] = list(valor) if isinstance(valor, list) else valor
+        elif isinstance(valor, list):
+            destino[chave] = [a + b for a, b in zip(atual, valor)]
+        else:
+            destino[chave] = atual + valor
+
+
+registro = Registro()
+incrementar = registro.incrementar
+observar = registro.observar
+
+
+# ============================================================
+# CONSULTAS AO BANCO POR REQUISIÇÃO
+# ============================================================
+
+# Contador das consultas do request atual ([total]). As views assíncronas
+# consultam o banco em outra thread (sync_to_async), que recebe uma cópia
+# do contexto: a lista é a mesma e a contagem chega ao middleware.
+consultas_requisicao = contextvars.ContextVar('consultas_requisicao', default=None)
+
+
+def contar_consulta(execute, sql, params, many, context):
+    contador = consultas_requisicao.get()
+    if contador is not None:
+        contador[0] += 1
+    return execute(sql, params, many, context)
+
+
+def instalar_contador(sender, connection, **kwargs):
+    """Receiver de connection_created: conta as consultas de toda conexão aberta"""
+    if contar_consulta not in connection.execute_wrappers:
+        # No início da lista: execute_wrapper() remove sempre o último
+        connection.execute_wrappers.insert(0, contar_consulta)
+
+
+# ============================================================
+# E-MAIL
+# ============================================================
+
+class EmailBackendMedido(BaseEmailBackend):
+    """
+    Mede os envios do backend configurado em EMAIL_BACKEND_MEDIDO
+    (EMAIL_BACKEND=meuapp.metricas.EmailBackendMedido)
+    """
+
+    def __init__(self, fail_silently=False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.backend = get_connection(settings.EMAIL_BACKEND_MEDIDO, fail_silently=fail_silently, **kwargs)
+
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        return self.backend.close()
+
+    def send_messages(self, email_messages):
+        email_messages = list(email_messages)
+        incrementar('devlab_emails_iniciados_total', len(email_messages))
+        inicio = time.perf_counter()
+        enviadas = 0
+        try:
+            enviadas = self.backend.send_messages(email_messages) or 0
+            return enviadas
+        finally:
+            observar('devlab_email_envio_duracao_segundos', time.perf_counter() - inicio)
+            incrementar('devlab_emails_total', enviadas, resultado='enviado')
+            incrementar('devlab_emails_total', len(email_messages) - enviadas, resultado='falha')
+
+
+# ============================================================
+# AGREGAÇÃO ENTRE PROCESSOS E EXPOSIÇÃO
+# ============================================================
+
+def _serializar(valores):
+    return {'series': [[nome, list(map(list, rotulos)), valor] for (nome, rotulos), valor in valores.items()]}
+
+
+def _desserializar(dados):
+    return {
+        (nome, tuple(tuple(par) for par in rotulos)): valor
+        for nome, rotulos, valor in dados['series']
+    }
+
+
+def _valores_processo():
+    """Valores do processo, incluindo os contadores dos caches locais"""
+    from .cache import estatisticas_caches_locais
+
+    valores = registro.valores()
+    for nome, estatisticas in estatisticas_caches_locais().items():
+        # Acertos no cache do Django, após a falta local, também são acertos
+        acertos = estatisticas['acertos'] + estatisticas['acertos_django']
+        faltas = estatisticas['faltas'] - estatisticas['acertos_django']
+        valores[('devlab_cache_local_total', (('cache', nome), ('resultado', 'acerto')))] = acertos
+        valores[('devlab_cache_local_total', (('cache', nome), ('resultado', 'falta')))] = faltas
+    return valores
+
+
+_ultima_gravacao = 0.0
+
+
+def gravacao_pendente():
+    """Se já é hora de gravar a cópia do processo em METRICAS_DIR"""
+    return bool(getattr(settings, 'METRICAS_DIR', '')) and (
+        time.monotonic() - _ultima_gravacao >= settings.METRICAS_INTERVALO
+    )
+
+
+def gravar_processo():
+    """Grava a cópia dos valores do processo em METRICAS_DIR"""
+    global _ultima_gravacao
+    _ultima_gravacao = time.monotonic()
+    diretorio = settings.METRICAS_DIR
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, _ARQUIVO)
+    temporario = f'{caminho}.{threading.get_ident()}.tmp'
+    with open(temporario, 'w') as arquivo:
+        json.dump(_serializar(_valores_processo()), arquivo)
+    # Troca atômica: quem lê nunca vê um arquivo pela metade
+    os.replace(temporario, caminho)
+
+
+def coletar():
+    """Valores somados de todos os processos (o próprio, ao vivo; os demais, pela última cópia)"""
+    valores = _valores_processo()
+    diretorio = getattr(settings, 'METRICAS_DIR', '')
+    if diretorio and os.path.isdir(diretorio):
+        for nome in os.listdir(diretorio):
+            if nome == _ARQUIVO or not nome.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(diretorio, nome)) as arquivo:
+                    _somar(valores, _desserializar(json.load(arquivo)))
+            except (OSError, ValueError):
+                # Removido ou ilegível: fica de fora desta leitura
+                continue
+    return valores
+
+
+def _rotulos(pares, extra=()):
+    pares = list(pares) + list(extra)
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for nome, valor in pares
+    )
+    return '{' + texto + '}'
+
+
+def _numero(valor):
+    if isinstance(valor, float) and not valor.is_integer():
+        return repr(valor)
+    return str(int(valor))
+
+
+def exposicao(valores, extras=()):
+    """
+    Texto no formato de exposição do Prometheus (versão 0.0.4).
+    ``extras``: [(nome, tipo, descrição, [(rotulos, valor)])] calculados na leitura (gauges).
+    """
+    por_metrica = {}
+    for (nome, rotulos), valor in valores.items():
+        por_metrica.setdefault(nome, []).append((rotulos, valor))
+
+    linhas = []
+    for nome, (tipo, descricao, buckets) in METRICAS.items():
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} {tipo}')
+        for rotulos, valor in sorted(por_metrica.get(nome, ())):
+            if tipo != 'histogram':
+                linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+                continue
+            acumulado = 0
+            for limite, contagem in zip(list(buckets) + ['+Inf'], valor[:-1]):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{_rotulos(rotulos, [("le", limite)])} {acumulado}')
+            linhas.append(f'{nome}_sum{_rotulos(rotulos)} {_numero(valor[-1])}')
+            linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+
+    for nome, tipo, descricao, series in extras:
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} {tipo}')
+        for rotulos, valor in series:
+            linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,497 @@
+"""
+Middlewares do DevLab Projects
+Arquivo: meuapp/middleware.py
+"""
+
+import asyncio
+import logging
+import mimetypes
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.functional import empty
+from django.utils.http import http_date, parse_etags
+from django.views.static import was_modified_since
+
+from . import metricas, perfilador, routers
+from .consultas import ConsultasRepetidas, InspetorConsultas, formatar_repeticoes
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricasMiddleware:
+    """
+    Requisições, latência e consultas ao banco por rota (meuapp/metricas.py).
+    Fica no início da lista para que a duração inclua os demais middlewares.
+    Desligado com METRICAS_ATIVAS=False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS_ATIVAS', True):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        contador = [0]
+        token = metricas.consultas_requisicao.set(contador)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.consultas_requisicao.reset(token)
+        self._registrar(request, response, time.perf_counter() - inicio, contador[0])
+        if metricas.gravacao_pendente():
+            metricas.gravar_processo()
+        return response
+
+    async def __acall__(self, request):
+        contador = [0]
+        token = metricas.consultas_requisicao.set(contador)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.consultas_requisicao.reset(token)
+        self._registrar(request, response, time.perf_counter() - inicio, contador[0])
+        if metricas.gravacao_pendente():
+            # Escrita em arquivo: fora do event loop
+            await sync_to_async(metricas.gravar_processo)()
+        return response
+
+    @staticmethod
+    def _registrar(request, response, duracao, consultas):
+        match = request.resolver_match
+        view = match.view_name if match else 'sem_rota'
+        metricas.incrementar(
+            'devlab_requisicoes_total', view=view, metodo=request.method, status=response.status_code,
+        )
+        metricas.observar('devlab_requisicao_duracao_segundos', duracao, view=view)
+        if consultas:
+            metricas.incrementar('devlab_consultas_banco_total', consultas, view=view)
+        metricas.observar('devlab_consultas_por_requisicao', consultas, view=view)
+
+
+class PerfilMiddleware:
+    """
+    Grava o perfil de amostragem (meuapp/perfilador.py) dos requests que
+    passam de PERFIL_LIMITE_MS, com a rota, o perfil do usuário e o total de
+    consultas. Desligado com PERFIL_LIMITE_MS=0 (padrão).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.limite = getattr(settings, 'PERFIL_LIMITE_MS', 0) / 1000
+        if self.limite <= 0:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        contador, token = self._contador()
+        perfil = perfilador.iniciar(perfilador.Perfil(threads=[threading.get_ident()]))
+        try:
+            response = self.get_response(request)
+        finally:
+            duracao = perfilador.encerrar(perfil)
+            if token is not None:
+                metricas.consultas_requisicao.reset(token)
+        if duracao >= self.limite:
+            self._gravar(request, response, perfil, duracao, contador[0])
+        return response
+
+    async def __acall__(self, request):
+        contador, token = self._contador()
+        perfil = perfilador.iniciar(
+            perfilador.Perfil(loop=asyncio.get_running_loop(), tarefa=asyncio.current_task())
+        )
+        try:
+            # A thread do sync_to_async deste request (a mesma em todo ele):
+            # middlewares e views síncronas e o ORM das views async
+            await sync_to_async(perfil.adicionar_thread)()
+            response = await self.get_response(request)
+        finally:
+            duracao = perfilador.encerrar(perfil)
+            if token is not None:
+                metricas.consultas_requisicao.reset(token)
+        if duracao >= self.limite:
+            await sync_to_async(self._gravar)(request, response, perfil, duracao, contador[0])
+        return response
+
+    @staticmethod
+    def _contador():
+        """Contador de consultas do MetricasMiddleware ou um próprio"""
+        contador = metricas.consultas_requisicao.get()
+        if contador is not None:
+            return contador, None
+        contador = [0]
+        return contador, metricas.consultas_requisicao.set(contador)
+
+    @staticmethod
+    def _papel(request):
+        # Só se a view já carregou o usuário: carregar aqui seria uma consulta
+        # a mais (e, sob ASGI, no event loop)
+        user = getattr(request, 'user', None)
+        if user is None or getattr(user, '_wrapped', None) is empty:
+            return '-'
+        return getattr(user, 'tipo', None) if user.is_authenticated else 'anonimo'
+
+    def _gravar(self, request, response, perfil, duracao, consultas):
+        match = request.resolver_match
+        try:
+            caminho = perfilador.gravar(
+                perfil, duracao,
+                view=match.view_name if match else 'sem_rota',
+                metodo=request.method,
+                caminho=request.path,
+                status=response.status_code,
+                papel=self._papel(request),
+                consultas=consultas,
+            )
+        except Exception:
+            # O perfil é diagnóstico: uma falha ao gravá-lo nunca vira um erro 500
+            logger.exception('Não foi possível gravar o perfil de %s %s', request.method, request.path)
+            return
+        logger.warning(
+            'Request lento: %s %s em %.0f ms, %d consultas (perfil em %s)',
+            request.method, request.path, duracao * 1000, consultas, caminho,
+        )
+
+
+class SessionRefreshMiddleware:
+    """
+    Renova a expiração das sessões autenticadas sem gravar a cada request.
+
+    Com SESSION_SAVE_EVERY_REQUEST desligado, uma sessão só é gravada quando
+    muda, e portanto expiraria SESSION_COOKIE_AGE após o login mesmo para quem
+    usa o sistema todo dia. Este middleware marca a sessão como alterada no
+    máximo uma vez a cada SESSION_REFRESH_INTERVAL segundos, o que basta para
+    estender a expiração; nos demais requests nada é escrito no banco.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    CHAVE = '_renovada_em'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.intervalo = getattr(settings, 'SESSION_REFRESH_INTERVAL', 0)
+
+        # Sob ASGI a cadeia de middlewares só continua assíncrona (até as views
+        # async def) se todos eles aceitarem o modo assíncrono
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._renovar(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.intervalo:
+            # Pode avaliar request.user (consulta ao banco): fora do event loop
+            await sync_to_async(self._renovar)(request)
+        return response
+
+    def _renovar(self, request):
+        session = getattr(request, 'session', None)
+        user = getattr(request, 'user', None)
+        if self.intervalo and session is not None and user is not None and user.is_authenticated:
+            agora = int(time.time())
+            if agora - session.get(self.CHAVE, 0) >= self.intervalo:
+                session[self.CHAVE] = agora
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Serve os arquivos de STATIC_ROOT no próprio processo (WSGI ou ASGI).
+
+    Escolhe a variante .br ou .gz gerada no collectstatic
+    (meuapp.storage.CompressedManifestStaticFilesStorage) conforme o
+    Accept-Encoding do navegador. Arquivos com hash no nome nunca mudam e são
+    enviados com Cache-Control immutable de um ano, então recarregar a página
+    não gera nenhum request para eles; os demais têm cache curto e respondem
+    304 quando não foram alterados (If-None-Match com a ETag de cada variante
+    ou If-Modified-Since). Deve ficar logo após o SecurityMiddleware
+    para que sessão e autenticação não sejam carregadas à toa.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # Em ordem de preferência
+    CODIFICACOES = (('br', '.br'), ('gzip', '.gz'))
+    CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+    # Bytes lidos por vez ao enviar um arquivo sob ASGI
+    BLOCO = 64 * 1024
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'STATIC_SERVE', False) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.prefixo = settings.STATIC_URL
+        self.raiz = str(settings.STATIC_ROOT)
+        self.max_age = getattr(settings, 'STATIC_MAX_AGE', 60)
+        # Nomes com hash listados no manifest gerado pelo collectstatic
+        self.versionados = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        response = None
+        if self._estatico(request):
+            # Sob ASGI a cadeia pode rodar em modo síncrono (em uma thread)
+            response = self._servir(request, asgi=isinstance(request, ASGIRequest))
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = None
+        # Só os caminhos de STATIC_URL vão para uma thread (o disco é consultado ali)
+        if self._estatico(request):
+            response = await sync_to_async(self._servir, thread_sensitive=False)(request, asgi=True)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def _estatico(self, request):
+        return request.method in ('GET', 'HEAD') and request.path.startswith(self.prefixo)
+
+    def _servir(self, request, asgi=False):
+        """
+        Retorna a resposta do arquivo estático ou None se não houver arquivo.
+        Com asgi=True o arquivo é enviado em blocos lidos por um iterador
+        assíncrono, em vez de iterado de forma síncrona pelo servidor ASGI
+        (que o leria inteiro para a memória).
+        """
+        nome = request.path[len(self.prefixo):]
+        try:
+            caminho = safe_join(self.raiz, nome)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(caminho):
+            return None
+
+        variantes = [
+            (codificacao, caminho + sufixo)
+            for codificacao, sufixo in self.CODIFICACOES
+            if os.path.isfile(caminho + sufixo)
+        ]
+        aceitas = self._codificacoes_aceitas(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        codificacao, arquivo = next(
+            ((cod, arq) for cod, arq in variantes if cod in aceitas), (None, caminho)
+        )
+
+        estado = os.stat(arquivo)
+        # Da variante enviada: .br, .gz e o original têm ETags diferentes
+        etag = '"%x-%x"' % (int(estado.st_mtime), estado.st_size)
+        cabecalhos = {
+            'ETag': etag,
+            'Last-Modified': http_date(estado.st_mtime),
+            'Cache-Control': (
+                self.CACHE_IMUTAVEL if nome in self.versionados
+                else 'public, max-age=%d' % self.max_age
+            ),
+        }
+        if variantes:
+            cabecalhos['Vary'] = 'Accept-Encoding'
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # Tem precedência sobre o If-Modified-Since (RFC 9110)
+            etags = parse_etags(if_none_match)
+            nao_modificado = '*' in etags or etag in etags or 'W/' + etag in etags
+        else:
+            nao_modificado = not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), estado.st_mtime)
+        if nao_modificado:
+            response = HttpResponseNotModified()
+        else:
+            content_type, _ = mimetypes.guess_type(caminho)
+            content_type = content_type or 'application/octet-stream'
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=content_type)
+            elif asgi:
+                response = StreamingHttpResponse(self._ler_em_blocos(arquivo), content_type=content_type)
+            else:
+                response = FileResponse(open(arquivo, 'rb'), content_type=content_type)
+                response.headers.pop('Content-Disposition', None)
+            response['Content-Length'] = estado.st_size
+            if codificacao:
+                response['Content-Encoding'] = codificacao
+
+        for cabecalho, valor in cabecalhos.items():
+            response[cabecalho] = valor
+        return response
+
+    async def _ler_em_blocos(self, arquivo):
+        abrir = sync_to_async(open, thread_sensitive=False)
+        with await abrir(arquivo, 'rb') as f:
+            while True:
+                bloco = await sync_to_async(f.read, thread_sensitive=False)(self.BLOCO)
+                if not bloco:
+                    break
+                yield bloco
+
+    @staticmethod
+    def _codificacoes_aceitas(cabecalho):
+        """Codificações do Accept-Encoding que não foram recusadas com q=0"""
+        aceitas = set()
+        for item in cabecalho.split(','):
+            codificacao, _, parametros = item.strip().partition(';')
+            qualidade = parametros.strip()
+            if qualidade.startswith('q='):
+                try:
+                    if float(qualidade[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            if codificacao:
+                aceitas.add(codificacao.strip().lower())
+        return aceitas
+
+
+class RepeatedQueryMiddleware:
+    """
+    Detector de N+1 para desenvolvimento e homologação (meuapp/consultas.py).
+
+    Conta as consultas de cada request por forma e, quando alguma se repete
+    mais de CONSULTAS_REPETIDAS_LIMITE vezes, registra um aviso com a view, o
+    template e a linha que a disparou. Com CONSULTAS_REPETIDAS_ERRO o request
+    falha com ConsultasRepetidas (nos testes, o client relança a exceção).
+    Ativado por CONSULTAS_REPETIDAS_DETECTAR; em produção não é instalado.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'CONSULTAS_REPETIDAS_DETECTAR', False):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.limite = settings.CONSULTAS_REPETIDAS_LIMITE
+        self.erro = getattr(settings, 'CONSULTAS_REPETIDAS_ERRO', False)
+
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        with InspetorConsultas(self.limite) as inspetor:
+            response = self.get_response(request)
+        self._relatar(request, response, inspetor)
+        return response
+
+    async def __acall__(self, request):
+        # O inspetor fica no contexto deste request: a thread do sync_to_async
+        # (e suas conexões) é dividida com os outros requests em andamento
+        with InspetorConsultas(self.limite) as inspetor:
+            response = await self.get_response(request)
+        self._relatar(request, response, inspetor)
+        return response
+
+    def _relatar(self, request, response, inspetor):
+        response['X-Consultas'] = inspetor.total
+        repeticoes = inspetor.repetidas()
+        if not repeticoes:
+            return
+        if self.erro:
+            raise ConsultasRepetidas(repeticoes, self.limite)
+        match = request.resolver_match
+        view = match.view_name if match else '-'
+        logger.warning(
+            'Possível N+1 em %s %s (view %s): %s',
+            request.method, request.path, view, formatar_repeticoes(repeticoes, self.limite)
+        )
+
+
+class ReadReplicaMiddleware:
+    """
+    Delimita cada request para o meuapp.routers.ReadWriteRouter: leituras de
+    GET/HEAD vão para a réplica, a menos que a sessão tenha escrito há pouco
+    (cookie REPLICA_COOKIE, gravado por DATABASE_REPLICA_PIN segundos após
+    qualquer escrita). Só é instalado com DATABASE_REPLICA_ALIAS configurado.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not routers.replica_configurada():
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.fixar_por = getattr(settings, 'DATABASE_REPLICA_PIN', 5)
+
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        self._iniciar(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            escreveu = routers.encerrar_request()
+        return self._fixar(request, response, escreveu)
+
+    async def __acall__(self, request):
+        self._iniciar(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            escreveu = routers.encerrar_request()
+        return self._fixar(request, response, escreveu)
+
+    def _iniciar(self, request):
+        routers.iniciar_request(
+            request.method in routers.METODOS_LEITURA
+            and routers.REPLICA_COOKIE not in request.COOKIES
+        )
+
+    def _fixar(self, request, response, escreveu):
+        if escreveu or request.method not in routers.METODOS_LEITURA:
+            response.set_cookie(
+                routers.REPLICA_COOKIE, '1', max_age=self.fixar_por, httponly=True,
+                samesite='Lax', secure=request.is_secure(),
+            )
+        return response
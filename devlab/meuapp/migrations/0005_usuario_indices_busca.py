@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0004_remove_usuario_curso_usuario_funcao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['first_name', 'last_name'], name='usuario_nome_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['last_name'], name='usuario_sobrenome_idx'),
+        ),
+    ]
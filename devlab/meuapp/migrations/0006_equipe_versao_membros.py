@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0005_usuario_indices_busca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipe',
+            name='versao_membros',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Índices de trigrama (pg_trgm) para as buscas com icontains/istartswith.
+# Só existem no PostgreSQL; no SQLite esta migração não faz nada.
+
+from django.db import migrations
+
+
+# tabela -> colunas usadas nas buscas das views e do autocomplete
+CAMPOS_BUSCA = {
+    'meuapp_projeto': ['titulo', 'cliente', 'descricao'],
+    'meuapp_equipe': ['nome'],
+    'meuapp_usuario': ['username', 'first_name', 'last_name', 'email', 'matricula'],
+    'meuapp_solicitacaocadastro': ['nome_completo', 'email', 'matricula'],
+}
+
+
+def _indices():
+    for tabela, colunas in CAMPOS_BUSCA.items():
+        for coluna in colunas:
+            yield tabela, coluna, f'{tabela}_{coluna}_trgm'
+
+
+def criar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for tabela, coluna, nome in _indices():
+        # Mesma expressão gerada pelo Django para icontains/istartswith no
+        # PostgreSQL (UPPER("coluna"::text) LIKE UPPER(...)), senão o índice
+        # não é usado
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{nome}" ON "{tabela}" '
+            f'USING gin (UPPER("{coluna}"::text) gin_trgm_ops)'
+        )
+
+
+def remover_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, _, nome in _indices():
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{nome}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0006_equipe_versao_membros'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
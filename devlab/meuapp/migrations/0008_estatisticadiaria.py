@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0007_indices_trigrama_postgres'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True)),
+                ('projetos_planejados', models.PositiveIntegerField(null=True)),
+                ('projetos_andamento', models.PositiveIntegerField(null=True)),
+                ('projetos_concluidos', models.PositiveIntegerField(null=True)),
+                ('equipes_ativas', models.PositiveIntegerField(help_text='Equipes vinculadas a projetos em andamento', null=True)),
+                ('novos_coordenadores', models.PositiveIntegerField(default=0)),
+                ('novos_professores', models.PositiveIntegerField(default=0)),
+                ('novos_estudantes', models.PositiveIntegerField(default=0)),
+                ('solicitacoes_aprovadas', models.PositiveIntegerField(default=0)),
+                ('latencia_aprovacao', models.DurationField(blank=True, help_text='Tempo médio entre a solicitação e a aprovação das aprovadas no dia', null=True)),
+                ('gerada_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estatística Diária',
+                'verbose_name_plural': 'Estatísticas Diárias',
+                'ordering': ['data'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0008_estatisticadiaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarefaAgendada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, unique=True)),
+                ('dono', models.CharField(blank=True, help_text='Processo com o lease (host:pid:id)', max_length=200)),
+                ('lease_ate', models.DateTimeField(blank=True, null=True)),
+                ('proxima_execucao', models.DateTimeField(blank=True, help_text='Vazia: assim que possível', null=True)),
+                ('cursor', models.CharField(blank=True, help_text='Progresso da execução em andamento', max_length=200)),
+                ('ultimo_inicio', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_fim', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_status', models.CharField(blank=True, choices=[('ok', 'Concluída'), ('incompleta', 'Incompleta (continua na próxima rodada)'), ('erro', 'Erro')], max_length=20)),
+                ('ultimos_processados', models.PositiveIntegerField(default=0)),
+                ('ultimo_erro', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Tarefa Agendada',
+                'verbose_name_plural': 'Tarefas Agendadas',
+                'ordering': ['nome'],
+            },
+        ),
+    ]
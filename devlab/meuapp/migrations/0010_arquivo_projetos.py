@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0009_tarefaagendada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjetoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(help_text='O mesmo do projeto original', primary_key=True, serialize=False)),
+                ('titulo', models.CharField(max_length=200)),
+                ('descricao', models.TextField()),
+                ('cliente', models.CharField(max_length=200)),
+                ('data_inicio', models.DateField()),
+                ('data_fim_prevista', models.DateField()),
+                ('criado_em', models.DateTimeField()),
+                ('atualizado_em', models.DateTimeField()),
+                ('arquivado_em', models.DateTimeField(auto_now_add=True)),
+                ('busca', models.TextField(blank=True, editable=False)),
+            ],
+            options={
+                'verbose_name': 'Projeto Arquivado',
+                'verbose_name_plural': 'Projetos Arquivados',
+                'ordering': ['-data_fim_prevista', 'titulo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EquipeArquivada',
+            fields=[
+                ('id', models.BigIntegerField(help_text='O mesmo da equipe original', primary_key=True, serialize=False)),
+                ('nome', models.CharField(max_length=100)),
+                ('descricao', models.TextField(blank=True)),
+                ('criada_em', models.DateTimeField()),
+                ('lider', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='equipes_arquivadas_lideradas', to=settings.AUTH_USER_MODEL)),
+                ('membros', models.ManyToManyField(blank=True, related_name='equipes_arquivadas', to=settings.AUTH_USER_MODEL)),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='equipes', to='meuapp.projetoarquivado')),
+            ],
+            options={
+                'verbose_name': 'Equipe Arquivada',
+                'verbose_name_plural': 'Equipes Arquivadas',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipacaoArquivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_entrada', models.DateField()),
+                ('papel', models.CharField(blank=True, max_length=100)),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participacoes', to='meuapp.projetoarquivado')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participacoes_arquivadas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Participação Arquivada',
+                'verbose_name_plural': 'Participações Arquivadas',
+                'unique_together': {('usuario', 'projeto')},
+            },
+        ),
+    ]
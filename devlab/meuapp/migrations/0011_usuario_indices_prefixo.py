@@ -0,0 +1,63 @@
+# Índices da busca por prefixo do autocomplete de usuários
+# (istartswith/startswith em first_name, last_name, username e matricula).
+#
+# Os índices btree comuns da 0005 não eram usados: no SQLite o LIKE só usa
+# índices com COLLATE NOCASE (o LIKE não diferencia maiúsculas), e no
+# PostgreSQL o Django gera UPPER("coluna"::text) LIKE UPPER(...), que só usa
+# um índice na mesma expressão com text_pattern_ops. Os índices de trigrama da
+# 0007 também atendem o PostgreSQL, mas não com prefixos de 1 ou 2 letras.
+
+from django.db import migrations
+
+
+# coluna -> a consulta compara em maiúsculas (istartswith)?
+CAMPOS_PREFIXO = {
+    'first_name': True,
+    'last_name': True,
+    'username': True,
+    'matricula': False,
+}
+
+
+def _sql_indice(vendor, coluna, maiusculas):
+    nome = f'meuapp_usuario_{coluna}_prefixo'
+    if vendor == 'sqlite':
+        return nome, f'CREATE INDEX IF NOT EXISTS "{nome}" ON "meuapp_usuario" ("{coluna}" COLLATE NOCASE)'
+    expressao = f'(UPPER("{coluna}"::text))' if maiusculas else f'("{coluna}"::text)'
+    return nome, f'CREATE INDEX IF NOT EXISTS "{nome}" ON "meuapp_usuario" ({expressao} text_pattern_ops)'
+
+
+def criar_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    for coluna, maiusculas in CAMPOS_PREFIXO.items():
+        schema_editor.execute(_sql_indice(vendor, coluna, maiusculas)[1])
+
+
+def remover_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    for coluna, maiusculas in CAMPOS_PREFIXO.items():
+        nome, _ = _sql_indice(vendor, coluna, maiusculas)
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{nome}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0010_arquivo_projetos'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usuario',
+            name='usuario_nome_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usuario',
+            name='usuario_sobrenome_idx',
+        ),
+        migrations.RunPython(criar_indices, remover_indices),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meuapp', '0011_usuario_indices_prefixo'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='projetoarquivado',
+            options={'ordering': ['-data_fim_prevista', 'titulo', 'pk'], 'verbose_name': 'Projeto Arquivado', 'verbose_name_plural': 'Projetos Arquivados'},
+        ),
+    ]
@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, ExpressionWrapper, F, Q
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 import random
 import string
 
@@ -21,7 +24,10 @@ class Usuario(AbstractUser):
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
-    
+        # Os índices da busca por prefixo do autocomplete dependem do banco
+        # (COLLATE NOCASE no SQLite, UPPER(...) text_pattern_ops no
+        # PostgreSQL) e são criados pela migração 0011
+
     def __str__(self):
         return f"{self.get_full_name() or self.username} ({self.get_tipo_display()})"
 
@@ -54,6 +60,9 @@ class Projeto(models.Model):
     
     def total_participantes(self):
         # Return distinct count of users that are members of equipes linked to this projeto
+        # (usa a contagem anotada pela consulta, quando houver)
+        if hasattr(self, '_total_participantes'):
+            return self._total_participantes
         return self.membros_por_equipes().count()
 
     def membros_por_equipes(self):
@@ -65,7 +74,15 @@ class Projeto(models.Model):
         """
         return Usuario.objects.filter(equipes_participando__projeto=self).distinct()
     
+    def descricao_resumo(self):
+        """Início da descrição, para truncatewords (anotado pelas listas, que não carregam o texto inteiro)"""
+        if hasattr(self, '_descricao_resumo'):
+            return self._descricao_resumo
+        return self.descricao
+
     def total_equipes(self):
+        if hasattr(self, '_total_equipes'):
+            return self._total_equipes
         return self.equipes.count()
 
 
@@ -100,6 +117,8 @@ class Equipe(models.Model):
         help_text="Líder da equipe (cada usuário pode liderar no máximo uma equipe)"
     )
     membros = models.ManyToManyField(Usuario, related_name='equipes_participando', blank=True)
+    # Incrementada a cada alteração de membros; usada como ETag (If-Match)
+    versao_membros = models.PositiveIntegerField(default=0, editable=False)
     criada_em = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -119,8 +138,80 @@ class Equipe(models.Model):
         # sendo aplicadas em nível de formulário quando apropriado.
     
     def total_membros(self):
+        if hasattr(self, '_total_membros'):
+            return self._total_membros
         return self.membros.count()
 
+    def atualizar_membros(self, adicionar=(), remover=(), versao=None):
+        """Aplica alterações de membros como diferença de conjuntos.
+
+        Em vez de substituir a lista inteira (``membros.set()``), insere apenas
+        quem ainda não é membro (um único bulk insert) e remove apenas quem é
+        (um único DELETE). Se ``versao`` for informada, a alteração só é aplicada
+        se ainda corresponder a ``versao_membros`` (controle otimista, If-Match);
+        caso contrário levanta ConflitoVersaoMembros.
+
+        Dispara o sinal ``membros_alterados`` uma única vez com o resultado.
+        Retorna a tupla (adicionados, removidos).
+        """
+        from .signals import membros_alterados
+
+        Membro = Equipe.membros.through
+        adicionar = {int(pk) for pk in adicionar}
+        remover = {int(pk) for pk in remover}
+        if adicionar & remover:
+            raise ValueError('Um usuário não pode ser adicionado e removido ao mesmo tempo.')
+
+        with transaction.atomic():
+            existentes = set(
+                Membro.objects.filter(
+                    equipe_id=self.pk, usuario_id__in=adicionar | remover
+                ).values_list('usuario_id', flat=True)
+            )
+            adicionados = adicionar - existentes
+            removidos = remover & existentes
+
+            equipes = Equipe.objects.filter(pk=self.pk)
+            if versao is not None:
+                equipes = equipes.filter(versao_membros=versao)
+            if adicionados or removidos:
+                atualizou = equipes.update(versao_membros=F('versao_membros') + 1)
+            else:
+                atualizou = equipes.exists()
+            if not atualizou:
+                raise ConflitoVersaoMembros(self.pk, versao)
+
+            if adicionados:
+                Membro.objects.bulk_create(
+                    [Membro(equipe_id=self.pk, usuario_id=pk) for pk in adicionados],
+                    ignore_conflicts=True,
+                )
+            if removidos:
+                Membro.objects.filter(equipe_id=self.pk, usuario_id__in=removidos).delete()
+            if versao is not None and (adicionados or removidos):
+                self.versao_membros = versao + 1
+            elif adicionados or removidos:
+                self.versao_membros = Equipe.objects.values_list(
+                    'versao_membros', flat=True
+                ).get(pk=self.pk)
+
+        if adicionados or removidos:
+            membros_alterados.send(
+                sender=Equipe, equipe=self, adicionados=adicionados, removidos=removidos
+            )
+        return adicionados, removidos
+
+
+class ConflitoVersaoMembros(Exception):
+    """A lista de membros foi alterada por outra pessoa desde a versão informada"""
+
+    def __init__(self, equipe_id, versao):
+        self.equipe_id = equipe_id
+        self.versao = versao
+        super().__init__(
+            f'A equipe {equipe_id} foi alterada desde a versão {versao}.'
+        )
+
 
 class SolicitacaoCadastro(models.Model):
     """Modelo para solicitações de cadastro de novos usuários"""
@@ -162,4 +253,197 @@ class SolicitacaoCadastro(models.Model):
         while True:
             matricula = ''.join(random.choices(string.digits, k=8))
             if not SolicitacaoCadastro.objects.filter(matricula=matricula).exists():
-                return matricula
\ No newline at end of file
+                return matricula
+
+
+class EstatisticaDiaria(models.Model):
+    """Fotografia diária dos indicadores do sistema, para os gráficos de tendência.
+
+    Gerada por ``manage.py snapshot_stats`` (uma linha por dia; rodar de novo
+    no mesmo dia atualiza a linha). Os gráficos leem só desta tabela, sem
+    recalcular o histórico a partir das tabelas de origem.
+
+    Os totais por status de projeto e as equipes ativas são o estado no
+    momento da geração e só podem ser obtidos para o dia corrente; os
+    demais campos (cadastros e aprovações do dia) são recalculáveis para
+    qualquer data.
+    """
+    data = models.DateField(unique=True)
+
+    # Estado no momento da geração (nulos em dias recalculados depois)
+    projetos_planejados = models.PositiveIntegerField(null=True)
+    projetos_andamento = models.PositiveIntegerField(null=True)
+    projetos_concluidos = models.PositiveIntegerField(null=True)
+    equipes_ativas = models.PositiveIntegerField(
+        null=True, help_text="Equipes vinculadas a projetos em andamento"
+    )
+
+    # Movimento do dia
+    novos_coordenadores = models.PositiveIntegerField(default=0)
+    novos_professores = models.PositiveIntegerField(default=0)
+    novos_estudantes = models.PositiveIntegerField(default=0)
+    solicitacoes_aprovadas = models.PositiveIntegerField(default=0)
+    latencia_aprovacao = models.DurationField(
+        null=True, blank=True,
+        help_text="Tempo médio entre a solicitação e a aprovação das aprovadas no dia"
+    )
+
+    gerada_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estatística Diária'
+        verbose_name_plural = 'Estatísticas Diárias'
+        ordering = ['data']
+
+    def __str__(self):
+        return f"Estatísticas de {self.data:%d/%m/%Y}"
+
+    @classmethod
+    def gerar(cls, data=None):
+        """Calcula e grava (ou atualiza) a linha do dia; uma agregação por tabela.
+
+        Sem ``data``, usa o dia corrente no fuso do projeto. Para dias
+        anteriores, mantém os campos de estado já gravados.
+        """
+        hoje = timezone.localdate()
+        data = data or hoje
+        inicio = timezone.make_aware(datetime.combine(data, time.min))
+        fim = timezone.make_aware(datetime.combine(data + timedelta(days=1), time.min))
+
+        valores = Usuario.objects.filter(date_joined__gte=inicio, date_joined__lt=fim).aggregate(
+            novos_coordenadores=Count('pk', filter=Q(tipo='coordenador')),
+            novos_professores=Count('pk', filter=Q(tipo='professor')),
+            novos_estudantes=Count('pk', filter=Q(tipo='estudante')),
+        )
+        valores.update(SolicitacaoCadastro.objects.filter(
+            status='aprovada', data_aprovacao__gte=inicio, data_aprovacao__lt=fim,
+        ).aggregate(
+            solicitacoes_aprovadas=Count('pk'),
+            latencia_aprovacao=Avg(ExpressionWrapper(
+                F('data_aprovacao') - F('data_solicitacao'), output_field=models.DurationField()
+            )),
+        ))
+
+        if data == hoje:
+            valores.update(Projeto.objects.aggregate(
+                projetos_planejados=Count('pk', filter=Q(status='planejado')),
+                projetos_andamento=Count('pk', filter=Q(status='andamento')),
+                projetos_concluidos=Count('pk', filter=Q(status='concluido')),
+            ))
+            # Os concluídos movidos para o arquivo continuam contando
+            valores['projetos_concluidos'] += ProjetoArquivado.objects.count()
+            valores['equipes_ativas'] = Equipe.objects.filter(projeto__status='andamento').count()
+
+        estatistica, _ = cls.objects.update_or_create(data=data, defaults=valores)
+        return estatistica
+
+
+class TarefaAgendada(models.Model):
+    """Estado e lease de uma tarefa periódica de ``manage.py run_scheduler``.
+
+    Uma linha por tarefa (meuapp/tarefas.py). Só o processo que gravou
+    ``dono`` com ``lease_ate`` no futuro executa a tarefa; o lease é tomado
+    com um UPDATE condicional e renovado a cada lote, então dois agendadores
+    na mesma máquina (ou um reinício no meio da execução) nunca rodam a
+    mesma tarefa ao mesmo tempo. ``cursor`` guarda o progresso entre os
+    lotes: uma execução interrompida continua de onde parou.
+    """
+    STATUS_CHOICES = [
+        ('ok', 'Concluída'),
+        ('incompleta', 'Incompleta (continua na próxima rodada)'),
+        ('erro', 'Erro'),
+    ]
+
+    nome = models.CharField(max_length=100, unique=True)
+    dono = models.CharField(max_length=200, blank=True, help_text="Processo com o lease (host:pid:id)")
+    lease_ate = models.DateTimeField(null=True, blank=True)
+    proxima_execucao = models.DateTimeField(null=True, blank=True, help_text="Vazia: assim que possível")
+    cursor = models.CharField(max_length=200, blank=True, help_text="Progresso da execução em andamento")
+
+    ultimo_inicio = models.DateTimeField(null=True, blank=True)
+    ultimo_fim = models.DateTimeField(null=True, blank=True)
+    ultimo_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
+    ultimos_processados = models.PositiveIntegerField(default=0)
+    ultimo_erro = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Tarefa Agendada'
+        verbose_name_plural = 'Tarefas Agendadas'
+        ordering = ['nome']
+
+    def __str__(self):
+        return self.nome
+
+
+# ============================================================
+# ARQUIVO DE PROJETOS CONCLUÍDOS
+# ============================================================
+# Projetos concluídos há mais de ARQUIVO_MESES meses saem de Projeto, Equipe
+# e ParticipacaoProjeto (manage.py arquivar_projetos; ver meuapp/arquivo.py)
+# e ficam nestas tabelas, só para consulta em /arquivo/ ou restauração. As
+# linhas mantêm o pk original, então a restauração recria os mesmos links.
+
+class ProjetoArquivado(models.Model):
+    """Projeto concluído fora das tabelas de trabalho"""
+    id = models.BigIntegerField(primary_key=True, help_text="O mesmo do projeto original")
+    titulo = models.CharField(max_length=200)
+    descricao = models.TextField()
+    cliente = models.CharField(max_length=200)
+    data_inicio = models.DateField()
+    data_fim_prevista = models.DateField()
+    criado_em = models.DateTimeField()
+    atualizado_em = models.DateTimeField()
+    arquivado_em = models.DateTimeField(auto_now_add=True)
+    # Título, cliente, equipes e nomes dos participantes, em minúsculas: a
+    # busca do arquivo procura só nesta coluna
+    busca = models.TextField(blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Projeto Arquivado'
+        verbose_name_plural = 'Projetos Arquivados'
+        # pk desempata: /arquivo/ pagina por OFFSET
+        ordering = ['-data_fim_prevista', 'titulo', 'pk']
+
+    def __str__(self):
+        return self.titulo
+
+    def get_status_display(self):
+        # Só projetos concluídos são arquivados
+        return dict(Projeto.STATUS_CHOICES)['concluido']
+
+
+class EquipeArquivada(models.Model):
+    """Equipe de um projeto arquivado, com o líder e os membros da época"""
+    id = models.BigIntegerField(primary_key=True, help_text="O mesmo da equipe original")
+    projeto = models.ForeignKey(ProjetoArquivado, on_delete=models.CASCADE, related_name='equipes')
+    nome = models.CharField(max_length=100)
+    descricao = models.TextField(blank=True)
+    lider = models.ForeignKey(
+        Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='equipes_arquivadas_lideradas'
+    )
+    membros = models.ManyToManyField(Usuario, related_name='equipes_arquivadas', blank=True)
+    criada_em = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Equipe Arquivada'
+        verbose_name_plural = 'Equipes Arquivadas'
+        ordering = ['nome']
+
+    def __str__(self):
+        return f"{self.nome} - {self.projeto.titulo}"
+
+
+class ParticipacaoArquivada(models.Model):
+    """Participação direta em um projeto arquivado"""
+    projeto = models.ForeignKey(ProjetoArquivado, on_delete=models.CASCADE, related_name='participacoes')
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='participacoes_arquivadas')
+    data_entrada = models.DateField()
+    papel = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        verbose_name = 'Participação Arquivada'
+        verbose_name_plural = 'Participações Arquivadas'
+        unique_together = ['usuario', 'projeto']
+
+    def __str__(self):
+        return f"{self.usuario.username} em {self.projeto.titulo}"
@@ -0,0 +1,260 @@
+"""
+Perfilador por amostragem dos requests lentos do DevLab Projects
+Arquivo: meuapp/perfilador.py
+
+Enquanto um request está em andamento, uma thread de amostragem lê a pilha
+de chamadas das threads dele (sys._current_frames) a cada
+PERFIL_INTERVALO_MS milissegundos e conta quantas vezes cada pilha
+apareceu. Nada é instrumentado: o custo fica na thread de amostragem e não
+depende do número de chamadas de função. Se o request passar de
+PERFIL_LIMITE_MS, as pilhas são gravadas em PERFIL_DIR no formato "folded"
+(uma pilha por linha, "raiz;...;folha contagem"), que flamegraph.pl,
+speedscope e inferno leem direto, junto com um .json com a rota, o perfil
+do usuário e o total de consultas. O comando perfis_lentos resume os
+arquivos.
+
+Threads de um request (PerfilMiddleware):
+
+- WSGI, ou a cadeia síncrona: a thread do próprio request;
+- ASGI: a thread do sync_to_async do request (o Django cria uma por
+  request; é nela que rodam as views síncronas e o ORM das views async) e a
+  thread do event loop, mas só enquanto a tarefa do request é a tarefa
+  corrente. Tarefas filhas (asyncio.gather) não são atribuídas a nenhum
+  request, a menos que ele seja o único em andamento naquele loop.
+"""
+
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import thread as _futures_thread
+from datetime import datetime
+
+from django.conf import settings
+
+
+# ============================================================
+# AMOSTRAGEM
+# ============================================================
+
+class Perfil:
+    """Pilhas amostradas de um request em andamento"""
+
+    def __init__(self, threads=(), loop=None, tarefa=None):
+        self.inicio = time.perf_counter()
+        self.threads = set(threads)
+        # Sob ASGI: o event loop, a thread dele e a tarefa do request
+        self.loop = loop
+        self.thread_loop = threading.get_ident() if loop is not None else None
+        self.tarefa = tarefa
+        # tupla de code objects (raiz primeiro) -> amostras
+        self.pilhas = Counter()
+
+    @property
+    def total_amostras(self):
+        return sum(self.pilhas.values())
+
+    def adicionar_thread(self, ident=None):
+        with _condicao:
+            self.threads.add(ident or threading.get_ident())
+
+
+# Laço da thread do sync_to_async esperando trabalho: o request está no event loop
+_OCIOSO = _futures_thread._worker.__code__
+
+_condicao = threading.Condition()
+_ativos = []
+_thread = None
+
+
+def iniciar(perfil):
+    """Passa a amostrar ``perfil``; a thread de amostragem sobe na primeira vez"""
+    global _thread
+    with _condicao:
+        _ativos.append(perfil)
+        # is_alive(): após um fork (gunicorn --preload) a thread não existe mais
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_amostrar, name='perfilador', daemon=True)
+            _thread.start()
+        _condicao.notify()
+    return perfil
+
+
+def encerrar(perfil):
+    """Para de amostrar ``perfil``; retorna a duração em segundos"""
+    with _condicao:
+        _ativos.remove(perfil)
+    return time.perf_counter() - perfil.inicio
+
+
+def _amostrar():
+    intervalo = getattr(settings, 'PERFIL_INTERVALO_MS', 5) / 1000
+    while True:
+        with _condicao:
+            while not _ativos:
+                _condicao.wait()
+        time.sleep(intervalo)
+        quadros = sys._current_frames()
+        with _condicao:
+            _registrar_amostras(_ativos, quadros)
+
+
+def _registrar_amostras(perfis, quadros):
+    loops = {}
+    for perfil in perfis:
+        for ident in perfil.threads:
+            quadro = quadros.get(ident)
+            if quadro is not None and quadro.f_code is not _OCIOSO:
+                perfil.pilhas[_pilha(quadro)] += 1
+        if perfil.loop is not None:
+            loops.setdefault(perfil.loop, []).append(perfil)
+
+    for loop, grupo in loops.items():
+        corrente = asyncio.current_task(loop)
+        if corrente is None:
+            # Loop ocioso (esperando E/S ou o sync_to_async)
+            continue
+        donos = [perfil for perfil in grupo if perfil.tarefa is corrente]
+        if not donos and len(grupo) == 1:
+            donos = grupo
+        for perfil in donos:
+            quadro = quadros.get(perfil.thread_loop)
+            if quadro is not None:
+                perfil.pilhas[_pilha(quadro)] += 1
+
+
+def _pilha(quadro):
+    codigos = []
+    while quadro is not None:
+        codigos.append(quadro.f_code)
+        quadro = quadro.f_back
+    codigos.reverse()
+    return tuple(codigos)
+
+
+# ============================================================
+# GRAVAÇÃO
+# ============================================================
+
+_nomes = {}
+_RAIZ = str(settings.BASE_DIR.parent) + os.sep
+# Bibliotecas: a partir do diretório do sys.path (site-packages/django/... -> django/...)
+_PREFIXOS = sorted({caminho + os.sep for caminho in sys.path if caminho}, key=len, reverse=True)
+# Frames do código do projeto começam com o diretório dele: "funcao (devlab/meuapp/...)"
+PREFIXO_PROJETO = os.path.basename(settings.BASE_DIR) + os.sep
+_INVALIDOS = re.compile(r'[^\w.-]+')
+
+
+def _nome(codigo):
+    """Rótulo de um frame no flame graph: funcao (arquivo:linha)"""
+    nome = _nomes.get(codigo)
+    if nome is None:
+        arquivo = codigo.co_filename
+        prefixo = next(
+            (prefixo for prefixo in [_RAIZ, *_PREFIXOS] if arquivo.startswith(prefixo)), ''
+        )
+        arquivo = arquivo[len(prefixo):]
+        # co_qualname (Classe.metodo) só existe a partir do Python 3.11
+        funcao = getattr(codigo, 'co_qualname', codigo.co_name)
+        # ";" separa os frames no formato folded
+        nome = _nomes[codigo] = f'{funcao} ({arquivo}:{codigo.co_firstlineno})'.replace(';', ',')
+    return nome
+
+
+def gravar(perfil, duracao, diretorio=None, maximo=None, **etiquetas):
+    """
+    Grava <base>.folded (as pilhas) e <base>.json (etiquetas, duração e
+    amostras) em ``diretorio``; mantém só os ``maximo`` perfis mais novos.
+    Retorna o caminho do .json.
+    """
+    diretorio = str(diretorio or settings.PERFIL_DIR)
+    maximo = maximo if maximo is not None else settings.PERFIL_MAXIMO
+    os.makedirs(diretorio, exist_ok=True)
+
+    agora = datetime.now()
+    view = etiquetas.get('view') or 'sem_rota'
+    # Ordem alfabética = ordem de gravação
+    base = f'{agora:%Y%m%d-%H%M%S-%f}-{os.getpid()}-{_INVALIDOS.sub("_", view)}'
+    folded = os.path.join(diretorio, base + '.folded')
+    with open(folded, 'w', encoding='utf-8') as arquivo:
+        for pilha, total in perfil.pilhas.most_common():
+            arquivo.write(';'.join(_nome(codigo) for codigo in pilha) + f' {total}\n')
+
+    dados = dict(
+        etiquetas,
+        view=view,
+        duracao_ms=round(duracao * 1000, 1),
+        amostras=perfil.total_amostras,
+        intervalo_ms=getattr(settings, 'PERFIL_INTERVALO_MS', 5),
+        data=agora.isoformat(timespec='seconds'),
+        pid=os.getpid(),
+        pilhas=base + '.folded',
+    )
+    caminho = os.path.join(diretorio, base + '.json')
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+
+    if maximo:
+        _limitar(diretorio, maximo)
+    return caminho
+
+
+def _limitar(diretorio, maximo):
+    perfis = sorted(nome for nome in os.listdir(diretorio) if nome.endswith('.json'))
+    for nome in perfis[:-maximo]:
+        base = os.path.join(diretorio, nome[:-len('.json')])
+        for sufixo in ('.json', '.folded'):
+            try:
+                os.remove(base + sufixo)
+            except FileNotFoundError:
+                # Outro processo já removeu
+                pass
+
+
+# ============================================================
+# LEITURA
+# ============================================================
+
+def listar(diretorio=None):
+    """Etiquetas (dicts do .json) de todos os perfis gravados, com 'arquivo'"""
+    diretorio = str(diretorio or settings.PERFIL_DIR)
+    if not os.path.isdir(diretorio):
+        return []
+    perfis = []
+    for nome in sorted(os.listdir(diretorio)):
+        if not nome.endswith('.json'):
+            continue
+        caminho = os.path.join(diretorio, nome)
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, ValueError):
+            # Removido ou ainda sendo gravado por outro processo
+            continue
+        dados['arquivo'] = caminho
+        perfis.append(dados)
+    return perfis
+
+
+def do_projeto(frame):
+    """Indica se o frame (rótulo do .folded) é do código do projeto"""
+    return f'({PREFIXO_PROJETO}' in frame
+
+
+def ler_pilhas(perfil):
+    """Counter {tupla de frames: amostras} do .folded de ``perfil`` (dict de listar())"""
+    pilhas = Counter()
+    caminho = os.path.join(os.path.dirname(perfil['arquivo']), perfil['pilhas'])
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                pilha, _, total = linha.rstrip('\n').rpartition(' ')
+                if pilha:
+                    pilhas[tuple(pilha.split(';'))] += int(total)
+    except FileNotFoundError:
+        pass
+    return pilhas
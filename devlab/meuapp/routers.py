@@ -0,0 +1,86 @@
+"""
+Roteamento de banco de dados do DevLab Projects
+Arquivo: meuapp/routers.py
+
+ReadWriteRouter envia as leituras dos requests GET/HEAD (dashboards, listas,
+visitante, API) para a réplica configurada em DATABASE_REPLICA_ALIAS; todo o
+resto (escritas, POSTs, comandos, shell) usa o banco principal.
+
+Leitura das próprias escritas: depois que um request grava no banco, o
+navegador recebe o cookie REPLICA_COOKIE (ver
+meuapp.middleware.ReadReplicaMiddleware) e, por DATABASE_REPLICA_PIN
+segundos, seus requests leem só do principal (a réplica pode ainda não ter
+recebido a alteração). Dentro de um mesmo request, a primeira escrita também
+faz as leituras seguintes irem para o principal.
+
+O estado é por request (contexto), então vale também para as views
+assíncronas e para o código chamado via sync_to_async.
+"""
+
+from asgiref.local import Local
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_COOKIE = 'devlab_primario'
+METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+_estado = Local()
+
+
+def _replica():
+    return getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+
+
+def replica_configurada():
+    return bool(_replica())
+
+
+def iniciar_request(ler_da_replica):
+    """Chamado por meuapp.middleware.ReadReplicaMiddleware no início do request"""
+    _estado.ler_da_replica = ler_da_replica
+    _estado.escreveu = False
+
+
+def encerrar_request():
+    """Fim do request; retorna se houve escrita no banco durante ele"""
+    escreveu = getattr(_estado, 'escreveu', False)
+    _estado.ler_da_replica = None
+    _estado.escreveu = False
+    return escreveu
+
+
+class ReadWriteRouter:
+    """Leituras de requests somente-leitura na réplica; o resto no principal"""
+
+    def db_for_read(self, model, **hints):
+        replica = _replica()
+        if (
+            replica
+            and getattr(_estado, 'ler_da_replica', False)
+            # Leituras dentro de uma transação (ex: select_for_update) precisam
+            # ver o mesmo banco que as escritas dela
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Daqui em diante o request (e, pelo cookie, a sessão) lê do principal
+        if getattr(_estado, 'ler_da_replica', None) is not None:
+            _estado.ler_da_replica = False
+            _estado.escreveu = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Principal e réplica têm os mesmos dados
+        bancos = {DEFAULT_DB_ALIAS, _replica()}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica recebe o esquema pela replicação (ou por sincronizar_replica)
+        if db == _replica():
+            return False
+        return None
@@ -0,0 +1,239 @@
+"""
+Sinais do DevLab Projects
+Arquivo: meuapp/signals.py
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from .backends import usuario_por_pk
+from .cache import invalidar_catalogo, invalidar_totais_solicitacoes, invalidar_usuarios
+from .colaboracao import invalidar_grafo, registrar_alteracao
+from .consultas import instalar_inspetores
+from .eventos import CANAL_SOLICITACOES, publicar
+from .metricas import incrementar, instalar_contador
+from .models import Equipe, ParticipacaoProjeto, Projeto, SolicitacaoCadastro, Usuario
+
+
+# ============================================================
+# SINAL AGREGADO DE ALTERAÇÃO DE MEMBROS
+# ============================================================
+
+# Enviado uma vez por alteração de membros de uma equipe, com os conjuntos de
+# IDs de usuários efetivamente adicionados e removidos.
+# Argumentos: sender=Equipe, equipe, adicionados, removidos
+membros_alterados = Signal()
+
+
+@receiver(m2m_changed, sender=Equipe.membros.through)
+def membros_alterados_via_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Converte alterações feitas pelo related manager (admin, ``membros.set()``,
+    ``usuario.equipes_participando.add()``...) no sinal agregado e incrementa
+    a versão da lista de membros, mantendo o If-Match coerente.
+    """
+    if action == 'pre_clear':
+        # Guarda quem será removido, pois pk_set não é informado no clear
+        if reverse:
+            instance._equipes_antes_clear = set(
+                instance.equipes_participando.values_list('pk', flat=True)
+            )
+        else:
+            instance._membros_antes_clear = set(
+                instance.membros.values_list('pk', flat=True)
+            )
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if action == 'post_clear':
+        pk_set = getattr(
+            instance, '_equipes_antes_clear' if reverse else '_membros_antes_clear', set()
+        )
+    if not pk_set:
+        return
+
+    if reverse:
+        # instance é um Usuario; pk_set contém IDs de equipes
+        alteracoes = [(equipe, {instance.pk}) for equipe in Equipe.objects.filter(pk__in=pk_set)]
+    else:
+        alteracoes = [(instance, set(pk_set))]
+
+    Equipe.objects.filter(pk__in=[equipe.pk for equipe, _ in alteracoes]).update(
+        versao_membros=F('versao_membros') + 1
+    )
+    for equipe, usuarios in alteracoes:
+        membros_alterados.send(
+            sender=Equipe,
+            equipe=equipe,
+            adicionados=usuarios if action == 'post_add' else set(),
+            removidos=usuarios if action != 'post_add' else set(),
+        )
+
+
+# ============================================================
+# INVALIDAÇÃO DO CACHE DOS DASHBOARDS
+# ============================================================
+
+@receiver(post_save, sender=Projeto)
+@receiver(post_delete, sender=Projeto)
+@receiver(post_delete, sender=Usuario)
+def invalidar_catalogo_projetos(sender, **kwargs):
+    """Projetos e contagens de participantes exibidos em todos os dashboards"""
+    invalidar_catalogo()
+
+
+@receiver(membros_alterados, sender=Equipe)
+def invalidar_dashboards_membros(sender, equipe, adicionados, removidos, **kwargs):
+    """
+    Todos os membros da equipe veem o total de membros em "Minhas equipes";
+    quem entrou ou saiu também muda de "Meus projetos"
+    """
+    atuais = set(equipe.membros.values_list('pk', flat=True))
+    invalidar_usuarios(atuais | set(adicionados) | set(removidos) | {equipe.lider_id})
+    invalidar_catalogo()
+
+
+@receiver(pre_save, sender=Equipe)
+@receiver(pre_delete, sender=Equipe)
+def guardar_usuarios_equipe(sender, instance, **kwargs):
+    """Guarda líder e membros antes da alteração (o líder anterior também é afetado)"""
+    if instance.pk:
+        instance._usuarios_afetados = set(
+            Equipe.objects.filter(pk=instance.pk).values_list('lider_id', flat=True)
+        ) | set(Equipe.membros.through.objects.filter(
+            equipe_id=instance.pk
+        ).values_list('usuario_id', flat=True))
+
+
+@receiver(post_save, sender=Equipe)
+@receiver(post_delete, sender=Equipe)
+def invalidar_dashboards_equipe(sender, instance, **kwargs):
+    """Nome, projeto e líder da equipe aparecem nos dashboards dos membros"""
+    afetados = getattr(instance, '_usuarios_afetados', set()) | {instance.lider_id}
+    invalidar_usuarios(afetados)
+    invalidar_catalogo()
+
+
+@receiver(post_save, sender=ParticipacaoProjeto)
+@receiver(post_delete, sender=ParticipacaoProjeto)
+def invalidar_dashboard_participante(sender, instance, **kwargs):
+    """Participações diretas entram em "Meus projetos" do usuário"""
+    invalidar_usuarios([instance.usuario_id])
+
+
+@receiver(post_save, sender=SolicitacaoCadastro)
+@receiver(post_delete, sender=SolicitacaoCadastro)
+def invalidar_totais_solicitacoes_cadastro(sender, **kwargs):
+    """Totais por status da lista de solicitações e do dashboard do coordenador"""
+    invalidar_totais_solicitacoes()
+    # De novo após o commit: um request concorrente pode ter recalculado os
+    # totais antes de a transação terminar
+    transaction.on_commit(invalidar_totais_solicitacoes)
+
+
+# ============================================================
+# USUÁRIO DA SESSÃO (ver meuapp/backends.py)
+# ============================================================
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_usuario_sessao(sender, instance, update_fields=None, **kwargs):
+    """Descarta o usuário gravado do cache do backend; só last_login (a cada login) não muda nada"""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    pk = instance.pk
+    usuario_por_pk.descartar(pk)
+    # De novo após o commit, como os totais de solicitações
+    transaction.on_commit(lambda: usuario_por_pk.descartar(pk))
+
+
+# ============================================================
+# GRAFO DE COLABORAÇÃO
+# ============================================================
+
+@receiver(membros_alterados, sender=Equipe)
+def atualizar_grafo_colaboracao(sender, equipe, adicionados, removidos, **kwargs):
+    """Aplica a alteração ao grafo em memória (meuapp/colaboracao.py) após o commit"""
+    equipe_id, adicionados, removidos = equipe.pk, set(adicionados), set(removidos)
+    transaction.on_commit(lambda: registrar_alteracao(equipe_id, adicionados, removidos))
+
+
+@receiver(post_delete, sender=Equipe)
+@receiver(post_delete, sender=Usuario)
+def invalidar_grafo_exclusao(sender, **kwargs):
+    """A cascata apaga os vínculos sem m2m_changed: o grafo é remontado"""
+    transaction.on_commit(invalidar_grafo)
+
+
+# ============================================================
+# EVENTOS DAS SOLICITAÇÕES DE CADASTRO (SSE / long-polling)
+# ============================================================
+
+def _evento_solicitacao(tipo, solicitacao, status_anterior=None):
+    """Dados enviados aos coordenadores (nunca inclui o hash da senha)"""
+    return {
+        'tipo': tipo,
+        'solicitacao': solicitacao.pk,
+        'nome_completo': solicitacao.nome_completo,
+        'email': solicitacao.email,
+        'matricula': solicitacao.matricula,
+        'status': solicitacao.status,
+        'status_anterior': status_anterior,
+        'data_solicitacao': solicitacao.data_solicitacao.isoformat() if solicitacao.data_solicitacao else None,
+    }
+
+
+def _publicar_apos_commit(evento):
+    # Quem receber o evento e recarregar a lista já encontra a alteração no banco
+    transaction.on_commit(lambda: publicar(CANAL_SOLICITACOES, evento))
+
+
+@receiver(pre_save, sender=SolicitacaoCadastro)
+def guardar_status_solicitacao(sender, instance, **kwargs):
+    """Guarda o status gravado no banco para detectar a mudança no post_save"""
+    instance._status_anterior = None
+    if instance.pk:
+        instance._status_anterior = SolicitacaoCadastro.objects.filter(
+            pk=instance.pk
+        ).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=SolicitacaoCadastro)
+def publicar_evento_solicitacao(sender, instance, created, **kwargs):
+    """Nova solicitação ou mudança de status (aprovação/rejeição)"""
+    status_anterior = getattr(instance, '_status_anterior', None)
+    if created:
+        _publicar_apos_commit(_evento_solicitacao('criada', instance))
+    elif status_anterior != instance.status:
+        _publicar_apos_commit(_evento_solicitacao('status', instance, status_anterior))
+
+
+@receiver(post_delete, sender=SolicitacaoCadastro)
+def publicar_remocao_solicitacao(sender, instance, **kwargs):
+    _publicar_apos_commit(_evento_solicitacao('removida', instance))
+
+
+# ============================================================
+# MÉTRICAS (/metrics, ver meuapp/metricas.py)
+# ============================================================
+
+connection_created.connect(instalar_contador, dispatch_uid='metricas_contar_consultas')
+# Detector de N+1 (meuapp/consultas.py)
+connection_created.connect(instalar_inspetores, dispatch_uid='consultas_inspetores')
+
+
+@receiver(post_save, sender=SolicitacaoCadastro)
+def contar_solicitacao(sender, instance, created, **kwargs):
+    """Criadas, aprovadas e rejeitadas (o status anterior vem de guardar_status_solicitacao)"""
+    if created:
+        status = 'criada'
+    elif getattr(instance, '_status_anterior', None) != instance.status and instance.status != 'pendente':
+        status = instance.status
+    else:
+        return
+    transaction.on_commit(lambda: incrementar('devlab_solicitacoes_total', status=status))
@@ -0,0 +1,127 @@
+/* Autocomplete de usuários (EquipeForm)
+ *
+ * Transforma os <select data-autocomplete-url> renderizados pelos widgets
+ * UsuarioAutocompleteSelect/UsuarioAutocompleteSelectMultiple em um campo de
+ * busca. O <select> original continua no formulário (oculto) e é quem envia
+ * os IDs escolhidos; as sugestões são buscadas sob demanda no endpoint JSON.
+ */
+(function () {
+    'use strict';
+
+    var ATRASO_BUSCA_MS = 250;
+
+    function criarElemento(tag, classe, texto) {
+        var el = document.createElement(tag);
+        if (classe) { el.className = classe; }
+        if (texto !== undefined) { el.textContent = texto; }
+        return el;
+    }
+
+    function iniciar(select) {
+        var multiplo = select.multiple;
+        var url = select.dataset.autocompleteUrl;
+        var params = select.dataset.autocompleteParams || '';
+
+        var wrapper = criarElemento('div', 'position-relative');
+        var selecionados = criarElemento('div', 'd-flex flex-wrap gap-1 mb-1');
+        var campo = criarElemento('input', 'form-control');
+        var lista = criarElemento('div', 'list-group position-absolute w-100 shadow-sm');
+
+        campo.type = 'search';
+        campo.autocomplete = 'off';
+        campo.placeholder = select.getAttribute('placeholder') || 'Digite para buscar...';
+        lista.style.zIndex = 1000;
+        lista.hidden = true;
+
+        select.hidden = true;
+        select.parentNode.insertBefore(wrapper, select);
+        wrapper.appendChild(selecionados);
+        wrapper.appendChild(campo);
+        wrapper.appendChild(lista);
+        wrapper.appendChild(select);
+
+        function renderizarSelecionados() {
+            selecionados.innerHTML = '';
+            Array.prototype.forEach.call(select.options, function (opcao) {
+                if (!opcao.selected || !opcao.value) { return; }
+                var chip = criarElemento('span', 'badge bg-primary d-inline-flex align-items-center', opcao.text);
+                var remover = criarElemento('button', 'btn-close btn-close-white ms-2');
+                remover.type = 'button';
+                remover.setAttribute('aria-label', 'Remover');
+                remover.addEventListener('click', function () {
+                    opcao.remove();
+                    renderizarSelecionados();
+                });
+                chip.appendChild(remover);
+                selecionados.appendChild(chip);
+            });
+        }
+
+        function selecionar(item) {
+            if (!multiplo) {
+                Array.prototype.forEach.call(select.options, function (opcao) {
+                    if (opcao.value) { opcao.remove(); }
+                });
+            }
+            var existente = select.querySelector('option[value="' + item.id + '"]');
+            if (!existente) {
+                existente = new Option(item.text, item.id, true, true);
+                select.appendChild(existente);
+            }
+            existente.selected = true;
+            campo.value = '';
+            lista.hidden = true;
+            renderizarSelecionados();
+        }
+
+        function mostrarSugestoes(resultados) {
+            lista.innerHTML = '';
+            if (!resultados.length) {
+                lista.appendChild(criarElemento('div', 'list-group-item text-muted', 'Nenhum usuário encontrado'));
+            }
+            resultados.forEach(function (item) {
+                var botao = criarElemento('button', 'list-group-item list-group-item-action', item.text);
+                botao.type = 'button';
+                if (item.matricula) {
+                    botao.appendChild(criarElemento('small', 'text-muted ms-2', item.matricula));
+                }
+                botao.addEventListener('click', function () { selecionar(item); });
+                lista.appendChild(botao);
+            });
+            lista.hidden = false;
+        }
+
+        var temporizador = null;
+        var controlador = null;
+        function buscar() {
+            if (controlador) { controlador.abort(); }
+            controlador = new AbortController();
+            var consulta = '?q=' + encodeURIComponent(campo.value.trim()) + (params ? '&' + params : '');
+            fetch(url + consulta, {
+                credentials: 'same-origin',
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                signal: controlador.signal
+            })
+                .then(function (resposta) { return resposta.json(); })
+                .then(function (dados) { mostrarSugestoes(dados.results || []); })
+                .catch(function (erro) {
+                    if (erro.name !== 'AbortError') { lista.hidden = true; }
+                });
+        }
+
+        campo.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(buscar, ATRASO_BUSCA_MS);
+        });
+        campo.addEventListener('focus', buscar);
+        document.addEventListener('click', function (evento) {
+            if (!wrapper.contains(evento.target)) { lista.hidden = true; }
+        });
+
+        renderizarSelecionados();
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('select[data-autocomplete-url]').forEach(iniciar);
+    });
+})();
@@ -0,0 +1,42 @@
+/* Destaque de "Você participa" na tabela de todos os projetos (dashboards)
+ *
+ * A tabela de todos os projetos é um fragmento {% cache %} compartilhado por
+ * todos os usuários (varia só com a versão do catálogo), então não pode
+ * trazer nada do usuário. Os projetos dele vêm do fragmento "Meus Projetos"
+ * (atributo data-meu-projeto); aqui as linhas correspondentes recebem o
+ * destaque, o selo e o link para os detalhes.
+ */
+(function () {
+    'use strict';
+
+    function iniciar() {
+        var meus = {};
+        document.querySelectorAll('[data-meu-projeto]').forEach(function (el) {
+            meus[el.dataset.meuProjeto] = true;
+        });
+
+        document.querySelectorAll('tr[data-projeto]').forEach(function (linha) {
+            if (!meus[linha.dataset.projeto]) { return; }
+            linha.classList.add('table-primary');
+
+            var titulo = linha.querySelector('[data-titulo]');
+            var selo = document.createElement('span');
+            selo.className = 'badge bg-primary ms-2';
+            selo.textContent = titulo.dataset.titulo;
+            titulo.appendChild(selo);
+
+            var participantes = linha.querySelector('[data-participantes]');
+            var link = document.createElement('a');
+            link.href = linha.dataset.url;
+            link.textContent = participantes.textContent.trim();
+            participantes.textContent = '';
+            participantes.appendChild(link);
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', iniciar);
+    } else {
+        iniciar();
+    }
+})();
@@ -0,0 +1,96 @@
+/* Atualização em tempo real das solicitações de cadastro
+ *
+ * Usado no dashboard do coordenador e na lista de solicitações. Recebe os
+ * eventos por SSE (EventSource) ou, sem suporte, por long-polling, e:
+ *  - atualiza os contadores marcados com data-contador-solicitacoes="<status>";
+ *  - mostra um aviso com link para recarregar a página.
+ * A configuração vem do elemento [data-solicitacoes-eventos].
+ */
+(function () {
+    'use strict';
+
+    var TIPOS = ['criada', 'status', 'removida'];
+    var ESPERA_ERRO_MS = 5000;
+
+    var config = document.querySelector('[data-solicitacoes-eventos]');
+    if (!config) { return; }
+
+    var alteracoes = 0;
+
+    function ajustarContador(status, delta) {
+        if (!status) { return; }
+        var seletor = '[data-contador-solicitacoes="' + status + '"]';
+        document.querySelectorAll(seletor).forEach(function (el) {
+            var valor = parseInt(el.textContent, 10) || 0;
+            el.textContent = Math.max(0, valor + delta);
+        });
+    }
+
+    function mostrarAviso(evento) {
+        alteracoes += 1;
+        var texto;
+        if (evento.tipo === 'criada') {
+            texto = 'Nova solicitação de ' + evento.nome_completo + '.';
+        } else if (evento.tipo === 'status') {
+            texto = 'Solicitação de ' + evento.nome_completo + ' agora está ' + evento.status + '.';
+        } else {
+            texto = 'Solicitação de ' + evento.nome_completo + ' removida.';
+        }
+
+        config.replaceChildren();
+        var alerta = document.createElement('div');
+        alerta.className = 'alert alert-info d-flex justify-content-between align-items-center';
+        alerta.setAttribute('role', 'status');
+        var mensagem = document.createElement('span');
+        mensagem.textContent = texto + (alteracoes > 1 ? ' (' + alteracoes + ' atualizações)' : '');
+        var link = document.createElement('a');
+        link.href = window.location.href;
+        link.className = 'btn btn-sm btn-outline-primary';
+        link.textContent = 'Atualizar';
+        alerta.appendChild(mensagem);
+        alerta.appendChild(link);
+        config.appendChild(alerta);
+    }
+
+    function aplicar(evento) {
+        if (evento.tipo === 'criada') {
+            ajustarContador(evento.status, +1);
+        } else if (evento.tipo === 'status') {
+            ajustarContador(evento.status_anterior, -1);
+            ajustarContador(evento.status, +1);
+        } else if (evento.tipo === 'removida') {
+            ajustarContador(evento.status, -1);
+        }
+        mostrarAviso(evento);
+    }
+
+    function conectarSSE() {
+        // O EventSource reconecta sozinho, enviando o Last-Event-ID
+        var fonte = new EventSource(config.dataset.urlSse);
+        TIPOS.forEach(function (tipo) {
+            fonte.addEventListener(tipo, function (e) { aplicar(JSON.parse(e.data)); });
+        });
+    }
+
+    function consultar(ultimo) {
+        var url = config.dataset.urlPoll + (ultimo !== null ? '?ultimo=' + ultimo : '');
+        fetch(url, { headers: { 'Accept': 'application/json' }, credentials: 'same-origin' })
+            .then(function (resposta) {
+                if (!resposta.ok) { throw new Error(resposta.status); }
+                return resposta.json();
+            })
+            .then(function (dados) {
+                dados.eventos.forEach(aplicar);
+                setTimeout(function () { consultar(dados.ultimo); }, dados.intervalo * 1000);
+            })
+            .catch(function () {
+                setTimeout(function () { consultar(ultimo); }, ESPERA_ERRO_MS);
+            });
+    }
+
+    if (window.EventSource && config.dataset.urlSse) {
+        conectarSSE();
+    } else {
+        consultar(null);
+    }
+})();
@@ -0,0 +1,72 @@
+"""
+Armazenamento de arquivos estáticos do DevLab Projects
+Arquivo: meuapp/storage.py
+"""
+
+import gzip
+import logging
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só as variantes .gz são geradas
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Storage com nomes versionados por hash (ex: base.3f2a9c1d.css) que, ao fim
+    do collectstatic, grava ao lado de cada arquivo de texto as variantes
+    pré-comprimidas .gz e .br. Assim a compressão é feita uma única vez por
+    deploy e meuapp.middleware.PrecompressedStaticMiddleware só precisa
+    escolher qual arquivo enviar.
+    """
+
+    EXTENSOES_COMPRIMIVEIS = (
+        '.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml',
+        '.ico', '.ttf', '.otf', '.eot',
+    )
+    TAMANHO_MINIMO = 256
+    # Variantes que não economizam ao menos 5% não compensam o arquivo extra
+    RAZAO_MAXIMA = 0.95
+
+    def stored_name(self, name):
+        # Sem entrada no manifest (collectstatic não rodou depois da última
+        # mudança), a página sai com o nome sem hash em vez de um erro 500
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning('%s fora do manifest de estáticos; rode o collectstatic', name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        nomes = set(paths) | set(self.hashed_files.values())
+        for nome in sorted(nomes):
+            if nome.lower().endswith(self.EXTENSOES_COMPRIMIVEIS) and self.exists(nome):
+                self._comprimir(nome)
+
+    def _comprimir(self, nome):
+        with self.open(nome) as arquivo:
+            conteudo = arquivo.read()
+        if len(conteudo) < self.TAMANHO_MINIMO:
+            return
+
+        variantes = {'.gz': gzip.compress(conteudo, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(conteudo, quality=11)
+
+        for sufixo, comprimido in variantes.items():
+            destino = nome + sufixo
+            if self.exists(destino):
+                self.delete(destino)
+            if len(comprimido) <= len(conteudo) * self.RAZAO_MAXIMA:
+                self._save(destino, ContentFile(comprimido))
@@ -0,0 +1,142 @@
+"""
+Tarefas periódicas de manutenção do DevLab Projects
+Arquivo: meuapp/tarefas.py
+
+Executadas por ``manage.py run_scheduler`` (meuapp/agendador.py). Cada
+tarefa é um gerador ``(cursor, lote)`` que processa no máximo ``lote`` itens
+por vez, grava e produz ``(cursor, quantidade)``; o agendador salva o cursor
+e renova o lease entre os lotes.
+"""
+
+from datetime import time, timedelta
+from importlib import import_module
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import lembretes
+from .agendador import tarefa
+from .models import EstatisticaDiaria, SolicitacaoCadastro
+
+
+# ============================================================
+# SOLICITAÇÕES DE CADASTRO
+# ============================================================
+
+@tarefa('expirar_solicitacoes', intervalo=timedelta(hours=1))
+def expirar_solicitacoes(cursor, lote):
+    """Rejeita as solicitações pendentes há mais de SOLICITACAO_EXPIRACAO_DIAS dias"""
+    dias = settings.SOLICITACAO_EXPIRACAO_DIAS
+    if not dias:
+        return
+    agora = timezone.now()
+    motivo = f'Expirada: sem análise em {dias} dias.'
+    while True:
+        with transaction.atomic():
+            solicitacoes = list(
+                SolicitacaoCadastro.objects.select_for_update().filter(
+                    status='pendente', data_solicitacao__lt=agora - timedelta(days=dias),
+                ).order_by('pk')[:lote]
+            )
+            for solicitacao in solicitacoes:
+                solicitacao.status = 'rejeitada'
+                solicitacao.motivo_rejeicao = motivo
+                solicitacao.data_aprovacao = agora
+                # save() e não update(): os sinais atualizam os totais, os
+                # eventos da lista dos coordenadores e as métricas
+                solicitacao.save(update_fields=['status', 'motivo_rejeicao', 'data_aprovacao'])
+        if not solicitacoes:
+            return
+        yield str(solicitacoes[-1].pk), len(solicitacoes)
+        if len(solicitacoes) < lote:
+            return
+
+
+# ============================================================
+# LEMBRETES DE PRAZO
+# ============================================================
+
+@tarefa('lembretes_prazo', horario=time(8, 0))
+def lembretes_prazo(cursor, lote):
+    """Envia um e-mail por pessoa com os projetos dela que vencem em LEMBRETE_PRAZO_DIAS dias"""
+    # Destinatários em ordem de usuario_id: o cursor é o último que já recebeu
+    ultimo = int(cursor or 0)
+    resumos = [resumo for resumo in lembretes.montar_resumos() if resumo.usuario_id > ultimo]
+    if not resumos:
+        return
+
+    pendentes = lembretes.mensagens(resumos)
+    # Uma conexão SMTP para a execução inteira; os lotes só marcam o progresso
+    conexao = get_connection()
+    conexao.open()
+    try:
+        for inicio in range(0, len(resumos), lote):
+            conexao.send_messages(list(islice(pendentes, lote)))
+            enviados = resumos[inicio:inicio + lote]
+            yield str(enviados[-1].usuario_id), len(enviados)
+    finally:
+        conexao.close()
+
+
+# ============================================================
+# MANUTENÇÃO
+# ============================================================
+
+@tarefa('limpar_sessoes', horario=time(3, 0))
+def limpar_sessoes(cursor, lote):
+    """Apaga as sessões expiradas, como o clearsessions, mas em lotes"""
+    armazenamento = import_module(settings.SESSION_ENGINE).SessionStore
+    if not hasattr(armazenamento, 'get_model_class'):
+        # Sessões fora do banco (cache, arquivo, cookie): o próprio backend limpa
+        armazenamento.clear_expired()
+        return
+    Sessao = armazenamento.get_model_class()
+    while True:
+        chaves = list(
+            Sessao.objects.filter(expire_date__lt=timezone.now()).values_list('session_key', flat=True)[:lote]
+        )
+        if not chaves:
+            return
+        Sessao.objects.filter(session_key__in=chaves).delete()
+        yield '', len(chaves)
+        if len(chaves) < lote:
+            return
+
+
+@tarefa('snapshot_stats', horario=time(23, 55))
+def snapshot_stats(cursor, lote):
+    """Grava a linha do dia de EstatisticaDiaria (o mesmo que manage.py snapshot_stats)"""
+    EstatisticaDiaria.gerar()
+    yield '', 1
+
+
+@tarefa('vacuo_sqlite', horario=time(4, 0))
+def vacuo_sqlite(cursor, lote):
+    """Devolve ao disco as páginas livres do SQLite e atualiza as estatísticas do planejador"""
+    if connection.vendor != 'sqlite':
+        # PostgreSQL: o autovacuum do servidor cuida disso
+        return
+    with connection.cursor() as sql:
+        sql.execute('PRAGMA auto_vacuum')
+        if sql.fetchone()[0] != 2:
+            # Conversão única para auto_vacuum=INCREMENTAL: este VACUUM
+            # reescreve o arquivo inteiro; os próximos liberam só lotes de páginas
+            sql.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            sql.execute('VACUUM')
+            yield '', 1
+        anterior = None
+        while True:
+            sql.execute('PRAGMA freelist_count')
+            livres = sql.fetchone()[0]
+            if not livres or livres == anterior:
+                break
+            anterior = livres
+            paginas = min(lote, livres)
+            sql.execute(f'PRAGMA incremental_vacuum({paginas})')
+            # Cada passo do cursor libera uma página
+            sql.fetchall()
+            yield '', paginas
+        sql.execute('PRAGMA optimize')
@@ -0,0 +1,196 @@
+"""
+Formação automática de equipes do DevLab Projects
+Arquivo: meuapp/team_builder.py
+
+Divide uma turma de estudantes em equipes de um projeto:
+
+- cada equipe recebe um professor; os professores com menos equipes atuais
+  são usados primeiro (se houver menos professores que equipes, um mesmo
+  professor orienta mais de uma, sempre o menos ocupado);
+- quem já está (como membro ou líder) em outra equipe do mesmo projeto fica
+  de fora;
+- os tamanhos diferem em no máximo um, e a soma das equipes atuais dos
+  estudantes fica equilibrada entre as equipes: distribuição em serpentina
+  seguida de trocas entre a equipe mais e a menos carregada;
+- o líder é um membro que ainda não lidera nenhuma equipe
+  (Equipe.lider é OneToOne), de preferência o estudante menos ocupado.
+
+montar_equipes() só calcula (sem banco); carregar_candidatos() e
+salvar_equipes() fazem as consultas e a gravação em lote.
+"""
+
+import heapq
+import math
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .cache import invalidar_catalogo, invalidar_usuarios
+from .colaboracao import invalidar_grafo
+from .models import Equipe, Usuario
+
+
+# pk; carga: equipes de que já é membro; lidera: já é líder de alguma equipe
+Candidato = namedtuple('Candidato', ['pk', 'carga', 'lidera'])
+# professor e lider: pk (ou None); estudantes: lista de pks
+EquipePlanejada = namedtuple('EquipePlanejada', ['professor', 'estudantes', 'lider'])
+
+# Limite de trocas da busca local (cada troca reduz a diferença entre equipes)
+MAX_TROCAS = 10000
+
+
+class FormacaoImpossivel(ValueError):
+    """Os dados informados não permitem montar as equipes"""
+
+
+def montar_equipes(estudantes, professores, tamanho):
+    """
+    Divide ``estudantes`` (Candidatos) em equipes de até ``tamanho``
+    estudantes, cada uma com um dos ``professores`` (Candidatos).
+    Retorna a lista de EquipePlanejada.
+    """
+    if tamanho < 1:
+        raise FormacaoImpossivel('O tamanho das equipes precisa ser pelo menos 1.')
+    if not estudantes:
+        raise FormacaoImpossivel('Nenhum estudante disponível para formar equipes.')
+    if not professores:
+        raise FormacaoImpossivel('Nenhum professor disponível para orientar as equipes.')
+
+    quantidade = math.ceil(len(estudantes) / tamanho)
+    grupos = _distribuir(estudantes, quantidade)
+    _equilibrar(grupos)
+
+    # Professor menos ocupado primeiro; cada equipe nova conta como uma a mais
+    fila = [(professor.carga, professor.pk) for professor in professores]
+    heapq.heapify(fila)
+    por_pk = {professor.pk: professor for professor in professores}
+    lideres = set()
+    equipes = []
+    for grupo in grupos:
+        carga, professor = heapq.heappop(fila)
+        heapq.heappush(fila, (carga + 1, professor))
+        lider = _escolher_lider(grupo, por_pk[professor], lideres)
+        lideres.add(lider)
+        equipes.append(EquipePlanejada(
+            professor, sorted(estudante.pk for estudante in grupo), lider,
+        ))
+    return equipes
+
+
+def _distribuir(estudantes, quantidade):
+    """Serpentina pela carga (maior primeiro): 0, 1, ..., n-1, n-1, ..., 0, ..."""
+    ordenados = sorted(estudantes, key=lambda e: (-e.carga, e.pk))
+    grupos = [[] for _ in range(quantidade)]
+    for posicao, estudante in enumerate(ordenados):
+        volta, indice = divmod(posicao, quantidade)
+        grupos[indice if volta % 2 == 0 else quantidade - 1 - indice].append(estudante)
+    return grupos
+
+
+def _equilibrar(grupos):
+    """
+    Busca local: troca um estudante da equipe de maior soma de cargas com um
+    da de menor soma, escolhendo o par que mais aproxima as duas, até não
+    haver troca que reduza a diferença. Os tamanhos não mudam.
+    """
+    somas = [sum(e.carga for e in grupo) for grupo in grupos]
+    for _ in range(MAX_TROCAS):
+        maior = max(range(len(grupos)), key=somas.__getitem__)
+        menor = min(range(len(grupos)), key=somas.__getitem__)
+        diferenca = somas[maior] - somas[menor]
+        if diferenca <= 1:
+            return
+
+        # Trocar cargas a e b (a > b) reduz a diferença se 0 < a - b < diferenca;
+        # o ideal é a - b = diferenca / 2
+        melhor = None
+        cargas_menor = {}
+        for j, estudante in enumerate(grupos[menor]):
+            cargas_menor.setdefault(estudante.carga, j)
+        for i, estudante in enumerate(grupos[maior]):
+            for carga, j in cargas_menor.items():
+                delta = estudante.carga - carga
+                if 0 < delta < diferenca:
+                    restante = abs(diferenca - 2 * delta)
+                    if melhor is None or restante < melhor[0]:
+                        melhor = (restante, i, j, delta)
+        if melhor is None:
+            return
+
+        _, i, j, delta = melhor
+        grupos[maior][i], grupos[menor][j] = grupos[menor][j], grupos[maior][i]
+        somas[maior] -= delta
+        somas[menor] += delta
+
+
+def _escolher_lider(grupo, professor, lideres):
+    """Estudante menos ocupado que ainda não lidera; senão o professor; senão ninguém"""
+    disponiveis = [e for e in grupo if not e.lidera and e.pk not in lideres]
+    if disponiveis:
+        return min(disponiveis, key=lambda e: (e.carga, e.pk)).pk
+    if not professor.lidera and professor.pk not in lideres:
+        return professor.pk
+    return None
+
+
+def carregar_candidatos(projeto, prefixo_matricula='', professores=None):
+    """
+    (estudantes, professores) ativos que ainda não estão em nenhuma equipe
+    do projeto, como Candidatos; uma consulta para cada tipo.
+    ``professores`` restringe os professores a esses pks.
+    """
+    ocupados = Equipe.objects.filter(projeto=projeto).filter(
+        Q(membros=OuterRef('pk')) | Q(lider=OuterRef('pk'))
+    )
+    usuarios = Usuario.objects.filter(is_active=True).exclude(Exists(ocupados)).annotate(
+        carga=Count('equipes_participando', distinct=True),
+        lidera=Exists(Equipe.objects.filter(lider=OuterRef('pk'))),
+    ).order_by('pk')
+
+    estudantes = usuarios.filter(tipo='estudante')
+    if prefixo_matricula:
+        estudantes = estudantes.filter(matricula__startswith=prefixo_matricula)
+    orientadores = usuarios.filter(tipo='professor')
+    if professores is not None:
+        orientadores = orientadores.filter(pk__in=professores)
+
+    return (
+        [Candidato(*linha) for linha in estudantes.values_list('pk', 'carga', 'lidera')],
+        [Candidato(*linha) for linha in orientadores.values_list('pk', 'carga', 'lidera')],
+    )
+
+
+def nomes_equipes(projeto, quantidade, nome_base='Equipe'):
+    """Nomes numerados a partir das equipes que o projeto já tem: "Equipe 04", ..."""
+    inicio = Equipe.objects.filter(projeto=projeto).count() + 1
+    return [f'{nome_base} {numero:02d}' for numero in range(inicio, inicio + quantidade)]
+
+
+@transaction.atomic
+def salvar_equipes(projeto, plano, nome_base='Equipe'):
+    """
+    Grava as equipes planejadas em lote: um INSERT para as equipes e um para
+    os membros (professor e estudantes). Retorna as equipes criadas.
+    """
+    equipes = Equipe.objects.bulk_create([
+        Equipe(
+            nome=nome,
+            descricao=f'Formada automaticamente ({len(planejada.estudantes)} estudantes).',
+            projeto=projeto,
+            lider_id=planejada.lider,
+        )
+        for nome, planejada in zip(nomes_equipes(projeto, len(plano), nome_base), plano)
+    ])
+
+    Membro = Equipe.membros.through
+    Membro.objects.bulk_create([
+        Membro(equipe_id=equipe.pk, usuario_id=usuario)
+        for equipe, planejada in zip(equipes, plano)
+        for usuario in [planejada.professor] + planejada.estudantes
+    ])
+
+    # bulk_create não dispara os sinais: invalida os dashboards e o grafo aqui
+    afetados = {pk for planejada in plano for pk in [planejada.professor] + planejada.estudantes}
+    transaction.on_commit(lambda: (invalidar_usuarios(afetados), invalidar_catalogo(), invalidar_grafo()))
+    return equipes
@@ -1,3 +1,1768 @@
-from django.test import TestCase
+"""
+Testes do DevLab Projects
+Arquivo: meuapp/tests.py
 
-# Create your tests here.
+Orçamento de consultas: cada view de meuapp/urls.py é acessada por cada
+perfil com a base em duas escalas (pequena e 10x maior), e o número de
+consultas precisa ser o mesmo nas duas. Uma view cujo número de consultas
+cresce com os dados (N+1) falha aqui, indicando a URL, o perfil e as
+consultas a mais.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.contrib.messages import constants
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.mail import send_mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.models import Count
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import agendador, arquivo, colaboracao, eventos, lembretes, metricas, perfilador, views
+from . import urls as meuapp_urls
+from .analytics import DadosPortfolio, analisar_portfolio
+from .backends import UsuarioEmCacheBackend, usuario_por_pk
+from .management.commands.benchmark_http import Command as BenchmarkHttp
+from .cache import (
+    CacheLocal, cache_local, limpar_caches_locais, totais_solicitacoes, versao_catalogo, versoes_dashboard,
+)
+from .colaboracao import GrafoColaboracao
+from .consultas import (
+    CampoAdiadoLido, ConsultasRepetidas, InspetorConsultas, detectar_n_mais_um, normalizar_sql,
+    proibir_campos_adiados,
+)
+from .middleware import PrecompressedStaticMiddleware, ReadReplicaMiddleware, SessionRefreshMiddleware
+from .routers import REPLICA_COOKIE, ReadWriteRouter
+from .team_builder import Candidato, FormacaoImpossivel, montar_equipes
+from .models import (
+    EstatisticaDiaria, Equipe, EquipeArquivada, ParticipacaoArquivada, ParticipacaoProjeto, Projeto,
+    ProjetoArquivado, SolicitacaoCadastro, TarefaAgendada, Usuario,
+)
+
+
+# Testes rodam sem o manifest do collectstatic, sem SMTP e com caches em memória
+CONFIGURACOES_TESTE = dict(
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'testes'},
+        'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'testes-sessoes'},
+    },
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CONSULTAS_REPETIDAS_DETECTAR=False,
+)
+
+ESCALA_PEQUENA = 1
+ESCALA_GRANDE = 10
+# Quantidade de cada tipo de objeto na escala 1
+ITENS_POR_ESCALA = 3
+
+# Argumentos de cada rota nomeada de meuapp/urls.py, a partir dos objetos
+# criados por popular(). Toda rota nova precisa entrar aqui (ver
+# test_todas_as_rotas_cobertas).
+ROTAS = {
+    'home': None,
+    'login': None,
+    'registro': None,
+    'password_reset': None,
+    'password_reset_done': None,
+    'password_reset_confirm': lambda d: {'uidb64': 'MQ', 'token': 'token-invalido'},
+    'password_reset_complete': None,
+    'dashboard': None,
+    'coordenador_dashboard': None,
+    'professor_dashboard': None,
+    'estudante_dashboard': None,
+    'estatisticas_series': None,
+    'portfolio_analise': None,
+    'colaboracao_grafo': None,
+    'visitante': None,
+    'projeto_lista': None,
+    'projeto_criar': None,
+    'projeto_detalhes': lambda d: {'pk': d['projeto'].pk},
+    'projeto_editar': lambda d: {'pk': d['projeto'].pk},
+    'projeto_deletar': lambda d: {'pk': d['projeto'].pk},
+    'arquivo_lista': None,
+    'arquivo_detalhes': lambda d: {'pk': d['arquivado'].pk},
+    'arquivo_restaurar': lambda d: {'pk': d['arquivado'].pk},
+    'equipe_lista': None,
+    'equipe_criar': None,
+    'equipe_formar': None,
+    'equipe_detalhes': lambda d: {'pk': d['equipe'].pk},
+    'equipe_editar': lambda d: {'pk': d['equipe'].pk},
+    'equipe_deletar': lambda d: {'pk': d['equipe'].pk},
+    'equipe_membros': lambda d: {'pk': d['equipe'].pk},
+    'equipe_membros_adicionar': lambda d: {'pk': d['equipe'].pk},
+    'equipe_membros_remover': lambda d: {'pk': d['equipe'].pk},
+    'usuario_lista': None,
+    'usuario_criar': None,
+    'usuario_autocomplete': None,
+    'usuario_detalhes': lambda d: {'pk': d['estudante'].pk},
+    'usuario_editar': lambda d: {'pk': d['estudante'].pk},
+    'usuario_deletar': lambda d: {'pk': d['estudante'].pk},
+    'solicitacoes_cadastro_lista': None,
+    'solicitacao_cadastro_detalhes': lambda d: {'pk': d['solicitacao'].pk},
+    'solicitacoes_eventos': None,
+    'solicitacoes_eventos_poll': None,
+    'solicitacao_cadastro_editar_aluno': lambda d: {'pk': d['estudante'].pk},
+    'perfil': None,
+    'solicitacao_cadastro_aprovar': lambda d: {'pk': d['solicitacao'].pk},
+    'solicitacao_cadastro_rejeitar': lambda d: {'pk': d['solicitacao'].pk},
+    'test_email': None,
+    'metricas': None,
+    # Por último: encerra a sessão do perfil
+    'logout': None,
+}
+
+
+def popular(prefixo, escala):
+    """
+    Cria um conjunto de dados independente, com ITENS_POR_ESCALA * escala
+    projetos, equipes, usuários e solicitações. Os usuários de cada perfil
+    participam de tudo, então as listas de todos os dashboards crescem com a
+    escala; o projeto e a equipe principais também.
+    """
+    n = ITENS_POR_ESCALA * escala
+
+    def usuario(sufixo, tipo):
+        return Usuario.objects.create_user(
+            f'{prefixo}{sufixo}', f'{prefixo}{sufixo}@devlab.test', 'senha', tipo=tipo,
+            first_name=sufixo.capitalize(), matricula=f'{prefixo}{sufixo}',
+        )
+
+    coordenador = usuario('coordenador', 'coordenador')
+    professor = usuario('professor', 'professor')
+    estudante = usuario('estudante', 'estudante')
+    estudantes = Usuario.objects.bulk_create([
+        Usuario(
+            username=f'{prefixo}aluno{i}', first_name=f'Aluno{i}', tipo='estudante',
+            matricula=f'{prefixo}m{i}', password='!',
+        )
+        for i in range(n)
+    ])
+
+    projetos = Projeto.objects.bulk_create([
+        Projeto(
+            titulo=f'{prefixo}Projeto {i}', descricao='Descrição', cliente='Cliente',
+            status=('planejado', 'andamento', 'concluido')[i % 3],
+            data_inicio=date(2024, 1, 1), data_fim_prevista=date(2024, 12, 31),
+        )
+        for i in range(n)
+    ])
+    ParticipacaoProjeto.objects.bulk_create([
+        ParticipacaoProjeto(usuario=participante, projeto=projeto)
+        for projeto in projetos
+        for participante in (professor, estudante)
+    ])
+
+    # Todas as equipes no projeto principal, para que ele também cresça
+    equipes = Equipe.objects.bulk_create([
+        Equipe(nome=f'{prefixo}Equipe {i}', projeto=projetos[0]) for i in range(n)
+    ])
+    equipe = equipes[0]
+    equipe.lider = professor
+    equipe.save()
+    Membro = Equipe.membros.through
+    Membro.objects.bulk_create(
+        [Membro(equipe=equipe, usuario=aluno) for aluno in estudantes]
+        + [Membro(equipe=e, usuario=u) for e in equipes for u in (professor, estudante)]
+    )
+
+    solicitacoes = SolicitacaoCadastro.objects.bulk_create([
+        SolicitacaoCadastro(
+            nome_completo=f'Solicitante {i}', email=f'{prefixo}sol{i}@devlab.test',
+            data_nascimento=date(2000, 1, 1), senha_hash='!', matricula=f'{prefixo}s{i}',
+            status=('pendente', 'aprovada', 'rejeitada')[i % 3],
+        )
+        for i in range(n)
+    ])
+
+    # Projetos concluídos já arquivados; o primeiro com equipe e participações
+    concluidos = Projeto.objects.bulk_create([
+        Projeto(
+            titulo=f'{prefixo}Arquivado {i}', descricao='Descrição', cliente='Cliente', status='concluido',
+            data_inicio=date(2020, 1, 1), data_fim_prevista=date(2020, 12, 31),
+        )
+        for i in range(n)
+    ])
+    antiga = Equipe.objects.create(nome=f'{prefixo}Equipe antiga', projeto=concluidos[0], lider=estudante)
+    antiga.membros.add(estudante, *estudantes)
+    ParticipacaoProjeto.objects.bulk_create([
+        ParticipacaoProjeto(usuario=participante, projeto=concluidos[0]) for participante in (professor, estudante)
+    ])
+    for _ in arquivo.arquivar(Projeto.objects.filter(pk__in=[projeto.pk for projeto in concluidos])):
+        pass
+
+    return {
+        'coordenador': coordenador,
+        'professor': professor,
+        'estudante': estudante,
+        'projeto': projetos[0],
+        'equipe': equipe,
+        'solicitacao': solicitacoes[0],
+        'arquivado': ProjetoArquivado.objects.get(pk=concluidos[0].pk),
+    }
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class OrcamentoConsultasTests(TestCase):
+    """O número de consultas de cada view não pode depender do volume de dados"""
+
+    def test_todas_as_rotas_cobertas(self):
+        nomes = {
+            padrao.name for padrao in meuapp_urls.urlpatterns
+            if isinstance(padrao, URLPattern) and padrao.name
+        }
+        self.assertEqual(nomes - set(ROTAS), set(), 'Rotas sem orçamento de consultas em ROTAS')
+
+    def test_coordenador(self):
+        self.verificar_perfil('coordenador')
+
+    def test_professor(self):
+        self.verificar_perfil('professor')
+
+    def test_estudante(self):
+        self.verificar_perfil('estudante')
+
+    def test_anonimo(self):
+        self.verificar_perfil('anonimo')
+
+    def verificar_perfil(self, perfil):
+        pequena = self.medir(perfil, popular('p_', ESCALA_PEQUENA))
+        grande = self.medir(perfil, popular('g_', ESCALA_GRANDE))
+
+        for nome in ROTAS:
+            with self.subTest(rota=nome, perfil=perfil):
+                (url_p, status_p, frias_p, quentes_p) = pequena[nome]
+                (url_g, status_g, frias_g, quentes_g) = grande[nome]
+                self.assertLess(status_g, 500, f'{url_g} respondeu {status_g}')
+                self.assertEqual(status_p, status_g)
+                self.assertEqual(
+                    len(frias_p), len(frias_g),
+                    self.diferenca(url_g, frias_p, frias_g, 'cache vazio'),
+                )
+                self.assertEqual(
+                    len(quentes_p), len(quentes_g),
+                    self.diferenca(url_g, quentes_p, quentes_g, 'cache preenchido'),
+                )
+
+    def medir(self, perfil, dados):
+        """Para cada rota: (url, status, consultas com cache vazio, consultas com cache preenchido)"""
+        self.client.logout()
+        if perfil != 'anonimo':
+            self.client.force_login(dados[perfil])
+            # A primeira página após o login renova a sessão (uma escrita a mais)
+            self.client.get(reverse('perfil'))
+
+        resultados = {}
+        for nome, argumentos in ROTAS.items():
+            url = reverse(nome, kwargs=argumentos(dados) if argumentos else None)
+            cache.clear()
+            limpar_caches_locais()
+            status, frias = self.consultas(url)
+            _, quentes = self.consultas(url)
+            resultados[nome] = (url, status, frias, quentes)
+        return resultados
+
+    def consultas(self, url):
+        # Os templates também não podem ler campos deixados de fora do .only()
+        with CaptureQueriesContext(connection) as capturadas, proibir_campos_adiados():
+            resposta = self.client.get(url)
+        return resposta.status_code, [consulta['sql'] for consulta in capturadas]
+
+    @staticmethod
+    def diferenca(url, pequena, grande, situacao):
+        formas = [normalizar_sql(sql) for sql in grande]
+        repetidas = sorted({forma for forma in formas if formas.count(forma) > 1})
+        return (
+            f'{url} ({situacao}): {len(pequena)} consultas na escala {ESCALA_PEQUENA} '
+            f'e {len(grande)} na escala {ESCALA_GRANDE}. Repetidas:\n' + '\n'.join(repetidas)
+        )
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class DetectorNMaisUmTests(TestCase):
+
+    def setUp(self):
+        projeto = Projeto.objects.create(
+            titulo='Projeto', descricao='', cliente='', data_inicio=date(2024, 1, 1),
+            data_fim_prevista=date(2024, 12, 31),
+        )
+        Equipe.objects.bulk_create([Equipe(nome=f'Equipe {i}', projeto=projeto) for i in range(4)])
+
+    def test_aponta_template_e_linha(self):
+        template = Template('{% for equipe in equipes %}\n{{ equipe.total_membros }}\n{% endfor %}')
+        with self.assertRaises(ConsultasRepetidas) as erro:
+            with detectar_n_mais_um(limite=2):
+                template.render(Context({'equipes': Equipe.objects.all()}))
+        (repeticao,) = erro.exception.repeticoes
+        self.assertEqual(repeticao.vezes, 4)
+        self.assertTrue(repeticao.origem.endswith(':2'), repeticao.origem)
+
+    def test_consultas_anotadas_passam(self):
+        template = Template('{% for equipe in equipes %}{{ equipe.total_membros }}{% endfor %}')
+        equipes = Equipe.objects.annotate(_total_membros=Count('membros'))
+        with detectar_n_mais_um(limite=2) as inspetor:
+            template.render(Context({'equipes': equipes}))
+        self.assertEqual(inspetor.total, 1)
+
+    async def test_inspetor_por_request(self):
+        # Sob ASGI, os requests dividem a thread do sync_to_async e as conexões dela
+        contar = sync_to_async(Equipe.objects.count)
+
+        async def request(consultas):
+            with InspetorConsultas(limite=10) as inspetor:
+                for _ in range(consultas):
+                    await contar()
+                    await asyncio.sleep(0)
+            return inspetor.total
+
+        self.assertEqual(await asyncio.gather(request(2), request(3)), [2, 3])
+
+    def test_campo_adiado_lido_no_template(self):
+        template = Template('{% for equipe in equipes %}\n{{ equipe.descricao }}\n{% endfor %}')
+        with self.assertRaises(CampoAdiadoLido) as erro, proibir_campos_adiados():
+            template.render(Context({'equipes': Equipe.objects.only('nome')}))
+        self.assertEqual(erro.exception.campo, 'descricao')
+        self.assertIn(':2', str(erro.exception))
+        # Campos carregados e refresh_from_db explícito continuam liberados
+        with proibir_campos_adiados():
+            equipe = Equipe.objects.only('nome').first()
+            template.render(Context({'equipes': Equipe.objects.only('nome', 'descricao')}))
+            equipe.refresh_from_db(fields=['versao_membros'])
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class EstatisticaDiariaTests(TestCase):
+
+    def setUp(self):
+        self.dados = popular('e_', ESCALA_PEQUENA)
+        agora = timezone.now()
+        SolicitacaoCadastro.objects.filter(status='aprovada').update(
+            data_solicitacao=agora - timedelta(hours=6), data_aprovacao=agora,
+        )
+
+    def test_snapshot_idempotente(self):
+        call_command('snapshot_stats', stdout=StringIO())
+        call_command('snapshot_stats', stdout=StringIO())
+        (estatistica,) = EstatisticaDiaria.objects.all()
+        self.assertEqual(estatistica.data, timezone.localdate())
+        self.assertEqual(estatistica.projetos_andamento, 1)
+        self.assertEqual(estatistica.equipes_ativas, 0)
+        self.assertEqual(estatistica.novos_estudantes, 1 + ITENS_POR_ESCALA)
+        self.assertEqual(estatistica.solicitacoes_aprovadas, 1)
+        self.assertEqual(estatistica.latencia_aprovacao, timedelta(hours=6))
+
+    def test_dias_anteriores_sem_estado(self):
+        call_command('snapshot_stats', dias=3, stdout=StringIO())
+        ontem = EstatisticaDiaria.objects.get(data=timezone.localdate() - timedelta(days=1))
+        self.assertIsNone(ontem.projetos_andamento)
+        self.assertEqual(ontem.novos_estudantes, 0)
+        self.assertIsNone(ontem.latencia_aprovacao)
+
+    def test_series(self):
+        call_command('snapshot_stats', dias=2, stdout=StringIO())
+        self.client.force_login(self.dados['coordenador'])
+        dados = self.client.get(reverse('estatisticas_series'), {'dias': 1}).json()
+        self.assertEqual(dados['datas'], [timezone.localdate().isoformat()])
+        self.assertEqual(dados['series']['solicitacoes_aprovadas'], [1])
+        self.assertEqual(dados['series']['latencia_aprovacao'], [6 * 3600.0])
+
+
+class AnaliseCarteiraTests(SimpleTestCase):
+    """Cálculos de meuapp/analytics.py sobre arrays montados à mão"""
+
+    HOJE = date(2024, 6, 1)
+
+    def dados(self):
+        datas = lambda *valores: np.array(valores, dtype='datetime64[D]')
+        return DadosPortfolio(
+            projetos=np.array([10, 20, 30, 40]),
+            status=np.array(['andamento', 'andamento', 'concluido', 'planejado']),
+            inicio=datas('2024-01-01', '2024-03-01', '2024-01-01', '2024-05-01'),
+            fim=datas('2024-05-22', '2024-06-10', '2024-02-01', '2024-12-01'),
+            # Equipe 4 sem projeto; equipe 5 sem membros
+            equipes=np.array([1, 2, 3, 4, 5]),
+            projeto_da_equipe=np.array([10, 10, 30, 0, 20]),
+            # Usuário 1 no projeto 10 por duas equipes e por participação direta
+            membros_equipe=np.array([1, 1, 2, 2, 3, 4, 4, 4, 4, 4, 4, 4]),
+            membros_usuario=np.array([1, 2, 1, 3, 1, 1, 2, 3, 4, 5, 6, 7]),
+            participacoes_usuario=np.array([1, 1, 2, 2]),
+            participacoes_projeto=np.array([10, 20, 20, 99]),
+        )
+
+    def test_prazos(self):
+        analise = analisar_portfolio(self.dados(), self.HOJE)
+        self.assertEqual(analise['atrasados'], [(10, 10)])
+        # Prazo em 9 dias; e planejado com início já vencido
+        self.assertEqual(analise['em_risco'], [(20, 9), (40, 183)])
+
+    def test_carga(self):
+        analise = analisar_portfolio(self.dados(), self.HOJE)
+        # Projeto concluído e projeto inexistente não contam; repetições contam uma vez
+        self.assertEqual(analise['mais_carregados'], [(1, 2), (2, 2), (3, 1)])
+        self.assertEqual(analise['distribuicao_carga'], [(1, 1), (2, 2)])
+
+    def test_equipes_e_linha_do_tempo(self):
+        analise = analisar_portfolio(self.dados(), self.HOJE)
+        self.assertEqual(analise['equipes_vazias'], 1)
+        self.assertEqual(analise['tamanho_mediana'], 2)
+        self.assertEqual(dict(analise['faixas_equipes'])['6–10'], 1)
+        self.assertEqual(analise['tamanho_maximo'], 7)
+        self.assertEqual((analise['pico_projetos'], analise['pico_data']), (3, date(2024, 5, 1)))
+        self.assertIn((self.HOJE, 2), analise['linha_do_tempo'])
+
+    def test_carteira_vazia(self):
+        inteiros, datas = np.array([], dtype=np.int64), np.array([], dtype='datetime64[D]')
+        vazio = DadosPortfolio(inteiros, np.array([], dtype=str), datas, datas, *[inteiros] * 6)
+        analise = analisar_portfolio(vazio, self.HOJE)
+        self.assertEqual(analise['total_atrasados'], 0)
+        self.assertEqual(analise['pico_projetos'], 0)
+
+
+class MontarEquipesTests(SimpleTestCase):
+
+    def test_equipes_equilibradas(self):
+        estudantes = [Candidato(i, i % 4, i < 3) for i in range(23)]
+        professores = [Candidato(100, 3, False), Candidato(101, 0, False)]
+        plano = montar_equipes(estudantes, professores, 5)
+
+        self.assertEqual(sorted(len(e.estudantes) for e in plano), [4, 4, 5, 5, 5])
+        self.assertEqual(sorted(pk for e in plano for pk in e.estudantes), list(range(23)))
+        cargas = [sum(pk % 4 for pk in e.estudantes) for e in plano]
+        self.assertLessEqual(max(cargas) - min(cargas), 1)
+        # Professor 101 (sem equipes) orienta mais; as cargas finais ficam próximas
+        orientadas = [e.professor for e in plano]
+        self.assertEqual((orientadas.count(100), orientadas.count(101)), (1, 4))
+        # Líderes: membros distintos que ainda não lideram (0, 1 e 2 já lideram)
+        lideres = [e.lider for e in plano]
+        self.assertEqual(len(set(lideres)), len(plano))
+        for equipe in plano:
+            self.assertIn(equipe.lider, equipe.estudantes)
+            self.assertGreaterEqual(equipe.lider, 3)
+
+    def test_sem_professores(self):
+        with self.assertRaises(FormacaoImpossivel):
+            montar_equipes([Candidato(1, 0, False)], [], 5)
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class MembrosEquipeApiTests(TestCase):
+    """Alterações incrementais de membros (If-Match e diferença de conjuntos)"""
+
+    def setUp(self):
+        self.dados = popular('m_', ESCALA_PEQUENA)
+        self.equipe = self.dados['equipe']
+        self.client.force_login(self.dados['coordenador'])
+        self.novo = Usuario.objects.create_user('m_novo', tipo='estudante', matricula='m_novo')
+        self.tabela = Equipe.membros.through._meta.db_table
+
+    def alterar(self, operacao, corpo, **cabecalhos):
+        url = reverse(f'equipe_membros_{operacao}', kwargs={'pk': self.equipe.pk})
+        return self.client.post(url, json.dumps(corpo), content_type='application/json', **cabecalhos)
+
+    def membros(self):
+        return set(self.equipe.membros.values_list('pk', flat=True))
+
+    def comandos(self, capturadas, comando):
+        """SQL dos INSERT/DELETE na tabela de membros (SQLite: INSERT OR IGNORE INTO)"""
+        return [
+            consulta['sql'] for consulta in capturadas
+            if consulta['sql'].startswith(comando) and f'"{self.tabela}"' in consulta['sql'].split('(')[0]
+        ]
+
+    def test_if_match_desatualizado(self):
+        etag = self.client.get(reverse('equipe_membros', kwargs={'pk': self.equipe.pk}))['ETag']
+        resposta = self.alterar('adicionar', {'usuarios': [self.novo.pk]}, HTTP_IF_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+        # A mesma ETag de antes agora está desatualizada: nada é removido
+        resposta = self.alterar('remover', {'usuarios': [self.novo.pk]}, HTTP_IF_MATCH=etag)
+        self.assertEqual(resposta.status_code, 412)
+        self.assertFalse(resposta.json()['success'])
+        self.assertIn(self.novo.pk, self.membros())
+
+    def test_aplica_apenas_a_diferenca(self):
+        estudante = self.dados['estudante'].pk
+        with CaptureQueriesContext(connection) as capturadas:
+            resposta = self.alterar('adicionar', {'usuarios': [estudante, self.novo.pk]})
+        self.assertEqual(resposta.json()['adicionados'], [self.novo.pk])
+        [insercao] = self.comandos(capturadas, 'INSERT')
+        self.assertIn(f'VALUES ({self.equipe.pk}, {self.novo.pk})', insercao)
+        self.assertNotIn(f'{estudante})', insercao)
+        self.assertFalse(self.comandos(capturadas, 'DELETE'))
+
+        fora = self.dados['coordenador'].pk
+        with CaptureQueriesContext(connection) as capturadas:
+            resposta = self.alterar('remover', {'usuarios': [self.novo.pk, fora]})
+        self.assertEqual(resposta.json()['removidos'], [self.novo.pk])
+        [remocao] = self.comandos(capturadas, 'DELETE')
+        self.assertIn(f'IN ({self.novo.pk})', remocao)
+        self.assertFalse(self.comandos(capturadas, 'INSERT'))
+
+    def test_usuarios_precisam_ser_ids(self):
+        antes = self.membros()
+        for corpo in ({'usuarios': str(self.novo.pk)}, {'usuarios': [str(self.novo.pk)]},
+                      {'usuarios': [[self.novo.pk]]}, {'usuarios': [True]}, {'usuarios': [1.5]}, [self.novo.pk]):
+            with self.subTest(corpo=corpo):
+                self.assertEqual(self.alterar('adicionar', corpo).status_code, 400)
+        self.assertEqual(self.membros(), antes)
+
+    def test_lider_nao_pode_ser_removido(self):
+        lider = self.dados['professor'].pk
+        resposta = self.alterar('remover', {'usuarios': [lider]})
+        self.assertEqual(resposta.status_code, 400)
+        self.assertIn(lider, self.membros())
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class AutocompleteUsuariosTests(TestCase):
+    """Busca por prefixo do autocomplete de usuários e seus índices (migração 0011)"""
+
+    def setUp(self):
+        self.dados = popular('u_', ESCALA_PEQUENA)
+        self.client.force_login(self.dados['coordenador'])
+
+    def buscar(self, termo):
+        with CaptureQueriesContext(connection) as capturadas:
+            resposta = self.client.get(reverse('usuario_autocomplete'), {'q': termo})
+        [busca] = [consulta['sql'] for consulta in capturadas if 'LIKE' in consulta['sql']]
+        return resposta.json()['results'], busca
+
+    def test_prefixo_sem_diferenciar_maiusculas(self):
+        resultados, _ = self.buscar('u_ALUNO')
+        self.assertEqual(len(resultados), ITENS_POR_ESCALA)
+        resultados, _ = self.buscar('aluno1')
+        self.assertEqual([r['text'] for r in resultados], ['Aluno1 (Estudante)'])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de consulta do SQLite')
+    def test_usa_indices_de_prefixo(self):
+        _, busca = self.buscar('al')
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {busca}')
+            plano = ' '.join(linha[-1] for linha in cursor.fetchall())
+        for coluna in ('first_name', 'last_name', 'username', 'matricula'):
+            self.assertIn(f'meuapp_usuario_{coluna}_prefixo', plano)
+
+
+@override_settings(**CONFIGURACOES_TESTE, SESSION_REFRESH_INTERVAL=3600)
+class SessoesMensagensTests(TestCase):
+    """Sessões cached_db no cache "sessions" e mensagens em cookie (FallbackStorage)"""
+
+    def setUp(self):
+        caches['sessions'].clear()
+        Usuario.objects.create_user('s_usuario', password='senha', tipo='estudante', matricula='s_usuario')
+
+    def entrar(self):
+        resposta = self.client.post(reverse('login'), {'username': 's_usuario', 'password': 'senha'})
+        self.assertRedirects(resposta, reverse('dashboard'), fetch_redirect_response=False)
+        return resposta
+
+    def escritas_de_sessao(self, url):
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [
+            consulta['sql'] for consulta in capturadas
+            if '"django_session"' in consulta['sql'] and not consulta['sql'].startswith('SELECT')
+        ]
+
+    def test_sessao_lida_do_cache(self):
+        self.entrar()
+        chave = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.assertIsNotNone(caches['sessions'].get(f'django.contrib.sessions.cached_db{chave}'))
+        with CaptureQueriesContext(connection) as capturadas:
+            self.assertEqual(self.client.get(reverse('perfil')).status_code, 200)
+        self.assertFalse([consulta for consulta in capturadas if '"django_session"' in consulta['sql']])
+
+    def test_renovacao_no_maximo_uma_vez_por_intervalo(self):
+        self.entrar()
+        self.escritas_de_sessao(reverse('perfil'))
+        self.assertEqual(self.escritas_de_sessao(reverse('perfil')), [])
+
+        # Última renovação há mais de SESSION_REFRESH_INTERVAL: a sessão é regravada
+        sessao = self.client.session
+        sessao[SessionRefreshMiddleware.CHAVE] = int(time.time()) - 3601
+        sessao.save()
+        self.assertTrue(self.escritas_de_sessao(reverse('perfil')))
+
+    def test_mensagens_em_cookie(self):
+        resposta = self.entrar()
+        self.assertIn('messages', resposta.cookies)
+        self.assertNotIn('_messages', self.client.session)
+        self.assertContains(self.client.get(reverse('perfil')), 'Bem-vindo')
+
+    def test_mensagens_grandes_vao_para_a_sessao(self):
+        request = RequestFactory().get('/')
+        SessionMiddleware(lambda request: HttpResponse()).process_request(request)
+        armazenamento = FallbackStorage(request)
+        # Texto aleatório: o cookie é comprimido
+        for _ in range(10):
+            armazenamento.add(constants.INFO, os.urandom(250).hex())
+        armazenamento.update(HttpResponse())
+        # O que não coube no cookie (~2 KB) ficou na sessão
+        self.assertTrue(request.session.get('_messages'))
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class EventosSolicitacoesTests(TestCase):
+    """Eventos das solicitações de cadastro: SSE (ASGI) e resposta imediata (WSGI)"""
+
+    def setUp(self):
+        self.coordenador = Usuario.objects.create_user('e_coordenador', tipo='coordenador', matricula='e_coord')
+        self.ultimo = eventos.backend().ultimo_id(eventos.CANAL_SOLICITACOES)
+
+    def criar_solicitacao(self):
+        # Os eventos são publicados depois do commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return SolicitacaoCadastro.objects.create(
+                nome_completo='Nova Pessoa', email='e_nova@devlab.test', data_nascimento=date(2000, 1, 1),
+                senha_hash='!', matricula='e_nova',
+            )
+
+    @override_settings(EVENTOS_LONGPOLL_TIMEOUT=60)
+    def test_wsgi_responde_na_hora(self):
+        self.criar_solicitacao()
+        self.client.force_login(self.coordenador)
+        inicio = time.monotonic()
+        resposta = self.client.get(reverse('solicitacoes_eventos'), HTTP_LAST_EVENT_ID=str(self.ultimo))
+        self.assertFalse(resposta.streaming)
+        self.assertIn('event: criada', resposta.content.decode())
+        self.assertIn('e_nova@devlab.test', resposta.content.decode())
+
+        dados = self.client.get(reverse('solicitacoes_eventos_poll'), {'ultimo': self.ultimo}).json()
+        self.assertEqual([evento['tipo'] for evento in dados['eventos']], ['criada'])
+        self.assertEqual(dados['intervalo'], settings.EVENTOS_INTERVALO_WSGI)
+        # Sem eventos novos, o long-polling também não espera (sob ASGI seriam 60 s)
+        dados = self.client.get(reverse('solicitacoes_eventos_poll'), {'ultimo': dados['ultimo']}).json()
+        self.assertEqual(dados['eventos'], [])
+        self.assertLess(time.monotonic() - inicio, 30)
+
+    def test_cache_backend_espera_lacunas(self):
+        cache.clear()
+        backend = eventos.CacheBackend()
+        canal = 'teste'
+        primeiro = backend.publicar(canal, {'tipo': 'a'})
+        # Outro processo reservou o id seguinte e ainda não gravou o evento
+        reservado = cache.incr(backend.CHAVE_ID.format(canal))
+        backend.publicar(canal, {'tipo': 'c'})
+        self.assertEqual([e['tipo'] for e in backend.desde(canal, 0)], ['a'])
+
+        cache.set(backend.CHAVE_EVENTO.format(canal, reservado), (time.time(), dict(tipo='b', id=reservado)))
+        self.assertEqual([e['tipo'] for e in backend.desde(canal, primeiro['id'])], ['b', 'c'])
+
+        # Lacuna que não foi preenchida a tempo: evento perdido, pulado
+        cache.delete(backend.CHAVE_EVENTO.format(canal, reservado))
+        with mock.patch('time.time', return_value=time.time() + backend.ESPERA_LACUNA + 1):
+            self.assertEqual([e['tipo'] for e in backend.desde(canal, primeiro['id'])], ['c'])
+
+    async def test_sse_emite_evento_apos_gravar(self):
+        await sync_to_async(self.async_client.force_login)(self.coordenador)
+        resposta = await self.async_client.get(reverse('solicitacoes_eventos'))
+        self.assertTrue(resposta.streaming)
+        stream = resposta.streaming_content.__aiter__()
+        self.assertIn(b'retry:', await stream.__anext__())
+
+        solicitacao = await sync_to_async(self.criar_solicitacao)()
+        bloco = (await asyncio.wait_for(stream.__anext__(), 5)).decode()
+        self.assertIn('event: criada', bloco)
+        self.assertIn(f'"solicitacao": {solicitacao.pk}', bloco)
+        await stream.aclose()
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class FormarEquipesViewTests(TestCase):
+
+    def test_formar_e_gravar(self):
+        dados = popular('f_', ESCALA_PEQUENA)
+        novos = Usuario.objects.bulk_create([
+            Usuario(username=f'turma{i}', tipo='estudante', matricula=f'2025{i:03d}', password='!')
+            for i in range(10)
+        ])
+        # Já lidera uma equipe (de outro projeto): não pode ser líder de novo
+        Equipe.objects.create(nome='Outra', projeto=dados['projeto'], lider=novos[0])
+        projeto = Projeto.objects.create(
+            titulo='Projeto da turma', descricao='', cliente='', status='andamento',
+            data_inicio=date(2025, 1, 1), data_fim_prevista=date(2025, 12, 31),
+        )
+        self.client.force_login(dados['coordenador'])
+        formulario = {
+            'projeto': projeto.pk, 'tamanho': 4, 'prefixo_matricula': '2025', 'nome_base': 'Turma',
+        }
+
+        resposta = self.client.post(reverse('equipe_formar'), dict(formulario, simular='on'))
+        self.assertEqual(len(resposta.context['equipes_planejadas']), 3)
+        self.assertFalse(Equipe.objects.filter(nome__startswith='Turma').exists())
+
+        resposta = self.client.post(reverse('equipe_formar'), formulario)
+        self.assertRedirects(resposta, reverse('equipe_lista'))
+        equipes = Equipe.objects.filter(nome__startswith='Turma').prefetch_related('membros')
+        self.assertEqual(len(equipes), 3)
+        for equipe in equipes:
+            membros = {membro.pk for membro in equipe.membros.all()}
+            self.assertIn(dados['professor'].pk, membros)
+            self.assertIn(equipe.lider_id, membros)
+            self.assertNotEqual(equipe.lider_id, novos[0].pk)
+
+        # Todos já estão em equipes do projeto: ninguém sobra para uma nova rodada
+        resposta = self.client.post(reverse('equipe_formar'), formulario)
+        self.assertFormError(resposta.context['form'], None, 'Nenhum estudante disponível para formar equipes.')
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class CacheLocalTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lru_e_ttl(self):
+        local = CacheLocal('testes.lru', tamanho=2, ttl=60)
+        for chave in 'abac':
+            local.obter(chave, lambda: chave.upper())
+        # "b" foi o menos usado recentemente
+        self.assertEqual(local.obter('b', lambda: 'novo'), 'novo')
+        self.assertEqual(local.obter('c', lambda: 'novo'), 'C')
+        self.assertEqual(local.estatisticas()['descartados'], 2)
+
+        expira = CacheLocal('testes.ttl', ttl=0)
+        expira.obter('a', lambda: 1)
+        self.assertEqual(expira.obter('a', lambda: 2), 2)
+        self.assertEqual(expira.estatisticas()['expirados'], 1)
+
+    def test_single_flight(self):
+        chamadas = []
+
+        @cache_local(ttl=60)
+        def lento(chave):
+            chamadas.append(chave)
+            time.sleep(0.05)
+            return chave * 2
+
+        inicio = threading.Barrier(8)
+        resultados = []
+
+        def consultar():
+            inicio.wait()
+            resultados.append(lento(21))
+
+        threads = [threading.Thread(target=consultar) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(chamadas, [21])
+        self.assertEqual(resultados, [42] * 8)
+        self.assertEqual(lento.cache_local.estatisticas()['faltas'], 1)
+
+    def test_camada_na_frente_do_cache_django(self):
+        # Dois processos: caches locais separados, mesmo cache do Django
+        processo_a = CacheLocal('testes.compartilhado', compartilhado=True)
+        processo_b = CacheLocal('testes.compartilhado', compartilhado=True)
+        self.assertEqual(processo_a.obter(('x',), lambda: 1), 1)
+        self.assertEqual(processo_b.obter(('x',), lambda: 2), 1)
+        self.assertEqual(processo_b.estatisticas()['acertos_django'], 1)
+
+        # Invalidar em um processo troca a versão para os dois
+        processo_b.limpar()
+        self.assertEqual(processo_a.obter(('x',), lambda: 3), 3)
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class CacheLocalInvalidacaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        limpar_caches_locais()
+
+    def test_aprovacoes_recentes(self):
+        self.assertEqual(views._aprovacoes_recentes(), [])
+        with self.assertNumQueries(0):
+            views._aprovacoes_recentes()
+        solicitacao = SolicitacaoCadastro.objects.create(
+            nome_completo='Nova Aluna', email='nova@devlab.test', data_nascimento=date(2000, 1, 1),
+            senha_hash='!', matricula='n1', status='aprovada', data_aprovacao=timezone.now(),
+        )
+        self.assertEqual(views._aprovacoes_recentes(), [solicitacao])
+
+    @override_settings(SOLICITACOES_TOTAIS_TIMEOUT=60)
+    def test_totais_solicitacoes_expiram(self):
+        self.assertEqual(totais_solicitacoes()['pendente'], 0)
+        # bulk_create() não dispara sinais: só o tempo de vida corrige os totais
+        SolicitacaoCadastro.objects.bulk_create([SolicitacaoCadastro(
+            nome_completo='Sem sinal', email='sinal@devlab.test', data_nascimento=date(2000, 1, 1),
+            senha_hash='!', matricula='s1',
+        )])
+        self.assertEqual(totais_solicitacoes()['pendente'], 0)
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(totais_solicitacoes()['pendente'], 1)
+
+    def cache_em_arquivo(self):
+        """Cache do Django compartilhado entre processos, como o padrão do settings.py"""
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio)
+        configuracao = override_settings(CACHES=dict(CONFIGURACOES_TESTE['CACHES'], default={
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': diretorio,
+        }))
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_usuario_da_sessao(self):
+        self.cache_em_arquivo()
+        usuario = Usuario.objects.create_user('cacheado', tipo='professor', first_name='Antes')
+        outro = Usuario.objects.create_user('outro', tipo='estudante')
+        backend = UsuarioEmCacheBackend()
+        primeiro = backend.get_user(usuario.pk)
+        with self.assertNumQueries(0):
+            segundo = backend.get_user(usuario.pk)
+        # Cada request recebe sua cópia
+        self.assertIsNot(primeiro, segundo)
+        segundo.first_name = 'Alterado sem gravar'
+        self.assertEqual(backend.get_user(usuario.pk).first_name, 'Antes')
+
+        # O last_login de cada login e a gravação de outro usuário não descartam nada
+        update_last_login(None, usuario)
+        outro.save()
+        with self.assertNumQueries(0):
+            backend.get_user(usuario.pk)
+
+        # Outro processo: cache local vazio, mesma versão no cache do Django
+        usuario_por_pk.cache_local._itens.clear()
+        with self.assertNumQueries(0):
+            backend.get_user(usuario.pk)
+
+        usuario.first_name = 'Depois'
+        usuario.is_active = False
+        usuario.save()
+        self.assertIsNone(backend.get_user(usuario.pk))
+        # A troca de versão vale também para o "outro processo"
+        usuario_por_pk.cache_local._itens.clear()
+        self.assertIsNone(backend.get_user(usuario.pk))
+
+    def test_usuario_sem_cache_compartilhado(self):
+        # LocMemCache é por processo: o usuário é lido do banco a cada request
+        usuario = Usuario.objects.create_user('por_processo', tipo='professor')
+        backend = UsuarioEmCacheBackend()
+        backend.get_user(usuario.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(backend.get_user(usuario.pk), usuario)
+
+    def test_sessao_do_model_backend(self):
+        # Sessões criadas antes do backend em cache continuam válidas
+        usuario = Usuario.objects.create_user('antigo', tipo='professor')
+        self.client.force_login(usuario, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('perfil')).wsgi_request.user, usuario)
+
+    def test_sessao_do_benchmark_http(self):
+        # A sessão criada pelo benchmark_http precisa ser aceita pelo backend em uso
+        usuario = Usuario.objects.create_user('medido', tipo='professor')
+        nome, chave = BenchmarkHttp().criar_sessao('medido').split('=')
+        self.client.cookies[nome] = chave
+        resposta = self.client.get(reverse('perfil'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.wsgi_request.user, usuario)
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class FragmentosDashboardTests(TestCase):
+    """Fragmentos {% cache %} dos dashboards de professor e estudante"""
+
+    def setUp(self):
+        cache.clear()
+        limpar_caches_locais()
+        self.dados = popular('d_', ESCALA_PEQUENA)
+        self.outro = Usuario.objects.create_user('d_outro', tipo='estudante', matricula='d_outro')
+
+    def dashboard(self, usuario):
+        self.client.force_login(usuario)
+        resposta = self.client.get(reverse('estudante_dashboard'))
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.content.decode()
+
+    def test_todos_projetos_compartilhado(self):
+        self.dashboard(self.dados['estudante'])
+        chave = make_template_fragment_key('aluno_todos_projetos', [versao_catalogo()])
+        self.assertIsNotNone(cache.get(chave))
+
+        # Mesmo fragmento para outro usuário, sem os projetos do primeiro destacados
+        html = self.dashboard(self.outro)
+        self.assertIn(f'data-projeto="{self.dados["projeto"].pk}"', html)
+        self.assertNotIn('table-primary', html)
+        self.assertNotIn('data-meu-projeto', html)
+        self.assertIn(f'data-meu-projeto="{self.dados["projeto"].pk}"', self.dashboard(self.dados['estudante']))
+
+    def test_alteracao_do_catalogo(self):
+        self.assertNotIn('d_Novo projeto', self.dashboard(self.outro))
+        Projeto.objects.create(
+            titulo='d_Novo projeto', descricao='', cliente='', status='planejado',
+            data_inicio=date(2025, 1, 1), data_fim_prevista=date(2025, 12, 31),
+        )
+        self.assertIn('d_Novo projeto', self.dashboard(self.outro))
+
+    def test_alteracao_de_membros(self):
+        # O projeto principal tem os alunos, o professor e o estudante nas equipes
+        self.assertIn('5 participantes', self.dashboard(self.outro))
+        self.dados['equipe'].membros.add(self.outro)
+        html = self.dashboard(self.outro)
+        self.assertIn('6 participantes', html)
+        self.assertIn(f'data-meu-projeto="{self.dados["projeto"].pk}"', html)
+
+    def test_equipe_liderada_so_sem_cache(self):
+        equipe = self.dados['equipe']
+        equipe.lider = self.outro
+        equipe.save()
+        self.assertIn('Equipe sob sua Liderança', self.dashboard(self.outro))
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertIn(equipe.nome, self.dashboard(self.outro))
+        self.assertFalse([c['sql'] for c in consultas if '"lider_id" =' in c['sql']])
+
+        # Fragmento expirado entre a verificação e a renderização: consultada ali
+        cache.clear()
+        with mock.patch.object(views, '_fragmentos_em_cache', return_value=True):
+            self.assertIn('Equipe sob sua Liderança', self.dashboard(self.outro))
+            self.assertNotIn('Equipe sob sua Liderança', self.dashboard(self.dados['estudante']))
+
+    @override_settings(CACHE_VERSOES_TIMEOUT=60)
+    def test_versoes_expiram(self):
+        cache.clear()
+        versoes = versoes_dashboard(self.outro.pk)
+        self.assertEqual(versoes_dashboard(self.outro.pk), versoes)
+        # Uma versão expirada vira outra nova, nunca uma já usada
+        with mock.patch('time.time', return_value=time.time() + 61):
+            novas = versoes_dashboard(self.outro.pk)
+        self.assertNotEqual(novas[0], versoes[0])
+        self.assertNotEqual(novas[1], versoes[1])
+
+
+def ler_metricas(texto):
+    """Interpreta o formato de exposição do Prometheus: {'nome{rotulos}': valor}"""
+    amostras = {}
+    for linha in texto.splitlines():
+        if linha and not linha.startswith('#'):
+            serie, valor = linha.rsplit(' ', 1)
+            amostras[serie] = float(valor)
+    return amostras
+
+
+@override_settings(**CONFIGURACOES_TESTE, METRICAS_PERMITIR_LOCAL=True)
+class MetricasTests(TestCase):
+    """/metrics lido como o Prometheus leria"""
+
+    def setUp(self):
+        cache.clear()
+        limpar_caches_locais()
+        metricas.registro.limpar()
+
+    def coletar(self, **kwargs):
+        resposta = self.client.get(reverse('metricas'), **kwargs)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return ler_metricas(resposta.content.decode())
+
+    def test_requisicoes_e_consultas_por_rota(self):
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+        amostras = self.coletar()
+        self.assertEqual(amostras['devlab_requisicoes_total{metodo="GET",status="200",view="home"}'], 2)
+        self.assertEqual(amostras['devlab_requisicao_duracao_segundos_count{view="home"}'], 2)
+        self.assertEqual(amostras['devlab_requisicao_duracao_segundos_bucket{view="home",le="+Inf"}'], 2)
+        # A segunda leitura das aprovações vem do cache local
+        self.assertEqual(amostras['devlab_consultas_banco_total{view="home"}'], 1)
+        local = views._aprovacoes_recentes.cache_local
+        taxa = f'devlab_cache_local_taxa_acerto{{cache="{local.nome}"}}'
+        self.assertGreater(amostras[taxa], 0)
+        self.assertEqual(
+            amostras[f'devlab_cache_local_total{{cache="{local.nome}",resultado="acerto"}}'],
+            local.contadores['acertos'] + local.contadores['acertos_django'],
+        )
+
+    def test_logins_e_solicitacoes(self):
+        Usuario.objects.create_user('metrica', password='senha-correta', tipo='estudante')
+        self.client.post(reverse('login'), {'username': 'metrica', 'password': 'errada'})
+        self.client.post(reverse('login'), {'username': 'metrica', 'password': 'senha-correta'})
+        self.client.logout()
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitacao = SolicitacaoCadastro.objects.create(
+                nome_completo='Nova', email='nova@devlab.test', data_nascimento=date(2000, 1, 1),
+                senha_hash='!', matricula='m1',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitacao.status = 'aprovada'
+            solicitacao.save()
+        amostras = self.coletar()
+        self.assertEqual(amostras['devlab_logins_total{resultado="falha"}'], 1)
+        self.assertEqual(amostras['devlab_logins_total{resultado="sucesso"}'], 1)
+        self.assertEqual(amostras['devlab_solicitacoes_total{status="criada"}'], 1)
+        self.assertEqual(amostras['devlab_solicitacoes_total{status="aprovada"}'], 1)
+        self.assertEqual(amostras['devlab_solicitacoes_pendentes'], 0)
+
+    @override_settings(
+        EMAIL_BACKEND='meuapp.metricas.EmailBackendMedido',
+        EMAIL_BACKEND_MEDIDO='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_envio_de_emails(self):
+        send_mail('Assunto', 'Corpo', 'devlab@devlab.test', ['a@devlab.test'])
+        amostras = self.coletar()
+        self.assertEqual(amostras['devlab_emails_total{resultado="enviado"}'], 1)
+        self.assertEqual(amostras['devlab_email_envio_duracao_segundos_count'], 1)
+        self.assertEqual(amostras['devlab_emails_em_envio'], 0)
+
+    def test_soma_threads_e_processos(self):
+        threads = [
+            threading.Thread(target=metricas.incrementar, args=('devlab_logins_total',), kwargs={'resultado': 'falha'})
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(METRICAS_DIR=diretorio):
+            # Cópia gravada por outro processo
+            outro = {('devlab_logins_total', (('resultado', 'falha'),)): 3}
+            with open(os.path.join(diretorio, '1-1.json'), 'w') as arquivo:
+                json.dump(metricas._serializar(outro), arquivo)
+            # A cópia do próprio processo não é somada de novo
+            metricas.gravar_processo()
+            self.assertEqual(len(os.listdir(diretorio)), 2)
+            amostras = self.coletar()
+        self.assertEqual(amostras['devlab_logins_total{resultado="falha"}'], 8)
+
+    @override_settings(METRICAS_TOKEN='segredo')
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        self.coletar(HTTP_AUTHORIZATION='Bearer segredo')
+
+    @override_settings(METRICAS_PERMITIR_LOCAL=False)
+    def test_sem_token_nega_por_padrao(self):
+        # Atrás de um proxy local, todo request chega de 127.0.0.1
+        self.assertEqual(self.client.get(reverse('metricas'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+
+def _ocupado(segundos):
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        pass
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class PerfiladorTests(TestCase):
+    """Perfis de amostragem dos requests lentos (PerfilMiddleware)"""
+
+    def setUp(self):
+        temporario = tempfile.TemporaryDirectory()
+        self.addCleanup(temporario.cleanup)
+        self.diretorio = temporario.name
+        configuracao = override_settings(PERFIL_DIR=self.diretorio, PERFIL_INTERVALO_MS=1)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_amostra_as_threads_do_perfil(self):
+        thread = threading.Thread(target=_ocupado, args=(0.1,))
+        thread.start()
+        perfil = perfilador.iniciar(perfilador.Perfil(threads=[thread.ident]))
+        thread.join()
+        duracao = perfilador.encerrar(perfil)
+        self.assertGreater(perfil.total_amostras, 0)
+        self.assertTrue(all(pilha[-1] is _ocupado.__code__ for pilha in perfil.pilhas))
+
+        perfilador.gravar(perfil, duracao, view='teste', papel='-', consultas=0)
+        [gravado] = perfilador.listar()
+        self.assertEqual(gravado['view'], 'teste')
+        self.assertEqual(gravado['amostras'], perfil.total_amostras)
+        pilhas = perfilador.ler_pilhas(gravado)
+        self.assertEqual(sum(pilhas.values()), perfil.total_amostras)
+        self.assertTrue(all(pilha[-1].startswith('_ocupado (devlab') for pilha in pilhas))
+
+    def test_nome_sem_co_qualname(self):
+        # Python 3.8 a 3.10: os objetos de código não têm co_qualname
+        class Codigo:
+            co_filename = _ocupado.__code__.co_filename
+            co_name = 'antigo'
+            co_firstlineno = 7
+
+        self.assertTrue(perfilador._nome(Codigo()).startswith('antigo (devlab'))
+
+    def test_mantem_os_mais_novos(self):
+        perfil = perfilador.Perfil()
+        for view in ('a', 'b', 'c'):
+            perfilador.gravar(perfil, 1, maximo=2, view=view)
+        self.assertEqual([p['view'] for p in perfilador.listar()], ['b', 'c'])
+        self.assertEqual(len(os.listdir(self.diretorio)), 4)
+
+    def test_grava_requests_acima_do_limite(self):
+        # Os middlewares são montados no primeiro request de cada client
+        with override_settings(PERFIL_LIMITE_MS=10000):
+            self.client_class().get(reverse('home'))
+        self.assertEqual(perfilador.listar(), [])
+
+        coordenador = Usuario.objects.create_user('perfil', password='senha', tipo='coordenador')
+        self.client.force_login(coordenador)
+        with override_settings(PERFIL_LIMITE_MS=0.001), self.assertLogs('meuapp.middleware', 'WARNING'):
+            self.client.get(reverse('usuario_autocomplete'), {'q': 'per'})
+        [gravado] = perfilador.listar()
+        self.assertEqual(gravado['view'], 'usuario_autocomplete')
+        self.assertEqual(gravado['papel'], 'coordenador')
+        self.assertEqual(gravado['status'], 200)
+        self.assertGreater(gravado['consultas'], 0)
+
+        saida = StringIO()
+        call_command('perfis_lentos', stdout=saida)
+        self.assertIn('usuario_autocomplete', saida.getvalue())
+        call_command('perfis_lentos', limpar=True, stdout=StringIO())
+        self.assertEqual(os.listdir(self.diretorio), [])
+
+    @override_settings(PERFIL_LIMITE_MS=0.001)
+    async def test_view_assincrona(self):
+        with self.assertLogs('meuapp.middleware', 'WARNING'):
+            await self.async_client.get(reverse('visitante'))
+        [gravado] = perfilador.listar()
+        self.assertEqual(gravado['view'], 'visitante')
+        self.assertEqual(gravado['papel'], 'anonimo')
+
+
+@override_settings(
+    **CONFIGURACOES_TESTE,
+    LOGIN_RAJADA_IP=100, LOGIN_POR_MINUTO_IP=60, LOGIN_BLOQUEIO_FALHAS_IP=100,
+    LOGIN_RAJADA_USUARIO=3, LOGIN_POR_MINUTO_USUARIO=1, LOGIN_BLOQUEIO_FALHAS_USUARIO=100,
+    LOGIN_BLOQUEIO_SEGUNDOS=30, LOGIN_BLOQUEIO_MAXIMO=3600,
+)
+class LimiteLoginTests(TestCase):
+    """Limite de tentativas de login (meuapp/limites.py)"""
+
+    def setUp(self):
+        cache.clear()
+        metricas.registro.limpar()
+        Usuario.objects.create_user('alvo', 'alvo@devlab.test', 'senha-correta', tipo='estudante')
+
+    def entrar(self, senha, usuario='alvo', **extra):
+        return self.client.post(reverse('login'), {'username': usuario, 'password': senha}, **extra)
+
+    def test_balde_por_identificador(self):
+        for _ in range(3):
+            self.assertEqual(self.entrar('errada').status_code, 200)
+        # Recusada antes de buscar o usuário e calcular o hash, mesmo com a senha certa
+        with self.assertNumQueries(0):
+            resposta = self.entrar('senha-correta', usuario='ALVO ')
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(resposta['Retry-After'], '60')
+        self.assertEqual(metricas.registro.valores()[('devlab_logins_total', (('resultado', 'bloqueado'),))], 1)
+        # Outro identificador do mesmo IP continua livre
+        self.assertEqual(self.entrar('errada', usuario='outro').status_code, 200)
+        # Um minuto depois há uma ficha nova
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertEqual(self.entrar('senha-correta').status_code, 302)
+
+    @override_settings(LOGIN_RAJADA_USUARIO=100, LOGIN_POR_MINUTO_USUARIO=60, LOGIN_BLOQUEIO_FALHAS_USUARIO=2)
+    def test_bloqueio_progressivo(self):
+        agora = time.time()
+        self.entrar('errada')
+        self.entrar('errada')
+        resposta = self.entrar('senha-correta')
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(resposta['Retry-After'], '30')
+
+        # Cada falha depois do bloqueio dobra o próximo
+        with mock.patch('time.time', return_value=agora + 31):
+            self.assertEqual(self.entrar('errada').status_code, 200)
+            self.assertEqual(self.entrar('senha-correta')['Retry-After'], '60')
+
+        # O login correto zera as falhas do identificador
+        with mock.patch('time.time', return_value=agora + 92):
+            self.assertEqual(self.entrar('senha-correta').status_code, 302)
+            self.client.logout()
+            self.assertEqual(self.entrar('errada').status_code, 200)
+            self.assertEqual(self.entrar('errada').status_code, 200)
+
+    @override_settings(LOGIN_RAJADA_IP=2, LOGIN_IP_CABECALHO='HTTP_X_FORWARDED_FOR')
+    def test_balde_por_ip(self):
+        proxy = {'HTTP_X_FORWARDED_FOR': '203.0.113.7, 10.0.0.1'}
+        self.entrar('errada', usuario='a', **proxy)
+        self.entrar('errada', usuario='b', **proxy)
+        self.assertEqual(self.entrar('errada', usuario='c', **proxy).status_code, 429)
+        self.assertEqual(self.entrar('errada', usuario='c').status_code, 200)
+
+    @override_settings(LOGIN_POR_MINUTO_USUARIO=0)
+    def test_sem_reposicao(self):
+        agora = time.time()
+        for _ in range(3):
+            self.assertEqual(self.entrar('errada').status_code, 200)
+        resposta = self.entrar('senha-correta')
+        self.assertEqual(resposta.status_code, 429)
+        self.assertEqual(resposta['Retry-After'], '3600')
+        # Nenhuma ficha volta com o tempo, só quando o balde é esquecido
+        with mock.patch('time.time', return_value=agora + 3000):
+            self.assertEqual(self.entrar('senha-correta').status_code, 429)
+        with mock.patch('time.time', return_value=agora + 3601):
+            self.assertEqual(self.entrar('senha-correta').status_code, 302)
+
+    @override_settings(LOGIN_LIMITE_ATIVO=False)
+    def test_desligado(self):
+        for _ in range(5):
+            self.assertEqual(self.entrar('errada').status_code, 200)
+
+
+class AgendadorTests(TestCase):
+    """Leases e lotes de manage.py run_scheduler (meuapp/agendador.py)"""
+
+    def tarefa_em_lotes(self, itens, falhar_em=None):
+        """Tarefa de teste: processa ``itens`` de 2 em 2 a partir do cursor"""
+        def processar(cursor, lote):
+            inicio = int(cursor or 0)
+            for posicao in range(inicio, itens, lote):
+                if posicao == falhar_em:
+                    raise RuntimeError('falhou')
+                fim = min(posicao + lote, itens)
+                yield str(fim), fim - posicao
+        return agendador.Tarefa('teste', processar, intervalo=timedelta(hours=1))
+
+    def executar(self, tarefa, dono='a', **kwargs):
+        registro = agendador.adquirir(tarefa.nome, dono, **kwargs)
+        return registro and agendador.executar(tarefa, dono, registro, lote=2)
+
+    def test_lease_exclusivo(self):
+        agendador.preparar({'teste': self.tarefa_em_lotes(1)})
+        self.assertIsNotNone(agendador.adquirir('teste', 'a'))
+        self.assertIsNone(agendador.adquirir('teste', 'b'))
+        # Lease vencido (o processo "a" morreu): outro agendador assume
+        depois = timezone.now() + timedelta(seconds=settings.TAREFAS_LEASE + 1)
+        self.assertIsNotNone(agendador.adquirir('teste', 'b', agora=depois))
+        self.assertFalse(agendador.renovar('teste', 'a', '1'))
+
+    def test_lotes_continuam_do_cursor(self):
+        tarefa = self.tarefa_em_lotes(5)
+        agendador.preparar({'teste': tarefa})
+        with override_settings(TAREFAS_DURACAO_MAXIMA=-1):
+            self.assertEqual(self.executar(tarefa), ('incompleta', 2))
+        registro = TarefaAgendada.objects.get(nome='teste')
+        self.assertEqual((registro.cursor, registro.dono, registro.lease_ate), ('2', '', None))
+
+        self.assertEqual(self.executar(tarefa, dono='b'), ('ok', 3))
+        registro.refresh_from_db()
+        self.assertEqual(registro.cursor, '')
+        self.assertGreater(registro.proxima_execucao, timezone.now() + timedelta(minutes=59))
+        # Fora do horário só com forcar
+        self.assertIsNone(self.executar(tarefa))
+        self.assertEqual(self.executar(tarefa, forcar=True), ('ok', 5))
+
+    def test_erro_guarda_cursor_e_espera(self):
+        tarefa = self.tarefa_em_lotes(6, falhar_em=4)
+        agendador.preparar({'teste': tarefa})
+        with self.assertLogs('meuapp.agendador', 'ERROR'):
+            self.assertEqual(self.executar(tarefa), ('erro', 4))
+        registro = TarefaAgendada.objects.get(nome='teste')
+        self.assertEqual((registro.ultimo_status, registro.cursor), ('erro', '4'))
+        self.assertIn('RuntimeError', registro.ultimo_erro)
+        self.assertGreater(registro.proxima_execucao, timezone.now())
+
+    def test_horario(self):
+        manha = timezone.make_aware(datetime(2026, 3, 10, 7, 0))
+        tarefa = agendador.Tarefa('teste', None, horario=manha.replace(hour=8).time())
+        self.assertEqual(timezone.localtime(tarefa.proxima(manha)).isoformat(), '2026-03-10T08:00:00-03:00')
+        noite = manha + timedelta(hours=12)
+        self.assertEqual(timezone.localtime(tarefa.proxima(noite)).isoformat(), '2026-03-11T08:00:00-03:00')
+
+
+@override_settings(**CONFIGURACOES_TESTE, TAREFAS_LOTE=1)
+class TarefasPeriodicasTests(TestCase):
+    """Tarefas de meuapp/tarefas.py, executadas pelo comando run_scheduler"""
+
+    def setUp(self):
+        self.dados = popular('t_', ESCALA_PEQUENA)
+
+    def rodar(self, tarefa):
+        saida = StringIO()
+        call_command('run_scheduler', tarefa=[tarefa], forcar=True, stdout=saida)
+        return saida.getvalue()
+
+    def test_expirar_solicitacoes(self):
+        antiga = timezone.now() - timedelta(days=31)
+        SolicitacaoCadastro.objects.filter(pk=self.dados['solicitacao'].pk).update(data_solicitacao=antiga)
+        self.assertEqual(totais_solicitacoes()['pendente'], 1)
+
+        self.assertIn('expirar_solicitacoes: ok, 1 item(ns)', self.rodar('expirar_solicitacoes'))
+        solicitacao = SolicitacaoCadastro.objects.get(pk=self.dados['solicitacao'].pk)
+        self.assertEqual(solicitacao.status, 'rejeitada')
+        self.assertIn('Expirada', solicitacao.motivo_rejeicao)
+        # Gravada com save(): os sinais invalidaram os totais em cache
+        self.assertEqual(totais_solicitacoes()['pendente'], 0)
+
+    def prazos_proximos(self):
+        """Projeto principal e outro em andamento vencendo em 3 dias; o coordenador lidera uma equipe do segundo"""
+        prazo = timezone.localdate() + timedelta(days=3)
+        outro = Projeto.objects.exclude(pk=self.dados['projeto'].pk).filter(status='andamento').get()
+        Projeto.objects.filter(pk__in=[self.dados['projeto'].pk, outro.pk]).update(data_fim_prevista=prazo)
+        equipe = Equipe.objects.create(nome='t_Outra', projeto=outro, lider=self.dados['coordenador'])
+        equipe.membros.add(self.dados['estudante'])
+        return outro
+
+    def test_resumos_em_uma_consulta(self):
+        outro = self.prazos_proximos()
+        # Membros e líderes, sem os alunos sem e-mail, agrupados em memória
+        with self.assertNumQueries(1):
+            resumos = lembretes.montar_resumos()
+        self.assertEqual(
+            [(resumo.nome, len(resumo.projetos)) for resumo in resumos],
+            [('Coordenador', 1), ('Professor', 1), ('Estudante', 2)],
+        )
+        self.assertEqual(resumos[0].projetos[0]['titulo'], outro.titulo)
+        self.assertEqual(resumos[2].projetos[0]['quando'], 'daqui a 3 dias')
+
+    def test_lembretes_um_email_por_pessoa(self):
+        outro = self.prazos_proximos()
+        mail.outbox = []
+
+        # Um destinatário por lote (TAREFAS_LOTE=1), todos pela mesma conexão
+        with mock.patch.object(locmem.EmailBackend, 'open', autospec=True) as abrir:
+            self.assertIn('lembretes_prazo: ok, 3 item(ns)', self.rodar('lembretes_prazo'))
+        abrir.assert_called_once()
+        mensagens = {mensagem.to[0]: mensagem for mensagem in mail.outbox}
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn(outro.titulo, mensagens['t_coordenador@devlab.test'].body)
+        self.assertIn('2 projeto(s)', mensagens['t_estudante@devlab.test'].subject)
+        self.assertIn('daqui a 3 dias', mensagens['t_estudante@devlab.test'].body)
+        self.assertIn('1 projeto(s)', mensagens['t_professor@devlab.test'].subject)
+
+    def test_limpar_sessoes(self):
+        Session.objects.bulk_create([
+            Session(session_key=f'expirada{i}', session_data='', expire_date=timezone.now() - timedelta(days=1))
+            for i in range(3)
+        ] + [Session(session_key='valida', session_data='', expire_date=timezone.now() + timedelta(days=1))])
+        self.assertIn('limpar_sessoes: ok, 3 item(ns)', self.rodar('limpar_sessoes'))
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['valida'])
+
+    def test_listar(self):
+        saida = StringIO()
+        call_command('run_scheduler', listar=True, stdout=saida)
+        for nome in ('expirar_solicitacoes', 'lembretes_prazo', 'limpar_sessoes', 'snapshot_stats', 'vacuo_sqlite'):
+            self.assertIn(nome, saida.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('run_scheduler', tarefa=['inexistente'], stdout=StringIO())
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class ArquivoTests(TestCase):
+    """Arquivo de projetos concluídos (meuapp/arquivo.py e arquivar_projetos)"""
+
+    def setUp(self):
+        self.dados = popular('a_', ESCALA_PEQUENA)
+        self.arquivado = self.dados['arquivado']
+
+    def test_arquivar_move_equipes_e_participacoes(self):
+        antigo = timezone.now() - timedelta(days=500)
+        concluido = Projeto.objects.filter(status='concluido').get()
+        Projeto.objects.filter(pk=concluido.pk).update(atualizado_em=antigo)
+        equipe = Equipe.objects.create(nome='a_Equipe Fechada', projeto=concluido)
+        equipe.membros.add(self.dados['professor'])
+
+        self.assertEqual(list(arquivo.candidatos(12)), [concluido])
+        self.assertEqual(list(arquivo.arquivar(arquivo.candidatos(12))), [(concluido.pk, 1)])
+        self.assertFalse(Projeto.objects.filter(pk=concluido.pk).exists())
+        self.assertFalse(Equipe.objects.filter(pk=equipe.pk).exists())
+        self.assertEqual(
+            list(EquipeArquivada.objects.get(pk=equipe.pk).membros.all()), [self.dados['professor']],
+        )
+        self.assertEqual(ParticipacaoArquivada.objects.filter(projeto=concluido.pk).count(), 2)
+        # Busca por título, equipe e nome de participante, sem diferenciar maiúsculas
+        self.assertEqual(list(arquivo.buscar('FECHADA professor')), [ProjetoArquivado.objects.get(pk=concluido.pk)])
+        self.assertIn(self.arquivado, arquivo.buscar('equipe antiga'))
+
+    def test_restaurar_recria_com_os_mesmos_pks(self):
+        equipe = self.arquivado.equipes.get()
+        membros = set(equipe.membros.values_list('pk', flat=True))
+
+        projeto, sem_lider = arquivo.restaurar(self.arquivado.pk)
+        self.assertEqual(sem_lider, [])
+        self.assertEqual(projeto.pk, self.arquivado.pk)
+        self.assertEqual(projeto.status, 'concluido')
+        restaurada = Equipe.objects.get(pk=equipe.pk)
+        self.assertEqual(restaurada.lider, self.dados['estudante'])
+        self.assertEqual(set(restaurada.membros.values_list('pk', flat=True)), membros)
+        self.assertEqual(ParticipacaoProjeto.objects.filter(projeto=projeto).count(), 2)
+        self.assertFalse(ProjetoArquivado.objects.filter(pk=self.arquivado.pk).exists())
+        # Restaurado agora: não volta ao arquivo na próxima execução
+        self.assertNotIn(projeto, arquivo.candidatos(12))
+
+    def test_restaurar_sem_lider_ocupado(self):
+        Equipe.objects.filter(pk=self.dados['equipe'].pk).update(lider=self.dados['estudante'])
+        saida = StringIO()
+        call_command('arquivar_projetos', restaurar=[self.arquivado.pk], stdout=saida)
+        self.assertIn('sem líder', saida.getvalue())
+        self.assertIsNone(Equipe.objects.get(projeto=self.arquivado.pk).lider)
+
+        with self.assertRaises(CommandError):
+            call_command('arquivar_projetos', restaurar=[self.arquivado.pk], stdout=StringIO())
+
+    def test_comando_simular(self):
+        Projeto.objects.filter(status='concluido').update(atualizado_em=timezone.now() - timedelta(days=500))
+        saida = StringIO()
+        call_command('arquivar_projetos', simular=True, stdout=saida)
+        self.assertIn('1 projeto(s)', saida.getvalue())
+        self.assertTrue(Projeto.objects.filter(status='concluido').exists())
+
+        call_command('arquivar_projetos', stdout=StringIO())
+        self.assertFalse(Projeto.objects.filter(status='concluido').exists())
+
+    @override_settings(ARQUIVO_POR_PAGINA=2)
+    def test_paginacao_com_empates(self):
+        # Mesmo título e mesma data: só o pk define a ordem entre as páginas
+        iguais = ProjetoArquivado.objects.bulk_create([
+            ProjetoArquivado(
+                id=900000 + i, titulo='a_Empate', descricao='', cliente='', data_inicio=date(2020, 1, 1),
+                data_fim_prevista=date(2020, 6, 30), criado_em=timezone.now(), atualizado_em=timezone.now(),
+                busca='a_empate',
+            )
+            for i in range(5)
+        ])
+        self.client.force_login(self.dados['estudante'])
+        vistos, pagina = [], 1
+        while pagina:
+            resposta = self.client.get(reverse('arquivo_lista'), {'q': 'a_empate', 'pagina': pagina})
+            vistos += [projeto.pk for projeto in resposta.context['projetos']]
+            pagina = resposta.context['proxima']
+        self.assertEqual(vistos, [projeto.pk for projeto in iguais])
+
+    def test_views(self):
+        self.client.force_login(self.dados['estudante'])
+        resposta = self.client.get(reverse('arquivo_lista'), {'q': 'antiga'})
+        self.assertContains(resposta, self.arquivado.titulo)
+        resposta = self.client.get(reverse('arquivo_detalhes', kwargs={'pk': self.arquivado.pk}))
+        self.assertContains(resposta, 'a_Equipe antiga')
+        # Só o coordenador restaura
+        url = reverse('arquivo_restaurar', kwargs={'pk': self.arquivado.pk})
+        self.assertEqual(self.client.post(url).status_code, 302)
+        self.assertTrue(ProjetoArquivado.objects.filter(pk=self.arquivado.pk).exists())
+
+        self.client.force_login(self.dados['coordenador'])
+        resposta = self.client.post(url)
+        self.assertRedirects(resposta, reverse('projeto_detalhes', kwargs={'pk': self.arquivado.pk}))
+        self.assertTrue(Projeto.objects.filter(pk=self.arquivado.pk).exists())
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class EstaticosTests(TestCase):
+    """Storage e middleware de arquivos estáticos de produção (meuapp/storage.py)"""
+
+    BOOTSTRAP = 'meuapp/vendor/bootstrap-5.3.0/css/bootstrap.min.css'
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'meuapp.storage.CompressedManifestStaticFilesStorage'},
+    }
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz)
+        configuracao = self.settings(STORAGES=self.STORAGES, STATIC_ROOT=self.raiz)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_pagina_sem_manifest(self):
+        # collectstatic ainda não rodou: nomes sem hash, nunca um erro 500
+        with self.assertLogs('meuapp.storage', 'WARNING'):
+            resposta = self.client.get(reverse('login'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, f'/static/{self.BOOTSTRAP}')
+
+    def test_pagina_com_manifest(self):
+        versionado = self.BOOTSTRAP.replace('.css', '.0123456789ab.css')
+        scripts = [f'meuapp/vendor/bootstrap-5.3.0/js/{nome}.min.js' for nome in ('popper', 'bootstrap')]
+        with open(os.path.join(self.raiz, 'staticfiles.json'), 'w') as arquivo:
+            json.dump({'version': '1.1', 'paths': {self.BOOTSTRAP: versionado, **dict(zip(scripts, scripts))}}, arquivo)
+        resposta = self.client.get(reverse('login'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, f'/static/{versionado}')
+
+    def gravar(self, nome, conteudo):
+        caminho = os.path.join(self.raiz, nome)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(conteudo)
+
+    def baixar(self, nome, **cabecalhos):
+        resposta = self.client.get(f'/static/{nome}', **cabecalhos)
+        conteudo = b''.join(resposta.streaming_content) if resposta.streaming else resposta.content
+        return resposta, conteudo
+
+    def test_variantes_precomprimidas(self):
+        self.gravar('meuapp/app.css', b'body { color: red; }')
+        self.gravar('meuapp/app.css.gz', b'gzip')
+        self.gravar('meuapp/app.css.br', b'brotli')
+
+        casos = [
+            ('gzip, deflate, br', 'br', b'brotli'),
+            ('gzip', 'gzip', b'gzip'),
+            ('br;q=0, gzip', 'gzip', b'gzip'),
+            ('', None, b'body { color: red; }'),
+        ]
+        etags = set()
+        for aceitas, codificacao, esperado in casos:
+            with self.subTest(aceitas=aceitas):
+                resposta, conteudo = self.baixar('meuapp/app.css', HTTP_ACCEPT_ENCODING=aceitas)
+                self.assertEqual(resposta.status_code, 200)
+                self.assertEqual(conteudo, esperado)
+                self.assertEqual(resposta.get('Content-Encoding'), codificacao)
+                self.assertEqual(resposta['Vary'], 'Accept-Encoding')
+                self.assertEqual(resposta['Content-Type'], 'text/css')
+                etags.add(resposta['ETag'])
+        # Uma ETag por variante (br, gzip e o original)
+        self.assertEqual(len(etags), 3)
+
+    def test_etag_e_304(self):
+        self.gravar('meuapp/app.css', b'body { color: red; }')
+        self.gravar('meuapp/app.css.gz', b'gzip')
+        resposta, _ = self.baixar('meuapp/app.css', HTTP_ACCEPT_ENCODING='gzip')
+        etag = resposta['ETag']
+
+        resposta, conteudo = self.baixar('meuapp/app.css', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+        self.assertEqual(conteudo, b'')
+        self.assertEqual(resposta['ETag'], etag)
+        self.assertEqual(resposta['Vary'], 'Accept-Encoding')
+        # A ETag da variante gzip não vale para o arquivo sem compressão
+        resposta, _ = self.baixar('meuapp/app.css', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+
+    async def test_asgi_envia_em_blocos(self):
+        conteudo = os.urandom(PrecompressedStaticMiddleware.BLOCO * 2 + 10)
+        self.gravar('meuapp/app.js', conteudo)
+        resposta = await self.async_client.get('/static/meuapp/app.js')
+        self.assertTrue(resposta.is_async)
+        self.assertEqual(resposta['Content-Length'], str(len(conteudo)))
+        blocos = [bloco async for bloco in resposta.streaming_content]
+        self.assertEqual(len(blocos), 3)
+        self.assertEqual(b''.join(blocos), conteudo)
+
+    async def test_asgi_paginas_nao_passam_pelo_disco(self):
+        self.gravar('meuapp/app.js', b'js')
+        with mock.patch.object(
+            PrecompressedStaticMiddleware, '_servir', autospec=True,
+            side_effect=PrecompressedStaticMiddleware._servir,
+        ) as servir:
+            with self.assertLogs('meuapp.storage', 'WARNING'):
+                resposta = await self.async_client.get(reverse('login'))
+            self.assertEqual(resposta.status_code, 200)
+            servir.assert_not_called()
+            await self.async_client.post('/static/meuapp/app.js')
+            servir.assert_not_called()
+            await self.async_client.get('/static/meuapp/app.js')
+            servir.assert_called_once()
+
+    def test_cache_imutavel_so_para_nomes_com_hash(self):
+        self.gravar('meuapp/logo.png', b'png')
+        self.gravar('meuapp/logo.0123456789ab.png', b'png')
+        with open(os.path.join(self.raiz, 'staticfiles.json'), 'w') as arquivo:
+            json.dump({'version': '1.1', 'paths': {'meuapp/logo.png': 'meuapp/logo.0123456789ab.png'}}, arquivo)
+
+        resposta, _ = self.baixar('meuapp/logo.0123456789ab.png')
+        self.assertIn('immutable', resposta['Cache-Control'])
+        resposta, _ = self.baixar('meuapp/logo.png')
+        self.assertEqual(resposta['Cache-Control'], f'public, max-age={settings.STATIC_MAX_AGE}')
+        # Sem variantes comprimidas, a resposta não varia com o Accept-Encoding
+        self.assertFalse(resposta.has_header('Vary'))
+
+
+class GrafoColaboracaoTests(SimpleTestCase):
+
+    def grafo(self):
+        # Equipes: 1 = {1, 2, 3}, 2 = {3, 4}, 3 = {5}, 4 = {6, 7}
+        return GrafoColaboracao([(1, 1), (1, 2), (1, 3), (2, 3), (2, 4), (3, 5), (4, 6), (4, 7)])
+
+    def test_colaboradores_e_componentes(self):
+        grafo = self.grafo()
+        self.assertEqual(grafo.colaboradores(3), [(1, 1), (2, 1), (4, 1)])
+        self.assertEqual(grafo.grau(5), 0)
+        self.assertEqual(grafo.tamanho_componente(1), 4)
+        self.assertEqual(grafo.resumo(), {
+            'usuarios': 7, 'equipes': 4, 'vinculos': 8,
+            'componentes': 3, 'maior_componente': 4, 'sem_colaboradores': 1,
+        })
+
+    def test_alteracoes_incrementais(self):
+        grafo = self.grafo()
+        grafo.alterar(5, adicionados={1, 4, 6})
+        # Repetir uma adição não duplica o vínculo
+        grafo.alterar(5, adicionados={4})
+        self.assertEqual(grafo.colaboradores(4), [(1, 1), (3, 1), (6, 1)])
+        self.assertEqual(grafo.tamanho_componente(7), 6)
+
+        grafo.alterar(2, removidos={3, 4})
+        grafo.alterar(5, removidos={4})
+        self.assertEqual(grafo.colaboradores(4), [])
+        self.assertEqual(grafo.tamanho_componente(7), 5)
+        self.assertEqual(grafo.isolados([4, 5, 6, 99]), [4, 5, 99])
+        self.assertEqual(grafo.resumo()['vinculos'], 8)
+
+
+@override_settings(**CONFIGURACOES_TESTE)
+class ColaboracaoViewTests(TestCase):
+
+    def setUp(self):
+        # O grafo e sua versão sobrevivem entre testes (cujas transações são desfeitas)
+        cache.clear()
+        self.dados = popular('c_', ESCALA_PEQUENA)
+        self.client.force_login(self.dados['coordenador'])
+
+    def test_resumo_e_isolados(self):
+        sozinho = Usuario.objects.create_user('c_sozinho', tipo='estudante', first_name='Sozinho')
+        Usuario.objects.create_user('c_inativo', tipo='estudante', is_active=False)
+        dados = self.client.get(reverse('colaboracao_grafo')).json()
+        self.assertEqual(dados['vinculos'], 3 * ITENS_POR_ESCALA)
+        self.assertEqual(dados['componentes'], 1)
+        self.assertEqual(dados['estudantes_isolados'], [{'id': sozinho.pk, 'nome': 'Sozinho'}])
+
+    def test_usuario_e_atualizacao_incremental(self):
+        estudante = self.dados['estudante']
+        url = reverse('colaboracao_grafo')
+        dados = self.client.get(url, {'usuario': estudante.pk}).json()
+        self.assertEqual(dados['equipes'], ITENS_POR_ESCALA)
+        self.assertEqual(dados['grau'], 1 + ITENS_POR_ESCALA)
+        self.assertEqual(dados['colaboradores'][0], {
+            'id': self.dados['professor'].pk, 'nome': 'Professor', 'equipes_em_comum': ITENS_POR_ESCALA,
+        })
+
+        # m2m_changed -> membros_alterados: aplicado ao mesmo grafo, sem remontar
+        grafo = colaboracao.grafo()
+        novo = Usuario.objects.create_user('c_novo', tipo='estudante')
+        equipe = Equipe.objects.exclude(pk=self.dados['equipe'].pk).filter(nome__startswith='c_').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            equipe.membros.add(novo)
+        self.assertIs(colaboracao.grafo(), grafo)
+        dados = self.client.get(url, {'usuario': novo.pk}).json()
+        self.assertEqual(dados['grau'], 2)
+        self.assertEqual(dados['tamanho_componente'], 3 + ITENS_POR_ESCALA)
+
+        # Exclusão em cascata: o grafo é remontado
+        with self.captureOnCommitCallbacks(execute=True):
+            equipe.delete()
+        self.assertIsNot(colaboracao.grafo(), grafo)
+        self.assertEqual(self.client.get(url, {'usuario': novo.pk}).json()['grau'], 0)
+
+        self.assertEqual(self.client.get(url, {'usuario': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'usuario': 999999}).status_code, 404)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS='replica', DATABASE_REPLICA_PIN=5)
+class ReadWriteRouterTests(SimpleTestCase):
+    """
+    Decisões do roteador. Para rodar toda a suíte com uma réplica SQLite de
+    verdade: DATABASE_REPLICA_NAME=/tmp/replica.sqlite3 python manage.py test meuapp
+    """
+
+    def setUp(self):
+        self.router = ReadWriteRouter()
+        self.factory = RequestFactory()
+
+    def requisitar(self, request, escrever=False):
+        """Executa uma view pelo middleware e retorna (resposta, bancos de leitura)"""
+        bancos = []
+
+        def view(request):
+            bancos.append(self.router.db_for_read(Projeto))
+            if escrever:
+                self.router.db_for_write(Projeto)
+                bancos.append(self.router.db_for_read(Projeto))
+            return HttpResponse()
+
+        return ReadReplicaMiddleware(view)(request), bancos
+
+    def test_get_le_da_replica(self):
+        resposta, bancos = self.requisitar(self.factory.get('/projetos/'))
+        self.assertEqual(bancos, ['replica'])
+        self.assertNotIn(REPLICA_COOKIE, resposta.cookies)
+
+    def test_post_usa_principal_e_fixa_sessao(self):
+        resposta, bancos = self.requisitar(self.factory.post('/projetos/novo/'))
+        self.assertEqual(bancos, ['default'])
+        self.assertEqual(resposta.cookies[REPLICA_COOKIE]['max-age'], 5)
+
+    def test_get_apos_escrita_le_do_principal(self):
+        request = self.factory.get('/projetos/')
+        request.COOKIES[REPLICA_COOKIE] = '1'
+        _, bancos = self.requisitar(request)
+        self.assertEqual(bancos, ['default'])
+
+    def test_escrita_durante_get(self):
+        resposta, bancos = self.requisitar(self.factory.get('/dashboard/'), escrever=True)
+        self.assertEqual(bancos, ['replica', 'default'])
+        self.assertIn(REPLICA_COOKIE, resposta.cookies)
+
+    def test_fora_de_request_usa_principal(self):
+        self.assertEqual(self.router.db_for_read(Projeto), 'default')
+        self.assertEqual(self.router.db_for_write(Projeto), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'meuapp'))
+
+    @override_settings(DATABASE_REPLICA_ALIAS=None)
+    def test_sem_replica(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReadReplicaMiddleware(lambda request: HttpResponse())
+        self.assertEqual(self.router.db_for_read(Projeto), 'default')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requer DATABASE_ENGINE=postgresql (ver README)')
+class PerfilPostgresTests(TestCase):
+    """Perfil de produção; roda contra um PostgreSQL descartável (ver README)"""
+
+    def test_conexoes_persistentes_com_verificacao(self):
+        self.assertGreater(connection.settings_dict['CONN_MAX_AGE'], 0)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_indices_trigrama(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname LIKE '%%_trgm'")
+            indices = {linha[0] for linha in cursor.fetchall()}
+        self.assertIn('meuapp_projeto_titulo_trgm', indices)
+        self.assertIn('meuapp_usuario_first_name_trgm', indices)
+        self.assertIn('meuapp_solicitacaocadastro_nome_completo_trgm', indices)
+
+    def test_indices_de_prefixo(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname LIKE 'meuapp_usuario_%%_prefixo'")
+            indices = {linha[0] for linha in cursor.fetchall()}
+        self.assertEqual(indices, {
+            f'meuapp_usuario_{coluna}_prefixo' for coluna in ('first_name', 'last_name', 'username', 'matricula')
+        })
+
+    def test_busca_usa_indice_trigrama(self):
+        with connection.cursor() as cursor:
+            # Com as tabelas quase vazias o planejador preferiria a varredura
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plano = Projeto.objects.filter(titulo__icontains='api').explain()
+        self.assertIn('meuapp_projeto_titulo_trgm', plano)
+
+    def test_iterator_usa_cursor_no_servidor(self):
+        if connection.settings_dict['DISABLE_SERVER_SIDE_CURSORS']:
+            self.skipTest('DATABASE_PGBOUNCER=True desliga os cursores no servidor')
+        popular('it_', ESCALA_PEQUENA)
+        iterador = Usuario.objects.order_by('pk').iterator(chunk_size=2)
+        next(iterador)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM pg_cursors')
+            self.assertGreaterEqual(cursor.fetchone()[0], 1)
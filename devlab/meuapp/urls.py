@@ -33,6 +33,10 @@ urlpatterns = [
     path('coordenador/', views.coordenador_dashboard, name='coordenador_dashboard'),
     path('professor/', views.professor_dashboard, name='professor_dashboard'),
     path('estudante/', views.estudante_dashboard, name='estudante_dashboard'),
+    # Séries diárias para os gráficos de tendência (ver snapshot_stats)
+    path('coordenador/estatisticas/', views.estatisticas_series, name='estatisticas_series'),
+    path('coordenador/portfolio/', views.portfolio_analise, name='portfolio_analise'),
+    path('coordenador/colaboracao/', views.colaboracao_grafo, name='colaboracao_grafo'),
     
     # ============================================================
     # VIEW PÚBLICA
@@ -48,20 +52,32 @@ urlpatterns = [
     path('projetos/<int:pk>/editar/', views.projeto_editar, name='projeto_editar'),
     path('projetos/<int:pk>/deletar/', views.projeto_deletar, name='projeto_deletar'),
     
+    # ============================================================
+    # ARQUIVO DE PROJETOS CONCLUÍDOS (ver arquivar_projetos)
+    # ============================================================
+    path('arquivo/', views.arquivo_lista, name='arquivo_lista'),
+    path('arquivo/<int:pk>/', views.arquivo_detalhes, name='arquivo_detalhes'),
+    path('arquivo/<int:pk>/restaurar/', views.arquivo_restaurar, name='arquivo_restaurar'),
+    
     # ============================================================
     # CRUD EQUIPES
     # ============================================================
     path('equipes/', views.equipe_lista, name='equipe_lista'),
     path('equipes/nova/', views.equipe_criar, name='equipe_criar'),
+    path('equipes/formar/', views.equipe_formar, name='equipe_formar'),
     path('equipes/<int:pk>/', views.equipe_detalhes, name='equipe_detalhes'),
     path('equipes/<int:pk>/editar/', views.equipe_editar, name='equipe_editar'),
     path('equipes/<int:pk>/deletar/', views.equipe_deletar, name='equipe_deletar'),
+    path('equipes/<int:pk>/membros/', views.equipe_membros, name='equipe_membros'),
+    path('equipes/<int:pk>/membros/adicionar/', views.equipe_membros_adicionar, name='equipe_membros_adicionar'),
+    path('equipes/<int:pk>/membros/remover/', views.equipe_membros_remover, name='equipe_membros_remover'),
     
     # ============================================================
     # CRUD USUÁRIOS (apenas coordenador)
     # ============================================================
     path('usuarios/', views.usuario_lista, name='usuario_lista'),
     path('usuarios/novo/', views.usuario_criar, name='usuario_criar'),
+    path('usuarios/autocomplete/', views.usuario_autocomplete, name='usuario_autocomplete'),
     path('usuarios/<int:pk>/', views.usuario_detalhes, name='usuario_detalhes'),
     path('usuarios/<int:pk>/editar/', views.usuario_editar, name='usuario_editar'),
     path('usuarios/<int:pk>/deletar/', views.usuario_deletar, name='usuario_deletar'),
@@ -71,6 +87,9 @@ urlpatterns = [
     # ============================================================
     path('solicitacoes-cadastro/', views.solicitacoes_cadastro_lista, name='solicitacoes_cadastro_lista'),
     path('solicitacoes-cadastro/<int:pk>/', views.solicitacao_cadastro_detalhes, name='solicitacao_cadastro_detalhes'),
+    # Eventos em tempo real (SSE) e alternativa por long-polling
+    path('solicitacoes-cadastro/eventos/', views.solicitacoes_eventos, name='solicitacoes_eventos'),
+    path('solicitacoes-cadastro/eventos/poll/', views.solicitacoes_eventos_poll, name='solicitacoes_eventos_poll'),
     path('usuarios/<int:pk>/editar-aluno/', views.solicitacao_cadastro_editar_aluno, name='solicitacao_cadastro_editar_aluno'),
 
     # ============================================================
@@ -82,6 +101,8 @@ urlpatterns = [
     #path(aceitar ou rejeitar solicitação de cadastro)
     path('solicitacoes-cadastro/<int:pk>/aprovar/', views.solicitacao_cadastro_aprovar, name='solicitacao_cadastro_aprovar'),
     path('solicitacoes-cadastro/<int:pk>/rejeitar/', views.solicitacao_cadastro_rejeitar, name='solicitacao_cadastro_rejeitar'),
+    # Métricas no formato do Prometheus (meuapp/metricas.py)
+    path('metrics', views.metricas_view, name='metricas'),
       path('test-email/', views.test_email_view, name='test_email'),    
 ]
 # Serializers define the API representation.
@@ -6,17 +6,46 @@ from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.hashers import check_password
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.db.models import Q, Count
+from django.db.models.functions import Substr
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
 from django.core.mail import send_mail
-from .models import Usuario, Projeto, Equipe, ParticipacaoProjeto, SolicitacaoCadastro
+from .models import (
+    Usuario, Projeto, Equipe, ParticipacaoProjeto, SolicitacaoCadastro, ConflitoVersaoMembros,
+    EstatisticaDiaria, ProjetoArquivado, EquipeArquivada,
+)
 from .forms import (
     UsuarioForm, UsuarioEditForm, ProjetoForm, EquipeForm, 
-    ParticipacaoProjetoForm, LoginForm, SolicitacaoCadastroForm, SolicitacaoCadastroAprovarForm
+    ParticipacaoProjetoForm, LoginForm, SolicitacaoCadastroForm, SolicitacaoCadastroAprovarForm,
+    FormacaoEquipesForm,
 )
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
+from django.conf import settings
+from .analytics import CARGA_ALTA, PRAZO_RISCO_DIAS, analise_portfolio
+from .cache import cache_local, totais_solicitacoes, versoes_dashboard
+from .colaboracao import grafo
+from . import arquivo, limites, metricas
+from .team_builder import (
+    FormacaoImpossivel, carregar_candidatos, montar_equipes, nomes_equipes, salvar_equipes,
+)
+from .decorators import async_login_required, async_user_passes_test
+from . import eventos
+from asgiref.sync import sync_to_async
+import asyncio
 import json
+import math
+import smtplib
+import socket
+import ssl
+import time
+from datetime import timedelta
 
 
 # ============================================================
@@ -46,6 +75,18 @@ def login_view(request):
         return redirect('dashboard')
     
     if request.method == 'POST':
+        # Antes de qualquer hash de senha: tentativas acima do limite nem são verificadas
+        ip = limites.ip_cliente(request)
+        identificador = limites.identificador_login(request.POST.get('username'))
+        espera = limites.consumir(ip, identificador)
+        if espera:
+            metricas.incrementar('devlab_logins_total', resultado='bloqueado')
+            espera = math.ceil(espera)
+            messages.error(request, f'Muitas tentativas de login. Tente novamente em {espera} segundo(s).')
+            response = render(request, 'login.html', {'form': LoginForm(request.POST)}, status=429)
+            response['Retry-After'] = espera
+            return response
+
         form = LoginForm(request.POST)
         if form.is_valid():
             username_or_email = form.cleaned_data['username']
@@ -61,11 +102,15 @@ def login_view(request):
                     user = authenticate(request, username=usuario_obj.username, password=password)
                 except Usuario.DoesNotExist:
                     user = None
+            # Uma tentativa, mesmo com duas chamadas a authenticate (métricas em /metrics)
+            metricas.incrementar('devlab_logins_total', resultado='sucesso' if user is not None else 'falha')
             if user is not None:
+                limites.registrar_sucesso(identificador)
                 login(request, user)
                 messages.success(request, f'Bem-vindo, {user.get_full_name() or user.username}!')
                 return redirect('dashboard')
             else:
+                limites.registrar_falha(ip, identificador)
                 messages.error(request, 'Usuário ou senha inválidos.')
     else:
         form = LoginForm()
@@ -84,8 +129,86 @@ def logout_view(request):
 # VIEWS DE DASHBOARD
 # ============================================================
 
-@login_required
-def dashboard(request):
+# Dashboards, listas e detalhes são views assíncronas: sob ASGI (uvicorn, ver
+# README) o processo continua atendendo outros usuários enquanto as consultas
+# de um request rodam, e consultas independentes são disparadas juntas com
+# asyncio.gather. Os templates não podem consultar o banco dentro do event
+# loop, por isso os dados chegam a eles já avaliados (_alista) e com as
+# contagens anotadas. Sob WSGI as mesmas views funcionam normalmente.
+
+# Colunas que os templates de listas e dashboards leem (.only()): descrições,
+# senhas e datas de auditoria não saem do banco. Um campo que ficou de fora
+# seria buscado objeto a objeto ao ser lido; OrcamentoConsultasTests falha
+# nesse caso (meuapp.consultas.proibir_campos_adiados).
+CAMPOS_PROJETO = ('titulo', 'cliente', 'status', 'data_inicio')
+CAMPOS_EQUIPE = ('nome', 'projeto__titulo', 'lider__username', 'lider__first_name', 'lider__last_name')
+CAMPOS_USUARIO = ('username', 'first_name', 'last_name', 'email', 'tipo', 'matricula')
+# Os cartões mostram a descrição com truncatewords: basta o começo do texto
+DESCRICAO_RESUMO_CARACTERES = 400
+
+
+def _com_descricao_resumo(projetos):
+    """Anota o começo da descrição (Projeto.descricao_resumo) no lugar do TextField inteiro"""
+    return projetos.annotate(_descricao_resumo=Substr('descricao', 1, DESCRICAO_RESUMO_CARACTERES))
+
+
+def _projetos_com_totais(projetos):
+    """Anota os totais usados nos templates (evita duas consultas por projeto)"""
+    return projetos.annotate(
+        _total_participantes=Count('equipes__membros', distinct=True),
+        _total_equipes=Count('equipes', distinct=True),
+    )
+
+
+def _equipes_com_totais(equipes):
+    """Traz projeto e líder na mesma consulta e anota o total de membros"""
+    return equipes.select_related('projeto', 'lider').only(*CAMPOS_EQUIPE).annotate(
+        _total_membros=Count('membros')
+    )
+
+
+@cache_local(tamanho=2, ttl=300)
+def _catalogo_projetos(versao_catalogo):
+    """
+    Todos os projetos, com totais, dos dashboards de professor e estudante.
+    Igual para todos os usuários: fica na memória do processo, por versão
+    do catálogo (que muda com projetos, equipes e membros).
+    """
+    return list(_projetos_com_totais(Projeto.objects.only(*CAMPOS_PROJETO)))
+
+
+async def _alista(queryset):
+    """Avalia o queryset com o ORM assíncrono"""
+    return [obj async for obj in queryset]
+
+
+async def _aget_or_404(queryset, **kwargs):
+    """get_object_or_404 para views assíncronas"""
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404('No %s matches the given query.' % queryset.model._meta.object_name)
+
+
+# Fragmentos {% cache %} de professor.html e aluno.html (<prefixo>_<nome>)
+FRAGMENTOS_DASHBOARD = ('resumo', 'meus_projetos_equipes', 'todos_projetos')
+
+
+async def _fragmentos_em_cache(prefixo, user, versao_usuario, versao_catalogo):
+    """Indica se todos os fragmentos do dashboard já estão no cache"""
+    por_usuario = [user.pk, versao_usuario, versao_catalogo]
+    chaves = [
+        # todos_projetos é o mesmo para todos: só varia com o catálogo
+        make_template_fragment_key(
+            f'{prefixo}_{nome}', [versao_catalogo] if nome == 'todos_projetos' else por_usuario
+        )
+        for nome in FRAGMENTOS_DASHBOARD
+    ]
+    return len(await cache.aget_many(chaves)) == len(chaves)
+
+
+@async_login_required
+async def dashboard(request):
     """Dashboard principal - redireciona baseado no tipo de usuário"""
     user = request.user
     
@@ -97,97 +220,144 @@ def dashboard(request):
         return redirect('estudante_dashboard')
 
 
-@login_required
-@user_passes_test(is_coordenador)
-def coordenador_dashboard(request):
+@async_login_required
+@async_user_passes_test(is_coordenador)
+async def coordenador_dashboard(request):
     """Dashboard do coordenador com visão completa do sistema"""
-    projetos = Projeto.objects.all().order_by('-criado_em')[:5]
-    equipes = Equipe.objects.all().order_by('-criada_em')[:5]
-    usuarios = Usuario.objects.all().order_by('-date_joined')[:10]
-    
-    # Estatísticas
-    total_projetos = Projeto.objects.count()
-    total_equipes = Equipe.objects.count()
-    total_usuarios = Usuario.objects.count()
-    total_coordenadores = Usuario.objects.filter(tipo='coordenador').count()
-    total_professores = Usuario.objects.filter(tipo='professor').count()
-    total_estudantes = Usuario.objects.filter(tipo='estudante').count()
-    
-    # Projetos por status
-    projetos_planejados = Projeto.objects.filter(status='planejado').count()
-    projetos_andamento = Projeto.objects.filter(status='andamento').count()
-    projetos_concluidos = Projeto.objects.filter(status='concluido').count()
+    (
+        projetos, equipes, usuarios,
+        totais_projetos, totais_usuarios, total_equipes, totais_solicitacao,
+    ) = await asyncio.gather(
+        _alista(Projeto.objects.only(*CAMPOS_PROJETO).order_by('-criado_em')[:5]),
+        _alista(_equipes_com_totais(Equipe.objects.all()).order_by('-criada_em')[:5]),
+        _alista(Usuario.objects.only(*CAMPOS_USUARIO).order_by('-date_joined')[:10]),
+        # Estatísticas e projetos por status: uma consulta por tabela
+        Projeto.objects.aaggregate(
+            total=Count('pk'),
+            planejados=Count('pk', filter=Q(status='planejado')),
+            andamento=Count('pk', filter=Q(status='andamento')),
+            concluidos=Count('pk', filter=Q(status='concluido')),
+        ),
+        Usuario.objects.aaggregate(
+            total=Count('pk'),
+            coordenadores=Count('pk', filter=Q(tipo='coordenador')),
+            professores=Count('pk', filter=Q(tipo='professor')),
+            estudantes=Count('pk', filter=Q(tipo='estudante')),
+        ),
+        Equipe.objects.acount(),
+        sync_to_async(totais_solicitacoes)(),
+    )
     
     context = {
         'projetos': projetos,
         'equipes': equipes,
         'usuarios': usuarios,
-        'total_projetos': total_projetos,
+        'total_projetos': totais_projetos['total'],
         'total_equipes': total_equipes,
-        'total_usuarios': total_usuarios,
-        'total_coordenadores': total_coordenadores,
-        'total_professores': total_professores,
-        'total_estudantes': total_estudantes,
-        'projetos_planejados': projetos_planejados,
-        'projetos_andamento': projetos_andamento,
-        'projetos_concluidos': projetos_concluidos,
+        'total_usuarios': totais_usuarios['total'],
+        'total_coordenadores': totais_usuarios['coordenadores'],
+        'total_professores': totais_usuarios['professores'],
+        'total_estudantes': totais_usuarios['estudantes'],
+        'projetos_planejados': totais_projetos['planejados'],
+        'projetos_andamento': totais_projetos['andamento'],
+        'projetos_concluidos': totais_projetos['concluidos'],
+        'total_pendentes': totais_solicitacao['pendente'],
     }
     return render(request, 'coordenador.html', context)
 
 
-@login_required
-@user_passes_test(is_professor)
-def professor_dashboard(request):
+@async_login_required
+@async_user_passes_test(is_professor)
+async def professor_dashboard(request):
     """Dashboard do professor"""
+    user = request.user
     # Projetos e equipes em que o professor participa
-    meus_projetos = request.user.projetos_participando.all()
-    minhas_equipes = request.user.equipes_participando.all()
+    meus_projetos = _com_descricao_resumo(
+        _projetos_com_totais(user.projetos_participando.only(*CAMPOS_PROJETO))
+    )
+    minhas_equipes = _equipes_com_totais(user.equipes_participando.all())
     
     # Todos os projetos (visualização limitada)
-    todos_projetos = Projeto.objects.all()
+    todos_projetos = _projetos_com_totais(Projeto.objects.only(*CAMPOS_PROJETO))
+    
+    versao_usuario, versao_catalogo = await sync_to_async(versoes_dashboard)(user.pk)
+    
+    # O banco só é consultado se algum fragmento não estiver no cache (ver meuapp/cache.py)
+    if not await _fragmentos_em_cache('professor', user, versao_usuario, versao_catalogo):
+        meus_projetos, minhas_equipes, todos_projetos = await asyncio.gather(
+            _alista(meus_projetos), _alista(minhas_equipes),
+            sync_to_async(_catalogo_projetos)(versao_catalogo),
+        )
     
     context = {
         'meus_projetos': meus_projetos,
         'minhas_equipes': minhas_equipes,
         'todos_projetos': todos_projetos,
+        'versao_usuario': versao_usuario,
+        'versao_catalogo': versao_catalogo,
+        'cache_timeout': settings.DASHBOARD_CACHE_TIMEOUT,
     }
-    return render(request, 'professor.html', context)
+    # Renderizado fora do event loop: se um fragmento expirar depois da
+    # verificação acima, os querysets ainda não avaliados são consultados ali
+    return await sync_to_async(render)(request, 'professor.html', context)
 
 
-@login_required
-@user_passes_test(is_estudante)
-def estudante_dashboard(request):
+@async_login_required
+@async_user_passes_test(is_estudante)
+async def estudante_dashboard(request):
     """Dashboard do estudante"""
+    user = request.user
     # Projetos e equipes do estudante
     # Inclui projetos em que o usuário tenha ParticipacaoProjeto OU pertença a uma equipe
-    projetos_via_participacao = request.user.projetos_participando.all()
-    projetos_via_equipes = Projeto.objects.filter(equipes__membros=request.user)
-    meus_projetos = (projetos_via_participacao | projetos_via_equipes).distinct()
-    minhas_equipes = request.user.equipes_participando.all()
-    equipe_liderada = getattr(request.user, 'equipe_liderada', None)
+    projetos_via_participacao = user.projetos_participando.all()
+    projetos_via_equipes = Projeto.objects.filter(equipes__membros=user)
+    meus_projetos = _com_descricao_resumo(
+        (projetos_via_participacao | projetos_via_equipes).distinct().only(*CAMPOS_PROJETO)
+    )
+    minhas_equipes = _equipes_com_totais(user.equipes_participando.all())
+    # Com a descrição inteira: o card da equipe liderada a exibe
+    equipe_liderada = _equipes_com_totais(Equipe.objects.filter(lider=user)).only(
+        *CAMPOS_EQUIPE, 'descricao'
+    )
     
     # Todos os projetos (visualização limitada)
-    todos_projetos = Projeto.objects.all()
+    todos_projetos = _projetos_com_totais(Projeto.objects.only(*CAMPOS_PROJETO))
+    
+    versao_usuario, versao_catalogo = await sync_to_async(versoes_dashboard)(user.pk)
+    
+    if await _fragmentos_em_cache('aluno', user, versao_usuario, versao_catalogo):
+        # Só é lida no fragmento aluno_resumo: consultada na renderização se ele expirar
+        equipe_liderada = SimpleLazyObject(equipe_liderada.first)
+    else:
+        equipe_liderada, meus_projetos, minhas_equipes, todos_projetos = await asyncio.gather(
+            equipe_liderada.afirst(), _alista(meus_projetos), _alista(minhas_equipes),
+            sync_to_async(_catalogo_projetos)(versao_catalogo),
+        )
     
     context = {
         'meus_projetos': meus_projetos,
         'minhas_equipes': minhas_equipes,
         'equipe_liderada': equipe_liderada,
         'todos_projetos': todos_projetos,
+        'versao_usuario': versao_usuario,
+        'versao_catalogo': versao_catalogo,
+        'cache_timeout': settings.DASHBOARD_CACHE_TIMEOUT,
     }
-    return render(request, 'aluno.html', context)
+    # Fora do event loop pelo mesmo motivo do dashboard do professor
+    return await sync_to_async(render)(request, 'aluno.html', context)
 
 
 # ============================================================
 # VIEWS DE PROJETOS (CRUD)
 # ============================================================
 
-@login_required
-def projeto_lista(request):
+@async_login_required
+async def projeto_lista(request):
     """Lista todos os projetos (coordenador) ou projetos do usuário"""
     # Coordenador vê todos; professores e estudantes também poderão ver todos os projetos
     # (detalhes completos continuam restritos em projeto_detalhes)
-    projetos = Projeto.objects.all()
+    # A descrição entra na busca, mas não na tabela
+    projetos = Projeto.objects.only(*CAMPOS_PROJETO)
     
     # Busca
     query = request.GET.get('q')
@@ -198,24 +368,28 @@ def projeto_lista(request):
             Q(descricao__icontains=query)
         )
     
-    return render(request, 'projetos/lista.html', {'projetos': projetos})
+    return render(request, 'projetos/lista.html', {'projetos': await _alista(projetos)})
 
 
-@login_required
-def projeto_detalhes(request, pk):
+@async_login_required
+async def projeto_detalhes(request, pk):
     """Detalhes de um projeto"""
-    projeto = get_object_or_404(Projeto, pk=pk)
+    # Consultas independentes (todas dependem só do pk) disparadas juntas
+    projeto, participa, equipes, participantes = await asyncio.gather(
+        _aget_or_404(Projeto.objects.all(), pk=pk),
+        request.user.projetos_participando.filter(pk=pk).aexists(),
+        _alista(Equipe.objects.filter(projeto=pk).only('nome').annotate(_total_membros=Count('membros'))),
+        # participantes agora são todos os membros das equipes associadas ao projeto
+        # (mesma consulta de Projeto.membros_por_equipes)
+        _alista(Usuario.objects.filter(equipes_participando__projeto=pk).only(*CAMPOS_USUARIO).distinct()),
+    )
     
     # Verifica se o usuário tem permissão para ver detalhes completos
-    if request.user.tipo == 'coordenador' or projeto in request.user.projetos_participando.all():
+    if request.user.tipo == 'coordenador' or participa:
         detalhes_completos = True
     else:
         detalhes_completos = False
     
-    equipes = projeto.equipes.all()
-    # participantes agora são todos os membros das equipes associadas ao projeto
-    participantes = projeto.membros_por_equipes()
-    
     context = {
         'projeto': projeto,
         'detalhes_completos': detalhes_completos,
@@ -279,14 +453,89 @@ def projeto_deletar(request, pk):
 
 
 # ============================================================
-# VIEWS DE EQUIPES (CRUD)
+# ARQUIVO DE PROJETOS CONCLUÍDOS (somente leitura; ver meuapp/arquivo.py)
 # ============================================================
 
+CAMPOS_ARQUIVO = ('titulo', 'cliente', 'data_inicio', 'data_fim_prevista', 'arquivado_em')
+
+
+@async_login_required
+async def arquivo_lista(request):
+    """Projetos arquivados, com busca própria e paginação"""
+    query = request.GET.get('q', '').strip()
+    projetos = arquivo.buscar(query) if query else ProjetoArquivado.objects.all()
+    try:
+        pagina = max(1, int(request.GET.get('pagina', 1)))
+    except ValueError:
+        pagina = 1
+
+    # Um item a mais só para saber se há próxima página (sem COUNT no arquivo inteiro)
+    por_pagina = settings.ARQUIVO_POR_PAGINA
+    inicio = (pagina - 1) * por_pagina
+    projetos = await _alista(projetos.only(*CAMPOS_ARQUIVO)[inicio:inicio + por_pagina + 1])
+    
+    context = {
+        'projetos': projetos[:por_pagina],
+        'query': query,
+        'pagina': pagina,
+        'anterior': pagina - 1 if pagina > 1 else None,
+        'proxima': pagina + 1 if len(projetos) > por_pagina else None,
+    }
+    return render(request, 'arquivo/lista.html', context)
+
+
+@async_login_required
+async def arquivo_detalhes(request, pk):
+    """Detalhes de um projeto arquivado"""
+    projeto, participou, equipes, participantes = await asyncio.gather(
+        _aget_or_404(ProjetoArquivado.objects.defer('busca'), pk=pk),
+        request.user.participacoes_arquivadas.filter(projeto=pk).aexists(),
+        _alista(
+            EquipeArquivada.objects.filter(projeto=pk).select_related('lider')
+            .only('nome', 'lider__username', 'lider__first_name', 'lider__last_name')
+            .annotate(total_membros=Count('membros'))
+        ),
+        _alista(Usuario.objects.filter(equipes_arquivadas__projeto=pk).only(*CAMPOS_USUARIO).distinct()),
+    )
+    
+    context = {
+        'projeto': projeto,
+        # Mesma regra de projeto_detalhes
+        'detalhes_completos': request.user.tipo == 'coordenador' or participou,
+        'equipes': equipes,
+        'participantes': participantes,
+    }
+    return render(request, 'arquivo/detalhes.html', context)
+
+
 @login_required
-def equipe_lista(request):
+@user_passes_test(is_coordenador)
+@require_POST
+def arquivo_restaurar(request, pk):
+    """Devolve um projeto arquivado às tabelas de trabalho (apenas coordenador)"""
+    try:
+        projeto, equipes_sem_lider = arquivo.restaurar(pk)
+    except ProjetoArquivado.DoesNotExist:
+        raise Http404('Projeto arquivado não encontrado.')
+    except IntegrityError:
+        messages.error(request, 'Já existe um projeto com este identificador; nada foi restaurado.')
+        return redirect('arquivo_detalhes', pk=pk)
+    
+    messages.success(request, f'Projeto "{projeto.titulo}" restaurado do arquivo.')
+    for nome in equipes_sem_lider:
+        messages.warning(request, f'A equipe "{nome}" voltou sem líder: o antigo líder já lidera outra equipe.')
+    return redirect('projeto_detalhes', pk=projeto.pk)
+
+
+# ============================================================
+# VIEWS DE EQUIPES (CRUD)
+# ============================================================
+
+@async_login_required
+async def equipe_lista(request):
     """Lista todas as equipes (coordenador) ou equipes do usuário"""
     # Coordenador vê todas; professores e estudantes também poderão ver todas as equipes
-    equipes = Equipe.objects.all()
+    equipes = _equipes_com_totais(Equipe.objects.all())
     
     # Busca
     query = request.GET.get('q')
@@ -296,22 +545,24 @@ def equipe_lista(request):
             Q(projeto__titulo__icontains=query)
         )
     
-    return render(request, 'equipes/lista.html', {'equipes': equipes})
+    return render(request, 'equipes/lista.html', {'equipes': await _alista(equipes)})
 
 
-@login_required
-def equipe_detalhes(request, pk):
+@async_login_required
+async def equipe_detalhes(request, pk):
     """Detalhes de uma equipe"""
-    equipe = get_object_or_404(Equipe, pk=pk)
+    equipe, participa, membros = await asyncio.gather(
+        _aget_or_404(Equipe.objects.select_related('projeto', 'lider'), pk=pk),
+        request.user.equipes_participando.filter(pk=pk).aexists(),
+        _alista(Usuario.objects.filter(equipes_participando=pk).only(*CAMPOS_USUARIO)),
+    )
     
     # Verifica se o usuário tem permissão para ver detalhes completos
-    if request.user.tipo == 'coordenador' or equipe in request.user.equipes_participando.all():
+    if request.user.tipo == 'coordenador' or participa:
         detalhes_completos = True
     else:
         detalhes_completos = False
     
-    membros = equipe.membros.all()
-    
     context = {
         'equipe': equipe,
         'detalhes_completos': detalhes_completos,
@@ -373,15 +624,190 @@ def equipe_deletar(request, pk):
     return render(request, 'equipes/confirmar_delete.html', {'equipe': equipe})
 
 
+@login_required
+@user_passes_test(is_coordenador)
+def equipe_formar(request):
+    """Divide uma turma em equipes de um projeto automaticamente (meuapp/team_builder.py)"""
+    equipes_planejadas = None
+    if request.method == 'POST':
+        form = FormacaoEquipesForm(request.POST)
+        if form.is_valid():
+            dados = form.cleaned_data
+            estudantes, professores = carregar_candidatos(
+                dados['projeto'],
+                dados['prefixo_matricula'],
+                [professor.pk for professor in dados['professores']] or None,
+            )
+            try:
+                plano = montar_equipes(estudantes, professores, dados['tamanho'])
+                if not dados['simular']:
+                    equipes = salvar_equipes(dados['projeto'], plano, dados['nome_base'])
+                    messages.success(
+                        request,
+                        f'{len(equipes)} equipes criadas em "{dados["projeto"].titulo}" '
+                        f'com {len(estudantes)} estudantes.'
+                    )
+                    return redirect('equipe_lista')
+            except FormacaoImpossivel as erro:
+                form.add_error(None, str(erro))
+            except IntegrityError:
+                # Outro coordenador definiu um dos líderes escolhidos nesse meio tempo
+                form.add_error(None, 'Um dos líderes escolhidos passou a liderar outra equipe. Tente novamente.')
+            else:
+                # Simulação: nomes de todos os envolvidos em uma consulta
+                usuarios = Usuario.objects.only('username', 'first_name', 'last_name').in_bulk(
+                    {pk for planejada in plano for pk in [planejada.professor] + planejada.estudantes}
+                )
+                nomes = nomes_equipes(dados['projeto'], len(plano), dados['nome_base'])
+                equipes_planejadas = [
+                    {
+                        'nome': nome,
+                        'professor': usuarios[planejada.professor],
+                        'lider': usuarios.get(planejada.lider),
+                        'estudantes': [usuarios[pk] for pk in planejada.estudantes],
+                    }
+                    for nome, planejada in zip(nomes, plano)
+                ]
+    else:
+        form = FormacaoEquipesForm()
+    
+    return render(request, 'equipes/formar.html', {
+        'form': form,
+        'equipes_planejadas': equipes_planejadas,
+    })
+
+
 # ============================================================
-# VIEWS DE USUÁRIOS (CRUD - apenas coordenador)
+# API DE MEMBROS DE EQUIPE (alterações incrementais)
 # ============================================================
 
+def _etag_membros(equipe):
+    """ETag da lista de membros de uma equipe"""
+    return f'"equipe-{equipe.pk}-v{equipe.versao_membros}"'
+
+
+def _versao_if_match(request, equipe):
+    """
+    Lê o cabeçalho If-Match.
+    Retorna None se ausente (ou '*'), a versão informada se válida
+    ou -1 se a ETag não pertence a esta equipe (sempre conflita).
+    """
+    if_match = request.headers.get('If-Match', '').strip()
+    if not if_match or if_match == '*':
+        return None
+    if if_match.startswith('W/'):
+        if_match = if_match[2:]
+    prefixo = f'equipe-{equipe.pk}-v'
+    etag = if_match.strip('"')
+    versao = etag[len(prefixo):]
+    if not etag.startswith(prefixo) or not versao.isdigit():
+        return -1
+    return int(versao)
+
+
+def _resposta_membros(equipe, status=200, **dados):
+    response = JsonResponse({'versao': equipe.versao_membros, **dados}, status=status)
+    response['ETag'] = _etag_membros(equipe)
+    return response
+
+
+@login_required
+@user_passes_test(is_coordenador)
+def equipe_membros(request, pk):
+    """Lista os IDs dos membros da equipe (JSON) com a ETag da versão atual"""
+    equipe = get_object_or_404(Equipe.objects.only('pk', 'versao_membros'), pk=pk)
+    membros = list(equipe.membros.values_list('pk', flat=True))
+    return _resposta_membros(equipe, membros=membros)
+
+
+def _ids_usuarios(corpo):
+    """IDs do JSON {"usuarios": [ids]}; None se o corpo não estiver nesse formato"""
+    try:
+        data = json.loads(corpo)
+    except ValueError:
+        return None
+    usuarios = data.get('usuarios', []) if isinstance(data, dict) else None
+    if not isinstance(usuarios, list):
+        return None
+    # bool é subclasse de int: true/false não são IDs
+    if not all(isinstance(usuario_id, int) and not isinstance(usuario_id, bool) for usuario_id in usuarios):
+        return None
+    return set(usuarios)
+
+
+def _alterar_membros(request, pk, operacao):
+    """Corpo comum dos endpoints de adicionar/remover membros"""
+    equipe = get_object_or_404(Equipe.objects.only('pk', 'versao_membros', 'lider_id'), pk=pk)
+
+    usuarios = _ids_usuarios(request.body)
+    if usuarios is None:
+        return JsonResponse({
+            'success': False,
+            'message': 'Envie um JSON no formato {"usuarios": [ids]}.'
+        }, status=400)
+
+    # O líder sai da equipe pela edição (trocando o líder), nunca por aqui
+    if operacao == 'remover' and equipe.lider_id in usuarios:
+        return JsonResponse({
+            'success': False,
+            'message': 'O líder não pode ser removido da equipe; troque o líder antes.',
+        }, status=400)
+
+    if operacao == 'adicionar' and usuarios:
+        validos = set(Usuario.objects.filter(
+            pk__in=usuarios, tipo__in=['professor', 'estudante']
+        ).values_list('pk', flat=True))
+        invalidos = usuarios - validos
+        if invalidos:
+            return JsonResponse({
+                'success': False,
+                'message': 'Usuários inválidos para a equipe.',
+                'invalidos': sorted(invalidos),
+            }, status=400)
+
+    try:
+        adicionados, removidos = equipe.atualizar_membros(
+            versao=_versao_if_match(request, equipe),
+            **{operacao: usuarios}
+        )
+    except ConflitoVersaoMembros:
+        equipe.refresh_from_db(fields=['versao_membros'])
+        return _resposta_membros(
+            equipe, status=412, success=False,
+            message='A equipe foi alterada por outra pessoa. Recarregue os membros e tente novamente.'
+        )
+
+    return _resposta_membros(
+        equipe, success=True,
+        adicionados=sorted(adicionados), removidos=sorted(removidos)
+    )
+
+
 @login_required
 @user_passes_test(is_coordenador)
-def usuario_lista(request):
+@require_POST
+def equipe_membros_adicionar(request, pk):
+    """Adiciona membros à equipe via AJAX (apenas os que ainda não são membros)"""
+    return _alterar_membros(request, pk, 'adicionar')
+
+
+@login_required
+@user_passes_test(is_coordenador)
+@require_POST
+def equipe_membros_remover(request, pk):
+    """Remove membros da equipe via AJAX (apenas os que são membros)"""
+    return _alterar_membros(request, pk, 'remover')
+
+
+# ============================================================
+# VIEWS DE USUÁRIOS (CRUD - apenas coordenador)
+# ============================================================
+
+@async_login_required
+@async_user_passes_test(is_coordenador)
+async def usuario_lista(request):
     """Lista todos os usuários (apenas coordenador)"""
-    usuarios = Usuario.objects.all().order_by('tipo', 'username')
+    usuarios = Usuario.objects.only(*CAMPOS_USUARIO).order_by('tipo', 'username')
     
     # Filtro por tipo
     tipo_filtro = request.GET.get('tipo')
@@ -399,7 +825,54 @@ def usuario_lista(request):
             Q(matricula__icontains=query)
         )
     
-    return render(request, 'usuarios/lista.html', {'usuarios': usuarios})
+    return render(request, 'usuarios/lista.html', {'usuarios': await _alista(usuarios)})
+
+
+AUTOCOMPLETE_LIMITE = 20
+
+
+@login_required
+@user_passes_test(is_coordenador)
+def usuario_autocomplete(request):
+    """Busca incremental de usuários (JSON) para os widgets de autocomplete"""
+    usuarios = Usuario.objects.filter(tipo__in=['professor', 'estudante'])
+    if request.GET.get('tipo') in ('professor', 'estudante'):
+        usuarios = usuarios.filter(tipo=request.GET['tipo'])
+
+    # Campo líder: apenas usuários que ainda não lideram outra equipe
+    if request.GET.get('lider'):
+        filtro_lider = Q(equipe_liderada__isnull=True)
+        equipe_id = request.GET.get('equipe', '')
+        if equipe_id.isdigit():
+            filtro_lider |= Q(equipe_liderada=equipe_id)
+        usuarios = usuarios.filter(filtro_lider)
+
+    # Busca por prefixo, atendida pelos índices da migração 0011 nos quatro
+    # campos. Cada termo digitado precisa casar com algum dos campos.
+    query = request.GET.get('q', '').strip()
+    for termo in query.split()[:5]:
+        usuarios = usuarios.filter(
+            Q(first_name__istartswith=termo) |
+            Q(last_name__istartswith=termo) |
+            Q(username__istartswith=termo) |
+            Q(matricula__startswith=termo)
+        )
+
+    usuarios = usuarios.order_by('first_name', 'last_name').values(
+        'id', 'username', 'first_name', 'last_name', 'matricula', 'tipo'
+    )[:AUTOCOMPLETE_LIMITE]
+
+    tipos = dict(Usuario.TIPO_CHOICES)
+    resultados = []
+    for u in usuarios:
+        nome = f"{u['first_name']} {u['last_name']}".strip() or u['username']
+        resultados.append({
+            'id': u['id'],
+            'text': f"{nome} ({tipos.get(u['tipo'], u['tipo'])})",
+            'matricula': u['matricula'] or '',
+        })
+
+    return JsonResponse({'results': resultados})
 
 
 @login_required
@@ -459,6 +932,14 @@ def usuario_deletar(request, pk):
 # VIEW PÚBLICA
 # ============================================================
 
+@cache_local(tamanho=1, ttl=60, invalidar_com=(SolicitacaoCadastro,), compartilhado=True)
+def _aprovacoes_recentes():
+    """Últimas solicitações aprovadas, mostradas na home a todos os visitantes"""
+    return list(
+        SolicitacaoCadastro.objects.filter(status='aprovada').only('nome_completo').order_by('-data_aprovacao')[:5]
+    )
+
+
 def home(request):
     """Página inicial pública com opção de login e contato da coordenação."""
     coordenacao = {
@@ -470,7 +951,7 @@ def home(request):
     }
     
     # Buscar últimas solicitações aprovadas para mostrar na home
-    solicitacoes_aprovadas = SolicitacaoCadastro.objects.filter(status='aprovada').order_by('-data_aprovacao')[:5]
+    solicitacoes_aprovadas = _aprovacoes_recentes()
 
     context = {
         'coordenacao': coordenacao,
@@ -481,7 +962,7 @@ def home(request):
 
 def visitante_view(request):
     """View pública para visitantes"""
-    projetos = Projeto.objects.all()
+    projetos = _com_descricao_resumo(_projetos_com_totais(Projeto.objects.only(*CAMPOS_PROJETO)))
     total_projetos = projetos.count()
     total_equipes = Equipe.objects.count()
     
@@ -572,10 +1053,12 @@ def solicitacoes_cadastro_lista(request):
     status = request.GET.get('status', 'pendente')
     status = str(status)  # Garante que status_atual será sempre string
     
-    if status == 'todas':
-        solicitacoes = SolicitacaoCadastro.objects.all()
-    else:
-        solicitacoes = SolicitacaoCadastro.objects.filter(status=status)
+    # Apenas as colunas exibidas na tabela (senha_hash e motivo_rejeicao ficam de fora)
+    solicitacoes = SolicitacaoCadastro.objects.only(
+        'nome_completo', 'email', 'matricula', 'data_solicitacao', 'status'
+    )
+    if status != 'todas':
+        solicitacoes = solicitacoes.filter(status=status)
     
     # Busca por nome ou email
     query = request.GET.get('q')
@@ -586,12 +1069,15 @@ def solicitacoes_cadastro_lista(request):
             Q(matricula__icontains=query)
         )
     
+    # Totais por status: um GROUP BY, em cache até a próxima alteração
+    totais = totais_solicitacoes()
+    
     context = {
         'solicitacoes': solicitacoes,
         'status_atual': status,
-        'total_pendentes': SolicitacaoCadastro.objects.filter(status='pendente').count(),
-        'total_aprovadas': SolicitacaoCadastro.objects.filter(status='aprovada').count(),
-        'total_rejeitadas': SolicitacaoCadastro.objects.filter(status='rejeitada').count(),
+        'total_pendentes': totais['pendente'],
+        'total_aprovadas': totais['aprovada'],
+        'total_rejeitadas': totais['rejeitada'],
     }
     return render(request, 'solicitacoes_cadastro/lista.html', context)
 
@@ -696,15 +1182,17 @@ def solicitacao_cadastro_editar_aluno(request, pk):
     return render(request, 'usuarios/form.html', context)
 
 
-@login_required
-@user_passes_test(is_coordenador)
-def usuario_detalhes(request, pk):
+@async_login_required
+@async_user_passes_test(is_coordenador)
+async def usuario_detalhes(request, pk):
     """Exibe os detalhes de um usuário (apenas para coordenador)"""
-    usuario = get_object_or_404(Usuario, pk=pk)
-    
-    # Buscar projetos e equipes do usuário
-    projetos_participando = usuario.projetos_participando.all()
-    equipes_participando = usuario.equipes_participando.all()
+    # Usuário, projetos e equipes do usuário em paralelo
+    # (equipe_liderada é usada no template para marcar a equipe que ele lidera)
+    usuario, projetos_participando, equipes_participando = await asyncio.gather(
+        _aget_or_404(Usuario.objects.select_related('equipe_liderada'), pk=pk),
+        _alista(Projeto.objects.filter(participantes=pk).only('titulo')),
+        _alista(Equipe.objects.filter(membros=pk).only('nome')),
+    )
     
     context = {
         'usuario': usuario,
@@ -818,7 +1306,313 @@ def solicitacao_cadastro_rejeitar(request, pk):
             'success': False,
             'message': str(e)
         }, status=500)
+
+
+# ============================================================
+# EVENTOS DAS SOLICITAÇÕES DE CADASTRO (SSE e long-polling)
+# ============================================================
+# Os eventos vêm de meuapp/eventos.py (publicados pelos sinais). Sob ASGI o
+# SSE mantém a conexão aberta e o long-polling espera pelo próximo evento;
+# sob WSGI isso prenderia um worker por coordenador conectado, então os dois
+# respondem na hora com o que houver e o cliente repete a cada
+# EVENTOS_INTERVALO_WSGI segundos (ainda sem consultar o banco).
+
+EVENTOS_HEARTBEAT = 15
+
+
+def _ultimo_evento(request):
+    """Último id recebido pelo cliente (Last-Event-ID ou ?ultimo=), ou None"""
+    valor = request.headers.get('Last-Event-ID') or request.GET.get('ultimo', '')
+    return int(valor) if valor.isdigit() else None
+
+
+def _evento_sse(evento):
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+
+
+@async_login_required
+@async_user_passes_test(is_coordenador)
+async def solicitacoes_eventos(request):
+    """Stream SSE (text/event-stream) com os eventos das solicitações de cadastro"""
+    backend = eventos.backend()
+    canal = eventos.CANAL_SOLICITACOES
+    ultimo = _ultimo_evento(request)
+    if ultimo is None:
+        # Primeira conexão: só interessa o que acontecer a partir de agora
+        ultimo = await sync_to_async(backend.ultimo_id)(canal)
+    
+    if not isinstance(request, ASGIRequest):
+        pendentes = await sync_to_async(backend.desde)(canal, ultimo)
+        # Um bloco só com "id" atualiza o Last-Event-ID do EventSource
+        corpo = f'retry: {settings.EVENTOS_INTERVALO_WSGI * 1000}\nid: {ultimo}\n\n'
+        corpo += ''.join(_evento_sse(evento) for evento in pendentes)
+        return HttpResponse(corpo, content_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    async def stream():
+        nonlocal ultimo
+        yield f'retry: 5000\nid: {ultimo}\n\n'
+        # A conexão é encerrada após EVENTOS_SSE_DURACAO (o navegador reconecta
+        # com o Last-Event-ID); assim conexões de clientes que sumiram não
+        # ficam abertas indefinidamente
+        fim = time.monotonic() + settings.EVENTOS_SSE_DURACAO
+        while True:
+            restante = fim - time.monotonic()
+            if restante <= 0:
+                break
+            novos = await backend.aguardar(canal, ultimo, min(EVENTOS_HEARTBEAT, restante))
+            if not novos:
+                yield ': ping\n\n'  # mantém a conexão viva em proxies
+                continue
+            for evento in novos:
+                yield _evento_sse(evento)
+            ultimo = novos[-1]['id']
+    
+    return StreamingHttpResponse(stream(), content_type='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # nginx não deve acumular o stream
+    })
+
+
+@async_login_required
+@async_user_passes_test(is_coordenador)
+async def solicitacoes_eventos_poll(request):
+    """Long-polling (JSON): alternativa ao SSE para navegadores e proxies sem suporte"""
+    backend = eventos.backend()
+    canal = eventos.CANAL_SOLICITACOES
+    ultimo = _ultimo_evento(request)
+    asgi = isinstance(request, ASGIRequest)
     
+    if ultimo is None:
+        novos = []
+        ultimo = await sync_to_async(backend.ultimo_id)(canal)
+    else:
+        espera = settings.EVENTOS_LONGPOLL_TIMEOUT if asgi else 0
+        novos = await backend.aguardar(canal, ultimo, espera)
+    
+    return JsonResponse({
+        'success': True,
+        'ultimo': novos[-1]['id'] if novos else ultimo,
+        'eventos': novos,
+        # Segundos até a próxima consulta (0: pode reconectar na hora)
+        'intervalo': 0 if asgi else settings.EVENTOS_INTERVALO_WSGI,
+    }, headers={'Cache-Control': 'no-cache'})
+
+
+# ============================================================
+# ESTATÍSTICAS DIÁRIAS (séries para os gráficos de tendência)
+# ============================================================
+# Lidas só de EstatisticaDiaria, gravada uma vez por dia por
+# manage.py snapshot_stats; o histórico nunca é recalculado aqui.
+
+ESTATISTICAS_DIAS_PADRAO = 30
+ESTATISTICAS_DIAS_MAXIMO = 366
+SERIES_ESTATISTICAS = [
+    'projetos_planejados', 'projetos_andamento', 'projetos_concluidos', 'equipes_ativas',
+    'novos_coordenadores', 'novos_professores', 'novos_estudantes',
+    'solicitacoes_aprovadas', 'latencia_aprovacao',
+]
+
+
+@async_login_required
+@async_user_passes_test(is_coordenador)
+async def estatisticas_series(request):
+    """Séries diárias (JSON) dos últimos ?dias= dias, uma lista por indicador"""
+    dias = request.GET.get('dias', '')
+    if dias.isdigit() and int(dias) > 0:
+        dias = min(int(dias), ESTATISTICAS_DIAS_MAXIMO)
+    else:
+        dias = ESTATISTICAS_DIAS_PADRAO
+    desde = timezone.localdate() - timedelta(days=dias - 1)
+    
+    linhas = await _alista(
+        EstatisticaDiaria.objects.filter(data__gte=desde).values_list('data', *SERIES_ESTATISTICAS)
+    )
+    
+    series = {nome: [] for nome in SERIES_ESTATISTICAS}
+    for linha in linhas:
+        for nome, valor in zip(SERIES_ESTATISTICAS, linha[1:]):
+            series[nome].append(valor)
+    # Duração em segundos (null nos dias sem aprovações)
+    series['latencia_aprovacao'] = [
+        latencia.total_seconds() if latencia is not None else None
+        for latencia in series['latencia_aprovacao']
+    ]
+    
+    return JsonResponse({
+        'success': True,
+        'datas': [linha[0].isoformat() for linha in linhas],
+        'series': series,
+    }, headers={'Cache-Control': 'private, max-age=300'})
+
+
+# ============================================================
+# ANÁLISE DA CARTEIRA DE PROJETOS
+# ============================================================
+
+@login_required
+@user_passes_test(is_coordenador)
+def portfolio_analise(request):
+    """Prazos, carga dos usuários, tamanho das equipes e linha do tempo (meuapp/analytics.py)"""
+    # View síncrona: o cálculo usa a CPU e não deve ocupar o loop do ASGI
+    analise = analise_portfolio()
+    
+    # Títulos e nomes só dos itens listados
+    projetos = Projeto.objects.only('titulo', 'cliente', 'status', 'data_fim_prevista').in_bulk(
+        [pk for pk, _ in analise['atrasados'] + analise['em_risco']]
+    )
+    usuarios = Usuario.objects.only('username', 'first_name', 'last_name', 'tipo').in_bulk(
+        [pk for pk, _ in analise['mais_carregados']]
+    )
+    
+    maior_semana = max([total for _, total in analise['linha_do_tempo']] + [1])
+    context = dict(
+        analise,
+        prazo_risco_dias=PRAZO_RISCO_DIAS,
+        carga_alta=CARGA_ALTA,
+        atrasados=[(projetos[pk], dias) for pk, dias in analise['atrasados'] if pk in projetos],
+        em_risco=[(projetos[pk], dias) for pk, dias in analise['em_risco'] if pk in projetos],
+        mais_carregados=[(usuarios[pk], carga) for pk, carga in analise['mais_carregados'] if pk in usuarios],
+        linha_do_tempo=[
+            (semana, total, round(100 * total / maior_semana))
+            for semana, total in analise['linha_do_tempo']
+        ],
+        hoje=timezone.localdate(),
+    )
+    return render(request, 'portfolio.html', context)
+
+
+# ============================================================
+# GRAFO DE COLABORAÇÃO
+# ============================================================
+
+COLABORACAO_LIMITE_PADRAO = 50
+COLABORACAO_LIMITE_MAXIMO = 500
+
+
+def _nome_usuario(first_name, last_name, username):
+    return f"{first_name} {last_name}".strip() or username
+
+
+@login_required
+@user_passes_test(is_coordenador)
+def colaboracao_grafo(request):
+    """
+    Quem colaborou com quem (membros de uma mesma equipe), em JSON
+    (meuapp/colaboracao.py).
+
+    Sem parâmetros: totais do grafo, componentes conexos e estudantes ativos
+    sem nenhum colaborador. Com ?usuario=<id>: colaboradores do usuário com
+    o número de equipes em comum (até ?limite=), grau e tamanho do componente.
+    """
+    # View síncrona: a montagem do grafo usa a CPU e não deve ocupar o loop do ASGI
+    grafo_colaboracao = grafo()
+    limite = request.GET.get('limite', '')
+    if limite.isdigit() and int(limite) > 0:
+        limite = min(int(limite), COLABORACAO_LIMITE_MAXIMO)
+    else:
+        limite = COLABORACAO_LIMITE_PADRAO
+    
+    usuario_id = request.GET.get('usuario')
+    if usuario_id is None:
+        estudantes = list(
+            Usuario.objects.filter(tipo='estudante', is_active=True)
+            .order_by('first_name', 'last_name', 'pk')
+            .values_list('pk', 'first_name', 'last_name', 'username')
+        )
+        isolados = set(grafo_colaboracao.isolados(pk for pk, *_ in estudantes))
+        isolados = [linha for linha in estudantes if linha[0] in isolados]
+        return JsonResponse({
+            'success': True,
+            **grafo_colaboracao.resumo(),
+            'total_estudantes_isolados': len(isolados),
+            'estudantes_isolados': [
+                {'id': pk, 'nome': _nome_usuario(*nome)} for pk, *nome in isolados[:limite]
+            ],
+        })
+    
+    if not usuario_id.isdigit():
+        return JsonResponse({'success': False, 'message': 'Informe o id numérico do usuário.'}, status=400)
+    usuario_id = int(usuario_id)
+    colaboradores = grafo_colaboracao.colaboradores(usuario_id)
+    
+    # Nomes do usuário e dos colaboradores listados em uma consulta
+    nomes = {
+        pk: _nome_usuario(*nome)
+        for pk, *nome in Usuario.objects.filter(
+            pk__in=[usuario_id] + [pk for pk, _ in colaboradores[:limite]]
+        ).values_list('pk', 'first_name', 'last_name', 'username')
+    }
+    if usuario_id not in nomes:
+        return JsonResponse({'success': False, 'message': 'Usuário não encontrado.'}, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'usuario': {'id': usuario_id, 'nome': nomes[usuario_id]},
+        'equipes': grafo_colaboracao.total_equipes(usuario_id),
+        'grau': len(colaboradores),
+        'tamanho_componente': grafo_colaboracao.tamanho_componente(usuario_id),
+        'colaboradores': [
+            {'id': pk, 'nome': nomes[pk], 'equipes_em_comum': total}
+            for pk, total in colaboradores[:limite] if pk in nomes
+        ],
+    })
+
+
+# ============================================================
+# MÉTRICAS (PROMETHEUS)
+# ============================================================
+
+ENDERECOS_LOCAIS = ('127.0.0.1', '::1')
+
+
+def metricas_view(request):
+    """
+    Métricas de todos os processos no formato texto do Prometheus
+    (meuapp/metricas.py). Exige METRICAS_TOKEN no cabeçalho Authorization
+    ("Bearer <token>"); sem token configurado, nega tudo, exceto localhost
+    com METRICAS_PERMITIR_LOCAL.
+    """
+    token = settings.METRICAS_TOKEN
+    if token:
+        autorizado = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    else:
+        autorizado = (
+            settings.METRICAS_PERMITIR_LOCAL and request.META.get('REMOTE_ADDR') in ENDERECOS_LOCAIS
+        )
+    if not autorizado:
+        return HttpResponse('Acesso negado.', status=403, content_type='text/plain; charset=utf-8')
+    
+    valores = metricas.coletar()
+    
+    def soma(nome, **rotulos):
+        return sum(
+            valor for (metrica, pares), valor in valores.items()
+            if metrica == nome and all(par in pares for par in rotulos.items())
+        )
+    
+    # Valores derivados, calculados sobre a soma de todos os processos
+    caches = sorted({
+        dict(pares)['cache'] for metrica, pares in valores if metrica == 'devlab_cache_local_total'
+    })
+    taxas = []
+    for nome in caches:
+        acertos = soma('devlab_cache_local_total', cache=nome, resultado='acerto')
+        leituras = acertos + soma('devlab_cache_local_total', cache=nome, resultado='falta')
+        if leituras:
+            taxas.append(([('cache', nome)], acertos / leituras))
+    extras = [
+        ('devlab_cache_local_taxa_acerto', 'gauge', 'Fração das leituras dos caches locais atendidas sem calcular', taxas),
+        ('devlab_emails_em_envio', 'gauge', 'Mensagens de e-mail sendo enviadas agora', [
+            ([], soma('devlab_emails_iniciados_total') - soma('devlab_emails_total')),
+        ]),
+        ('devlab_solicitacoes_pendentes', 'gauge', 'Solicitações de cadastro aguardando análise', [
+            ([], totais_solicitacoes()['pendente']),
+        ]),
+    ]
+    return HttpResponse(
+        metricas.exposicao(valores, extras), content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
 
 def test_email_view(request):
     """View para testar configurações de email via web (apenas para DEBUG)"""